@@ -0,0 +1,110 @@
+import os
+
+# Tamaños predefinidos: módulos, ficheros Kotlin por módulo, entradas del catálogo,
+# permisos y actividades del manifiesto de cada módulo
+PROFILES = {
+    "small": {"modules": 5, "files": 20, "catalog": 50, "permissions": 5, "activities": 10},
+    "medium": {"modules": 50, "files": 100, "catalog": 300, "permissions": 20, "activities": 50},
+    "monorepo": {"modules": 200, "files": 50, "catalog": 800, "permissions": 30, "activities": 100},
+}
+
+PACKAGE = "com.example.bench"
+PERMISSION_NAMES = [
+    "INTERNET", "ACCESS_FINE_LOCATION", "ACCESS_COARSE_LOCATION", "CAMERA", "WRITE_EXTERNAL_STORAGE",
+    "READ_EXTERNAL_STORAGE", "RECORD_AUDIO", "BLUETOOTH", "BLUETOOTH_ADMIN", "VIBRATE",
+    "ACCESS_NETWORK_STATE", "ACCESS_WIFI_STATE", "READ_PHONE_STATE", "CALL_PHONE", "BODY_SENSORS",
+    "ACTIVITY_RECOGNITION", "WAKE_LOCK", "FOREGROUND_SERVICE", "POST_NOTIFICATIONS", "READ_CONTACTS",
+    "WRITE_CONTACTS", "READ_CALENDAR", "WRITE_CALENDAR", "SEND_SMS", "RECEIVE_SMS", "READ_SMS",
+    "NFC", "USE_BIOMETRIC", "REQUEST_INSTALL_PACKAGES", "SCHEDULE_EXACT_ALARM",
+]
+
+def module_names(count):
+    """`app` más `feature/f1..` hasta completar `count` módulos."""
+    return ["app"] + [f"feature/f{index}" for index in range(1, count)]
+
+def module_package(module):
+    return PACKAGE if module == "app" else f"{PACKAGE}.{module.replace('/', '.')}"
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+def catalog_text(entries):
+    """libs.versions.toml con `entries` librerías, cada una con su versión."""
+    versions = ['agp = "8.1.0"', 'kotlin = "1.9.0"']
+    libraries = []
+    for index in range(entries):
+        versions.append(f'lib{index}_version = "1.{index % 10}.{index % 7}"')
+        libraries.append(f'lib{index} = {{ group = "com.bench.group{index % 40}", name = "artifact-{index}", '
+                         f'version.ref = "lib{index}_version" }}')
+    return ("# Catálogo sintético\n[versions]\n" + "\n".join(versions) + "\n\n[libraries]\n" + "\n".join(libraries)
+            + '\n\n[plugins]\nandroid-application = { id = "com.android.application", version.ref = "agp" }\n')
+
+def inline_dependencies(position):
+    """Dependencias con coordenadas en línea, con versiones distintas según el módulo."""
+    return [
+        ("implementation", f"androidx.room:room-runtime:2.6.{position % 2}"),
+        ("kapt", "androidx.room:room-compiler:2.6.1"),
+        ("implementation", f"com.bench.inline{position % 20}:inline-{position % 50}:1.{position % 4}.0"),
+    ]
+
+def build_text(module, dependencies, inline=()):
+    plugin = "com.android.application" if module == "app" else "com.android.library"
+    lines = "\n".join([f"    implementation(libs.lib{index})" for index in dependencies]
+                      + [f'    {configuration}("{coordinate}")' for configuration, coordinate in inline])
+    return (f'plugins {{\n    id("{plugin}")\n    id("org.jetbrains.kotlin.android")\n}}\n\n'
+            f'android {{\n    namespace = "{module_package(module)}"\n    compileSdk = 34\n\n'
+            f'    defaultConfig {{\n        minSdk = 24\n    }}\n}}\n\n'
+            f'dependencies {{\n{lines}\n    testImplementation("junit:junit:4.13.2")\n}}\n')
+
+def manifest_text(package, permissions, activities):
+    lines = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<manifest xmlns:android="http://schemas.android.com/apk/res/android">']
+    for name in PERMISSION_NAMES[:permissions]:
+        lines.append(f'    <uses-permission android:name="android.permission.{name}" />')
+    lines.append('\n    <application android:label="Bench">')
+    for index in range(activities):
+        lines.append(f'        <activity android:name=".screens.Screen{index}Activity" android:exported="false" />')
+    lines.append("    </application>\n</manifest>\n")
+    return "\n".join(lines)
+
+def kotlin_text(package, index, layer):
+    return (f"package {package}.{layer}\n\nimport {package}.model.BaseModel\n\n"
+            f"class Item{index} : BaseModel {{\n    override fun getData(): String = \"{index}\"\n"
+            + "".join(f"\n    fun value{line}(): Int = {line}\n" for line in range(20)) + "}\n")
+
+def create_project(root, modules=5, files=20, catalog=50, permissions=5, activities=10, architecture="MVP"):
+    """
+    Crea un proyecto Android sintético en `root`.
+
+    Cada módulo tiene build.gradle.kts (namespace, varias dependencias del catálogo y
+    algunas con coordenadas en línea),
+    AndroidManifest.xml con `permissions` permisos y `activities` actividades, y `files`
+    ficheros Kotlin repartidos entre las capas de `architecture` (None para no crear capas).
+
+    Returns:
+        str: Ruta del proyecto.
+    """
+    names = module_names(modules)
+    includes = "\n".join(f'include(":{name.replace("/", ":")}")' for name in names)
+    _write(os.path.join(root, "settings.gradle.kts"), f'rootProject.name = "Bench"\n{includes}\n')
+    _write(os.path.join(root, "build.gradle.kts"), 'plugins {\n    alias(libs.plugins.android.application) apply false\n}\n')
+    _write(os.path.join(root, "gradle", "libs.versions.toml"), catalog_text(catalog))
+
+    layers = {"MVP": ["presenter", "view", "model", "repository"],
+              "MVVM": ["viewmodel", "repository", "model", "view"],
+              "MVI": ["intent", "view", "state", "model", "repository"]}.get(architecture, [])
+    for position, module in enumerate(names):
+        module_path = os.path.join(root, *module.split("/"))
+        package = module_package(module)
+        dependencies = [(position * 7 + offset) % max(catalog, 1) for offset in range(min(catalog, 5))]
+        _write(os.path.join(module_path, "build.gradle.kts"), build_text(module, dependencies, inline_dependencies(position)))
+        _write(os.path.join(module_path, "src", "main", "AndroidManifest.xml"),
+               manifest_text(package, permissions, activities))
+        package_path = os.path.join(module_path, "src", "main", "java", *package.split("."))
+        os.makedirs(package_path, exist_ok=True)
+        for index in range(files):
+            layer = layers[index % len(layers)] if layers else "screens"
+            _write(os.path.join(package_path, layer, f"Item{index}.kt"), kotlin_text(package, index, layer))
+    return root
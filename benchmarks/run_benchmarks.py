@@ -0,0 +1,304 @@
+"""
+Benchmarks de los puntos de entrada sobre proyectos Android sintéticos.
+
+Cada benchmark se ejecuta sin interacción sobre una copia nueva del proyecto generado
+por `fixtures.create_project` y mide el tiempo total (lo mejor de `--repeat`
+ejecuciones, incluido el commit del workspace), el pico de memoria con tracemalloc
+(en una ejecución aparte, para que su sobrecoste no cuente en el tiempo) y los
+ficheros y bytes leídos y escritos.
+
+Uso:
+    python benchmarks/run_benchmarks.py --profile monorepo
+    python benchmarks/run_benchmarks.py --profile small --save-baseline
+    python benchmarks/run_benchmarks.py --profile small --check
+    python benchmarks/run_benchmarks.py --modules 200 --files 100 --only inspect,scaffold
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS_PATH), "src"))
+
+from fixtures import PACKAGE, PROFILES, create_project, module_names, module_package  # noqa: E402
+
+BASELINES_PATH = os.path.join(BENCHMARKS_PATH, "baselines.json")
+# Diferencias de tiempo por debajo de este margen se consideran ruido
+MIN_WALL_DELTA = 0.02
+MIN_MEMORY_DELTA_KIB = 256
+PERMISSIONS = ["INTERNET", "CAMERA", "RECORD_AUDIO", "ACCESS_FINE_LOCATION"]
+
+def _package_path(project, module, package):
+    return os.path.join(project, *module.split("/"), "src", "main", "java", *package.split("."))
+
+def bench_catalog(project, size, workspace):
+    """Añade al catálogo 50 librerías nuevas y 50 que ya estaban."""
+    from generate_dependencies import add_dependencies_to_versions_toml
+
+    existing = [f"com.bench.group{index % 40}:artifact-{index}:2.0.0" for index in range(min(size["catalog"], 50))]
+    new = [f"com.bench.extra{index % 10}:extra-{index}:1.0.{index}" for index in range(50)]
+    add_dependencies_to_versions_toml(os.path.join(project, "gradle", "libs.versions.toml"), new + existing, workspace)
+
+def bench_build_gradle(project, size, workspace):
+    """Añade 10 alias del catálogo al build.gradle.kts de cada módulo."""
+    from generate_dependencies import add_dependencies_to_build_gradle
+
+    aliases = [f"lib{index}" for index in range(min(size["catalog"], 10))]
+    for module in module_names(size["modules"]):
+        add_dependencies_to_build_gradle(project, aliases, True, module, workspace)
+
+def bench_manifest(project, size, workspace):
+    """Registra la actividad inicial y varios permisos en el manifiesto de cada módulo."""
+    from generate_android_architecture import add_to_manifest
+
+    for module in module_names(size["modules"]):
+        add_to_manifest(project, module_package(module), PERMISSIONS, module, workspace)
+
+def bench_structure(project, size, workspace):
+    """Crea la estructura MVVM con sus clases base en cada módulo."""
+    from generate_android_architecture import create_architecture_structure
+
+    for module in module_names(size["modules"]):
+        package = module_package(module)
+        create_architecture_structure(_package_path(project, module, package), "MVVM", package, False, workspace)
+
+def bench_migration(project, size, workspace):
+    """Migra cada módulo de MVP a MVVM (mueve presenter y reescribe package/import)."""
+    from generate_android_architecture import check_existing_architecture
+
+    for module in module_names(size["modules"]):
+        package = module_package(module)
+        check_existing_architecture(_package_path(project, module, package), "MVVM", True, workspace,
+                                    package_name=package)
+
+def bench_catalog_migration(project, size, workspace, workers=1):
+    """Mueve al catálogo las dependencias en línea de todos los módulos."""
+    from catalog_migration import migrate_to_version_catalog
+
+    migrate_to_version_catalog(project, workspace=workspace, max_workers=workers)
+
+def bench_inspect(project, size, workspace):
+    """Inspección completa del proyecto sin caché."""
+    from project_inspector import inspect_project
+
+    model = inspect_project(project, use_cache=False)
+    return {"scanned": len(model.stamps)}
+
+def bench_features(project, size, workspace):
+    """Genera 20 features MVP en el módulo app."""
+    from feature_generator import generate_features
+
+    generate_features(project, [f"Screen{index}" for index in range(20)], "MVP", module="app", workspace=workspace)
+
+def bench_scaffold(project, size, workspace, workers=1):
+    """`scaffold_modules` sobre todos los módulos: migración a MVVM, dependencias y permisos."""
+    from gradle_modules import scaffold_modules
+
+    results = scaffold_modules(project, "MVVM", False, dependencies=["com.squareup.retrofit2:retrofit:2.9.0"],
+                               permissions=PERMISSIONS, replace_existing=True, max_workers=workers)
+    # Cada módulo usa su propio workspace; solo se conoce el número de ficheros escritos
+    return {"written": sum(result.get("written", 0) for result in results)}
+
+BENCHMARKS = {
+    "catalog": bench_catalog,
+    "build_gradle": bench_build_gradle,
+    "manifest": bench_manifest,
+    "structure": bench_structure,
+    "migration": bench_migration,
+    "catalog_migration": bench_catalog_migration,
+    "inspect": bench_inspect,
+    "features": bench_features,
+    "scaffold": bench_scaffold,
+}
+
+def workspace_counters(workspace):
+    """Ficheros y bytes leídos de disco y pendientes de escribir en el workspace."""
+    read = [original for original, _ in workspace.files.values() if original is not None]
+    changed = workspace.pending_changes()
+    return {
+        "read": len(read),
+        "bytes_read": sum(len(content.encode("utf-8")) for content in read),
+        "written": len(changed),
+        "bytes_written": sum(len(workspace.files[path][1].encode("utf-8")) for path in changed),
+        "moved": len(workspace.moves),
+    }
+
+def run_once(name, template, size, scratch, workers, trace_memory=False):
+    """Ejecuta un benchmark sobre una copia nueva del proyecto. Devuelve (segundos, pico KiB, contadores)."""
+    from workspace import Workspace
+
+    project = os.path.join(tempfile.mkdtemp(dir=scratch), "project")
+    shutil.copytree(template, project)
+    benchmark = BENCHMARKS[name]
+    extra = {"workers": workers} if name in ("scaffold", "catalog_migration") else {}
+    workspace = Workspace(verbose=False)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        counters = benchmark(project, size, workspace, **extra)
+        if counters is None:
+            counters = workspace_counters(workspace)
+        workspace.commit()
+        elapsed = time.perf_counter() - start
+        peak = 0
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+    shutil.rmtree(os.path.dirname(project), ignore_errors=True)
+    return elapsed, peak, counters
+
+def run_benchmarks(size, names, repeat=3, workers=1):
+    """
+    Genera el proyecto sintético una vez y ejecuta cada benchmark sobre copias nuevas.
+
+    Returns:
+        dict: Nombre del benchmark -> `wall` (s), `peak_kib` y los contadores de E/S.
+    """
+    scratch = tempfile.mkdtemp(prefix="android-arch-bench.")
+    previous_cache = os.environ.get("ANDROID_ARCH_CACHE")
+    # La caché del modelo de proyecto va a un directorio temporal para medir siempre en frío
+    os.environ["ANDROID_ARCH_CACHE"] = os.path.join(scratch, "cache")
+    try:
+        template = os.path.join(scratch, "template")
+        create_project(template, size["modules"], size["files"], size["catalog"], size["permissions"],
+                       size["activities"], architecture="MVP")
+        results = {}
+        for name in names:
+            times = []
+            for _ in range(repeat):
+                elapsed, _, counters = run_once(name, template, size, scratch, workers)
+                times.append(elapsed)
+            _, peak, _ = run_once(name, template, size, scratch, workers, trace_memory=True)
+            results[name] = {"wall": round(min(times), 4), "peak_kib": round(peak), **counters}
+            print(format_row(name, results[name]), flush=True)
+        return results
+    finally:
+        if previous_cache is None:
+            os.environ.pop("ANDROID_ARCH_CACHE", None)
+        else:
+            os.environ["ANDROID_ARCH_CACHE"] = previous_cache
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def format_row(name, result):
+    io_columns = " ".join(f"{key}={result[key]}" for key in ("read", "bytes_read", "written", "bytes_written", "moved", "scanned")
+                          if key in result)
+    return f"{name:<17} {result['wall']:>9.3f}s {result['peak_kib']:>10} KiB  {io_columns}"
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Compara tiempo y memoria con la línea base.
+
+    Returns:
+        list: Mensajes de las regresiones (vacía si no hay ninguna).
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        wall_limit = max(reference["wall"] * (1 + threshold), reference["wall"] + MIN_WALL_DELTA)
+        if result["wall"] > wall_limit:
+            regressions.append(f"{name}: {result['wall']:.3f}s frente a {reference['wall']:.3f}s de la línea base")
+        memory_limit = max(reference["peak_kib"] * (1 + threshold), reference["peak_kib"] + MIN_MEMORY_DELTA_KIB)
+        if result["peak_kib"] > memory_limit:
+            regressions.append(f"{name}: {result['peak_kib']} KiB frente a {reference['peak_kib']} KiB de la línea base")
+    return regressions
+
+def host_id():
+    """Equipo en el que se miden los tiempos: solo son comparables con los del mismo."""
+    return f"{platform.node()} {platform.machine()}, {os.cpu_count()} CPU, Python {platform.python_version()}"
+
+def load_baselines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks sobre proyectos Android sintéticos.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small", help="Tamaño predefinido del proyecto.")
+    parser.add_argument("--modules", type=int, help="Número de módulos (sustituye al del perfil).")
+    parser.add_argument("--files", type=int, help="Ficheros Kotlin por módulo.")
+    parser.add_argument("--catalog", type=int, help="Entradas del catálogo libs.versions.toml.")
+    parser.add_argument("--permissions", type=int, help="Permisos en cada manifiesto.")
+    parser.add_argument("--activities", type=int, help="Actividades en cada manifiesto.")
+    parser.add_argument("--only", help="Benchmarks separados por comas: " + ",".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por benchmark (se toma la mejor).")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para scaffold_modules.")
+    parser.add_argument("--baseline", default=BASELINES_PATH, help="Fichero JSON de líneas base.")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como línea base del perfil.")
+    parser.add_argument("--check", action="store_true",
+                        help="Compara con la línea base del perfil (guardada en este mismo equipo) y termina con "
+                             "código 1 si hay regresiones.")
+    parser.add_argument("--any-host", action="store_true",
+                        help="Con --check, compara también con una línea base guardada en otro equipo.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Regresión máxima admitida sobre la línea base (0.25 = 25%%).")
+    parser.add_argument("--json", dest="json_path", help="Escribe los resultados en este fichero JSON.")
+    args = parser.parse_args(argv)
+
+    size = dict(PROFILES[args.profile])
+    for key in size:
+        if getattr(args, key) is not None:
+            size[key] = getattr(args, key)
+    custom = size != PROFILES[args.profile]
+    names = [name.strip() for name in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Benchmarks desconocidos: {', '.join(unknown)}")
+
+    print(f"Proyecto sintético: {size['modules']} módulos, {size['files']} ficheros Kotlin por módulo, "
+          f"{size['catalog']} entradas en el catálogo, {size['permissions']} permisos y "
+          f"{size['activities']} actividades por manifiesto ({PACKAGE}).")
+    results = run_benchmarks(size, names, max(1, args.repeat), args.workers)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump({"profile": args.profile, "size": size, "results": results}, file, indent=2)
+
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        if custom:
+            parser.error("Solo se guardan líneas base de los perfiles predefinidos, sin tamaños personalizados.")
+        baseline = baselines.get(args.profile, {})
+        if baseline.get("host") != host_id():
+            # Los tiempos de otro equipo no se mezclan con los de este
+            baseline = {"host": host_id()}
+        baseline.update(results)
+        baselines[args.profile] = baseline
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Línea base del perfil {args.profile} guardada en {args.baseline}.")
+        return 0
+
+    if not args.check:
+        return 0
+    if custom or args.profile not in baselines:
+        print("Sin línea base para comparar.")
+        return 0
+    host = baselines[args.profile].get("host")
+    if host != host_id() and not args.any_host:
+        print(f"La línea base del perfil {args.profile} es de otro equipo ({host or 'sin registrar'}); los tiempos no "
+              "son comparables. Guarda una en este con --save-baseline (o compara igualmente con --any-host).")
+        return 0
+    regressions = compare_with_baseline(results, baselines[args.profile], args.threshold)
+    for message in regressions:
+        print(f"❌ Regresión: {message}")
+    if not regressions:
+        print(f"✔️ Sin regresiones frente a la línea base (umbral {args.threshold:.0%}).")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from project_inspector import ARCHITECTURE_LAYERS
+from tracing import count, traced
+from workspace import open_workspace
+
+SOURCE_EXTENSIONS = (".kt", ".kts", ".java")
+SKIPPED_DIRECTORIES = {"build", ".gradle", ".idea", ".git"}
+# Por debajo de este número de ficheros no compensa arrancar procesos
+PARALLEL_THRESHOLD = 400
+
+# Capas propias de cada arquitectura y la capa de destino en las demás. Las capas
+# comunes (view, model, repository) se quedan donde están.
+LAYER_MIGRATIONS = {
+    ("MVP", "MVVM"): {"presenter": "viewmodel"},
+    ("MVP", "MVI"): {"presenter": "intent"},
+    ("MVVM", "MVP"): {"viewmodel": "presenter"},
+    ("MVVM", "MVI"): {"viewmodel": "intent"},
+    ("MVI", "MVP"): {"intent": "presenter", "state": "model"},
+    ("MVI", "MVVM"): {"intent": "viewmodel", "state": "model"},
+}
+
+def plan_layer_moves(base_path, source, target, workspace):
+    """
+    Calcula los movimientos para pasar las capas de `source` a las de `target`.
+
+    Si la carpeta de destino no existe se mueve la capa entera con un solo rename; si
+    existe, se mueven sus entradas una a una (bajando solo en las subcarpetas que ya
+    existen en el destino).
+
+    Returns:
+        tuple: (lista de (origen, destino), lista de (carpeta que quedará vacía, carpeta
+        en la que se fusiona))
+
+    Raises:
+        ValueError: Si algún fichero ya existe en el destino.
+    """
+    moves, merged, conflicts = [], [], []
+
+    def merge(source_path, destination_path):
+        if not workspace.exists(destination_path):
+            moves.append((source_path, destination_path))
+            return
+        if not os.path.isdir(source_path) or not os.path.isdir(destination_path):
+            conflicts.append(destination_path)
+            return
+        with os.scandir(source_path) as entries:
+            names = sorted(entry.name for entry in entries)
+        for name in names:
+            merge(os.path.join(source_path, name), os.path.join(destination_path, name))
+        merged.append((source_path, destination_path))
+
+    for layer, destination in LAYER_MIGRATIONS[(source, target)].items():
+        layer_path = os.path.join(base_path, layer)
+        if os.path.isdir(layer_path):
+            merge(layer_path, os.path.join(base_path, destination))
+
+    if conflicts:
+        raise ValueError("No se puede migrar la arquitectura; estos ficheros ya existen en el destino: "
+                         + ", ".join(conflicts))
+    return moves, merged
+
+def compile_package_pattern(packages):
+    """
+    Compila un único patrón para todas las líneas `package`/`import` que nombran alguno
+    de los paquetes (o sus subpaquetes). Las alternativas más largas van primero.
+    """
+    alternatives = "|".join(re.escape(package) for package in sorted(packages, key=len, reverse=True))
+    return re.compile(
+        r"^([ \t]*(?:package|import)[ \t]+(?:static[ \t]+)?)(" + alternatives + r")(?=[.;\s]|$)",
+        re.MULTILINE,
+    )
+
+def rewrite_source(content, pattern, mapping):
+    """Devuelve el contenido con los paquetes renombrados, o None si no había referencias."""
+    content, count = pattern.subn(lambda match: match.group(1) + mapping[match.group(2)], content)
+    return content if count else None
+
+def _rewrite_file(path, prefix, pattern, mapping):
+    """
+    Lee un fichero una sola vez y lo reescribe en memoria. El filtro por bytes descarta
+    sin decodificar los ficheros que no mencionan el paquete base.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return path, None
+    # En los procesos del pool estos contadores no llegan al informe del proceso principal
+    count("files_opened")
+    count("bytes_read", len(data))
+    if prefix not in data:
+        return path, None
+    try:
+        content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return path, None
+    return path, rewrite_source(content, pattern, mapping)
+
+def _rewrite_chunk(paths, prefix, packages, mapping):
+    pattern = compile_package_pattern(packages)
+    results = []
+    for path in paths:
+        path, content = _rewrite_file(path, prefix, pattern, mapping)
+        if content is not None:
+            results.append((path, content))
+    return results
+
+def find_source_files(root):
+    """Recorre `root` con scandir y devuelve los ficheros Kotlin y Java, sin entrar en carpetas de build."""
+    files = []
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRECTORIES:
+                            pending.append(entry.path)
+                    elif entry.name.endswith(SOURCE_EXTENSIONS):
+                        files.append(entry.path)
+        except OSError:
+            continue
+    return files
+
+@traced
+def rewrite_packages(source_root, mapping, workspace, moves=(), max_workers=None):
+    """
+    Reescribe las líneas `package` e `import` de todos los ficheros bajo `source_root`.
+
+    Los ficheros se leen directamente de disco (en paralelo si son muchos) y solo se
+    pasan al workspace los que cambian. Las rutas que están dentro de un movimiento
+    se escriben en su destino.
+
+    Returns:
+        int: Número de ficheros reescritos.
+    """
+    paths = find_source_files(source_root)
+    if not paths or not mapping:
+        return 0
+    prefix = os.path.commonprefix(list(mapping)).rstrip(".").encode("utf-8") or b"."
+    packages = list(mapping)
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(paths) // PARALLEL_THRESHOLD or 1))
+    if workers == 1:
+        results = _rewrite_chunk(paths, prefix, packages, mapping)
+    else:
+        size = -(-len(paths) // (workers * 4))
+        chunks = [paths[index:index + size] for index in range(0, len(paths), size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_rewrite_chunk, chunk, prefix, packages, mapping) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+
+    pattern = None
+    rewritten = 0
+    for path, content in results:
+        for source, destination in moves:
+            if path == source or path.startswith(source + os.sep):
+                path = destination + path[len(source):]
+                break
+        if path in workspace.files:
+            # Ya hay cambios pendientes: se reescribe el contenido del workspace, no el de disco
+            pattern = pattern or compile_package_pattern(packages)
+            content = rewrite_source(workspace.read(path), pattern, mapping)
+            if content is None:
+                continue
+        workspace.write(path, content)
+        rewritten += 1
+    return rewritten
+
+def package_from_path(base_path):
+    """Deduce el paquete de una carpeta a partir de la raíz `java` o `kotlin` más cercana."""
+    parts = os.path.normpath(base_path).split(os.sep)
+    for index in range(len(parts) - 1, -1, -1):
+        if parts[index] in ("java", "kotlin"):
+            return ".".join(parts[index + 1:])
+    return os.path.basename(base_path)
+
+def _module_source_root(base_path, package_name):
+    """Carpeta `src` del módulo que contiene el paquete base (`.../src/main/java/com/x`)."""
+    root = base_path
+    for _ in package_name.split(".") + ["java", "main"]:
+        root = os.path.dirname(root)
+    return root if os.path.basename(root) == "src" else base_path
+
+@traced
+def migrate_architecture(base_path, package_name, source, target, workspace=None, max_workers=None):
+    """
+    Migra el código de una arquitectura a otra sin borrarlo.
+
+    Las capas propias de `source` se mueven a su equivalente en `target` (ver
+    `LAYER_MIGRATIONS`) y se actualizan las líneas `package` e `import` de todo el
+    módulo (main, test y androidTest) que hacían referencia a los paquetes movidos.
+
+    Returns:
+        dict: Capa de origen -> capa de destino de lo que se ha movido.
+    """
+    migrated = {layer: destination for layer, destination in LAYER_MIGRATIONS[(source, target)].items()
+                if os.path.isdir(os.path.join(base_path, layer))}
+    with open_workspace(workspace) as workspace:
+        moves, merged = plan_layer_moves(base_path, source, target, workspace)
+        # Cada carpeta que se mueve o se vacía entera cambia de paquete (con sus subpaquetes)
+        mapping = {}
+        for source_path, destination_path in [move for move in moves if os.path.isdir(move[0])] + merged:
+            old = os.path.relpath(source_path, base_path).replace(os.sep, ".")
+            new = os.path.relpath(destination_path, base_path).replace(os.sep, ".")
+            mapping[f"{package_name}.{old}"] = f"{package_name}.{new}"
+
+        for source_path, destination_path in moves:
+            workspace.move(source_path, destination_path)
+            print(f"Movido: {source_path} -> {destination_path}")
+        for directory, _ in merged:
+            workspace.remove_empty_directory(directory)
+
+        rewritten = rewrite_packages(_module_source_root(base_path, package_name), mapping, workspace, moves, max_workers)
+        print(f"Ficheros con package/import actualizados: {rewritten}")
+    return migrated
+
+def describe_migration(source, target):
+    """Líneas legibles con lo que hará la migración."""
+    mapping = LAYER_MIGRATIONS[(source, target)]
+    kept = [layer for layer in ARCHITECTURE_LAYERS[source] if layer not in mapping]
+    lines = [f"- {layer} -> {destination}" for layer, destination in mapping.items()]
+    lines.extend(f"- {layer} (se conserva)" for layer in kept)
+    return lines
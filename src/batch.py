@@ -0,0 +1,234 @@
+import io
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+from generate_android_architecture import add_architecture_to_existing_project, is_valid_package_name
+from generate_dependencies import apply_dependencies, resolve_dependency_groups, validate_moshi_gson_selection
+from gradle_modules import scaffold_modules
+from keep_rules import add_keep_rules
+from tracing import call_and_collect, merge, traced
+from version_resolver import VersionResolver, resolve_versions
+from workspace import Workspace
+
+ARCHITECTURES = ("MVP", "MVVM", "MVI")
+
+def load_batch_spec(spec_path):
+    """
+    Lee el fichero de especificación del modo batch (JSON, o YAML si PyYAML está instalado).
+
+    El fichero puede ser una lista de proyectos o un objeto con las claves
+    `projects`, `defaults` (valores comunes a todos los proyectos) y `workers`.
+
+    Returns:
+        tuple: (lista de proyectos con los valores por defecto aplicados, workers o None)
+    """
+    with open(spec_path, "r", encoding="utf-8") as file:
+        content = file.read()
+
+    if spec_path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Para leer especificaciones YAML es necesario instalar PyYAML.")
+        spec = yaml.safe_load(content)
+    else:
+        spec = json.loads(content)
+
+    if isinstance(spec, list):
+        spec = {"projects": spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get("projects"), list):
+        raise ValueError("La especificación debe contener una lista 'projects'.")
+
+    defaults = spec.get("defaults", {})
+    spec_dir = os.path.dirname(os.path.abspath(spec_path))
+    projects = []
+    for entry in spec["projects"]:
+        project = dict(defaults)
+        project.update(entry)
+        if "project_path" in project:
+            # Las rutas relativas se resuelven respecto al fichero de especificación
+            project["project_path"] = os.path.join(spec_dir, os.path.expanduser(project["project_path"]))
+        projects.append(project)
+    return projects, spec.get("workers")
+
+def validate_project_spec(project):
+    """
+    Valida una entrada de la especificación y devuelve sus valores normalizados.
+
+    Raises:
+        ValueError: Si falta algún campo obligatorio o tiene un valor no válido.
+    """
+    # Sin `package_name` el paquete se detecta en el proyecto (namespace, manifiesto o carpetas)
+    for key in ("project_path", "architecture"):
+        if not project.get(key):
+            raise ValueError(f"Falta el campo obligatorio '{key}'.")
+
+    package_name = project.get("package_name")
+    if package_name and not is_valid_package_name(package_name):
+        raise ValueError(f"El nombre del paquete no es válido: {package_name}")
+
+    architecture = str(project["architecture"]).upper()
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"Arquitectura no válida: {project['architecture']}")
+
+    use_compose = bool(project.get("compose", False))
+    dependencies = resolve_dependency_groups(project.get("dependencies", []), use_compose)
+    if not validate_moshi_gson_selection(dependencies):
+        raise ValueError("Se detectó un conflicto entre Moshi y Gson.")
+    if project.get("resolve_versions"):
+        # El índice ya lo actualizó run_batch antes de repartir los proyectos
+        dependencies = resolve_versions(dependencies, refresh=False)
+
+    return {
+        "project_path": project["project_path"],
+        "package_name": package_name,
+        "architecture": architecture,
+        "use_compose": use_compose,
+        "dependencies": dependencies,
+        "permissions": project.get("permissions", []),
+        "replace_existing": bool(project.get("replace_existing", False)),
+        "create_toml": bool(project.get("create_toml", True)),
+        "modules": project.get("modules"),
+        "startup_profiling": bool(project.get("startup_profiling", False)),
+        "minify": bool(project.get("minify", False)),
+    }
+
+@traced
+def run_project(project):
+    """
+    Configura un proyecto de la especificación sin interacción con el usuario.
+
+    Se ejecuta en un proceso del pool, por lo que captura la salida de los pasos y
+    nunca propaga excepciones: el resultado indica si el proyecto se configuró bien.
+    Los cambios de un proyecto se escriben juntos al final; si un paso falla, el
+    proyecto queda sin modificar.
+
+    Returns:
+        dict: Resultado con las claves `project_path`, `ok`, `error`, `elapsed` y `log`.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {"project_path": project.get("project_path"), "ok": False, "error": None}
+    try:
+        with redirect_stdout(log):
+            options = validate_project_spec(project)
+            if options["modules"]:
+                written, skipped = run_project_modules(options)
+            else:
+                with Workspace() as workspace:
+                    if not add_architecture_to_existing_project(
+                        options["project_path"],
+                        options["architecture"],
+                        options["use_compose"],
+                        options["package_name"],
+                        permissions=options["permissions"],
+                        replace_existing=options["replace_existing"],
+                        workspace=workspace,
+                        startup_profiling=options["startup_profiling"],
+                    ):
+                        raise RuntimeError("No se pudo añadir la arquitectura al proyecto.")
+                    if options["dependencies"]:
+                        apply_dependencies(options["project_path"], options["dependencies"], options["create_toml"],
+                                           workspace=workspace)
+                    if options["dependencies"] or options["minify"]:
+                        add_keep_rules(options["project_path"], options["dependencies"], minify=options["minify"],
+                                       workspace=workspace)
+                written, skipped = len(workspace.written), len(workspace.skipped)
+        result.update(ok=True, written=written, skipped=skipped)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+    result["elapsed"] = time.perf_counter() - start
+    result["log"] = log.getvalue()
+    return result
+
+def run_project_modules(options):
+    """
+    Configura los módulos indicados en `modules` ("all" para todos los de settings.gradle).
+
+    Los módulos se procesan en serie: el paralelismo ya lo aporta el pool de proyectos.
+
+    Returns:
+        tuple: (ficheros escritos, ficheros sin cambios) sumando todos los módulos.
+    """
+    modules = None if options["modules"] == "all" else options["modules"]
+    results = scaffold_modules(
+        options["project_path"],
+        options["architecture"],
+        options["use_compose"],
+        modules=modules,
+        dependencies=options["dependencies"],
+        permissions=options["permissions"],
+        replace_existing=options["replace_existing"],
+        create_toml=options["create_toml"],
+        max_workers=1,
+        startup_profiling=options["startup_profiling"],
+        minify=options["minify"],
+    )
+    failed = [result["module"] for result in results if not result["ok"]]
+    if failed:
+        raise RuntimeError(f"Fallaron los módulos: {', '.join(failed)}")
+    return sum(result["written"] for result in results), sum(result["skipped"] for result in results)
+
+def run_batch(spec_path, max_workers=None, report_path=None):
+    """
+    Configura todos los proyectos de una especificación en paralelo con un pool de procesos.
+
+    Un fallo en un proyecto no detiene al resto. El número de procesos está acotado por
+    `max_workers`, el valor `workers` de la especificación o el número de CPUs.
+
+    Returns:
+        list: Resultados de `run_project` en el orden de la especificación.
+    """
+    projects, spec_workers = load_batch_spec(spec_path)
+    if not projects:
+        print("La especificación no contiene proyectos.")
+        return []
+
+    if any(project.get("resolve_versions") for project in projects):
+        stats = VersionResolver().refresh()
+        print(f"Índice de versiones actualizado: {stats['artifacts']} artefactos en {stats['elapsed']:.2f}s.")
+
+    workers = max_workers or spec_workers or os.cpu_count() or 1
+    workers = max(1, min(int(workers), len(projects)))
+    print(f"Configurando {len(projects)} proyectos con {workers} procesos...")
+
+    results = [None] * len(projects)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(call_and_collect, run_project, project): index
+                   for index, project in enumerate(projects)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result, events = future.result()
+                merge(events)
+            except Exception as e:
+                # El proceso del pool terminó de forma inesperada
+                result = {
+                    "project_path": projects[index].get("project_path"),
+                    "ok": False,
+                    "error": f"{type(e).__name__}: {e}",
+                    "elapsed": 0.0,
+                    "log": "",
+                }
+            results[index] = result
+            if result["ok"]:
+                print(f"✔️ {result['project_path']} ({result['elapsed']:.2f}s, "
+                      f"{result['written']} ficheros escritos, {result['skipped']} sin cambios)")
+            else:
+                print(f"❌ {result['project_path']}: {result['error']}")
+
+    failed = [result for result in results if not result["ok"]]
+    print(f"\nProyectos configurados: {len(results) - len(failed)}/{len(results)} "
+          f"en {time.perf_counter() - start:.2f}s.")
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        print(f"Informe guardado en {report_path}.")
+    return results
@@ -0,0 +1,274 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from dependency_rules import Dependency, load_rules
+from generate_dependencies import check_or_create_versions_toml, update_catalog_versions
+from gradle_parser import GradleBuildFile
+from project_inspector import inspect_project
+from tracing import traced
+from version_catalog import VersionCatalog, normalize_alias
+from version_resolver import version_key
+from workspace import open_workspace
+
+# Build files por proceso a partir de los que compensa repartir el análisis
+PARALLEL_THRESHOLD = 32
+# Gradle no admite alias cuyo primer segmento sea uno de estos
+RESERVED_ALIAS_PREFIXES = {"bundles", "versions", "plugins"}
+
+LITERAL_PATTERN = re.compile(r'(["\'])([^"\'\\$\n]*)\1')
+MAP_NOTATION_PATTERN = re.compile(
+    r'^\s*group\s*[:=]\s*["\']([^"\'$]+)["\']\s*,\s*name\s*[:=]\s*["\']([^"\'$]+)["\']'
+    r'(?:\s*,\s*version\s*[:=]\s*["\']([^"\'$]+)["\'])?\s*$'
+)
+
+def extract_inline_dependencies(path, text):
+    """
+    Busca las dependencias con coordenadas en línea del bloque `dependencies` de un
+    build.gradle(.kts), con cualquier configuración: `"group:name:version"`,
+    `platform("...")` y la notación de mapa `group: ..., name: ..., version: ...`.
+
+    Returns:
+        tuple: (dependencias como dicts con `start`/`end` del texto a sustituir,
+        `configuration`, `group`, `name` y `version`; lista de (notación, motivo) de las
+        que no se pueden migrar)
+    """
+    gradle_file = GradleBuildFile.for_path(path, text)
+    found, skipped = [], []
+    for declaration in gradle_file.dependencies:
+        if declaration.kind not in ("coordinate", "other") or declaration.start is None:
+            continue
+        notation_start = text.index(declaration.notation, declaration.start)
+        map_notation = MAP_NOTATION_PATTERN.match(declaration.notation)
+        if map_notation:
+            group, name, version = map_notation.groups()
+            start, end = notation_start, notation_start + len(declaration.notation)
+        elif declaration.kind == "coordinate":
+            literal = LITERAL_PATTERN.search(declaration.notation)
+            parts = literal.group(2).split(":") if literal else []
+            if not literal or not all(parts) or declaration.notation[literal.end():].strip(" )"):
+                skipped.append((declaration.notation, "la versión es una variable o una expresión"))
+                continue
+            if "@" in literal.group(2) or len(parts) not in (2, 3):
+                skipped.append((declaration.notation, "clasificador o extensión no soportados por el catálogo"))
+                continue
+            group, name, version = parts[0], parts[1], parts[2] if len(parts) == 3 else None
+            start, end = notation_start + literal.start(), notation_start + literal.end()
+        else:
+            continue
+        found.append({"start": start, "end": end, "configuration": declaration.configuration,
+                      "group": group, "name": name, "version": version})
+    return found, skipped
+
+def _extract_chunk(items):
+    return [(path, *extract_inline_dependencies(path, text)) for path, text in items]
+
+def _alias_base(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower()
+
+def _library_alias(catalog, group, name, taken, ambiguous=False):
+    """
+    Alias para una librería nueva: el nombre del artefacto y, si ya está ocupado, el
+    último segmento del grupo, el grupo completo o un sufijo numérico delante. Si el
+    nombre lo comparten varios grupos (`ambiguous`), todos llevan el grupo, para que el
+    alias no dependa de cuál se procese primero.
+    """
+    base = _alias_base(name)
+    group_parts = [part for part in re.split(r"[^A-Za-z0-9]+", group.lower()) if part]
+    candidates = [base, f"{group_parts[-1]}_{base}" if group_parts else base, "_".join(group_parts + [base])]
+    if ambiguous:
+        candidates = candidates[1:]
+    candidates += [f"{candidates[-1]}_{number}" for number in range(2, 100)]
+    for alias in candidates:
+        if not alias[:1].isalpha() or alias.split("_")[0] in RESERVED_ALIAS_PREFIXES:
+            continue
+        if not catalog.has("libraries", alias) and normalize_alias(alias) not in taken:
+            return alias
+    raise ValueError(f"No se encontró un alias libre para {group}:{name}.")
+
+def _version_alias(catalog, base, version):
+    """Clave de `[versions]`: se reutiliza si ya tiene ese valor y si no se numera."""
+    alias = base
+    number = 2
+    while catalog.has("versions", alias):
+        if catalog.get("versions", alias).value == version:
+            return alias
+        alias = f"{base}_{number}"
+        number += 1
+    catalog.add_version(alias, version)
+    return alias
+
+def _accessor(alias, aliases):
+    """
+    Accesor de Gradle para un alias. Si el alias es prefijo de otro (`coil` y
+    `coil-compose`), Gradle lo expone como grupo y la librería se usa con `asProvider()`.
+    """
+    normalized = normalize_alias(alias)
+    accessor = "libs." + normalized.replace("-", ".")
+    if any(other.startswith(normalized + "-") for other in aliases):
+        accessor += ".asProvider()"
+    return accessor
+
+def _apply_replacements(text, replacements):
+    output = []
+    position = 0
+    for start, end, replacement in sorted(replacements):
+        output.append(text[position:start])
+        output.append(replacement)
+        position = end
+    output.append(text[position:])
+    return "".join(output)
+
+@traced
+def migrate_to_version_catalog(project_path, modules=None, workspace=None, max_workers=None):
+    """
+    Mueve al catálogo libs.versions.toml todas las dependencias con coordenadas en línea
+    de los build.gradle(.kts) de los módulos y las sustituye por sus accesores `libs.*`.
+
+    Los build files se analizan una sola vez (repartidos entre un pool de procesos si son
+    muchos). Cada `group:name` se añade una vez con la versión más alta que declare
+    cualquier módulo; las librerías de una misma familia (reglas `align`) comparten la
+    entrada de `[versions]`, y las que ya estaban en el catálogo se reutilizan con su
+    alias. Los alias se generan en orden de coordenada, por lo que no dependen del orden
+    de los módulos. El catálogo se escribe una sola vez y todo se confirma en un único commit.
+
+    Returns:
+        dict: `modules` (build files revisados), `files` (build files reescritos),
+        `declarations` (dependencias migradas), `libraries` (alias nuevos), `reused`
+        (alias existentes), `upgraded` (cambios de versión `{module, old, new}` al unificar
+        cada librería o familia en su versión más alta) y `skipped` ({ruta: [(notación, motivo)]}).
+    """
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        raise ValueError("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+    build_files = [module["build_file"] for module in model.find_modules(modules) if module["build_file"]]
+
+    summary = {"modules": len(build_files), "files": [], "declarations": 0, "libraries": [], "reused": [],
+               "upgraded": [], "skipped": {}}
+    with open_workspace(workspace) as workspace:
+        items = [(path, workspace.read(path)) for path in build_files]
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(items) // PARALLEL_THRESHOLD or 1))
+        if workers == 1:
+            results = _extract_chunk(items)
+        else:
+            size = -(-len(items) // workers)
+            chunks = [items[index:index + size] for index in range(0, len(items), size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = [result for chunk in executor.map(_extract_chunk, chunks) for result in chunk]
+
+        versions = {}
+        for path, found, skipped in results:
+            if skipped:
+                summary["skipped"][path] = skipped
+            for dependency in found:
+                module_versions = versions.setdefault(f"{dependency['group']}:{dependency['name']}", set())
+                if dependency["version"]:
+                    module_versions.add(dependency["version"])
+        if versions:
+            versions_toml_path = check_or_create_versions_toml(project_path, True, workspace)
+            catalog = VersionCatalog.load(versions_toml_path, workspace)
+            aliases = _add_libraries(catalog, versions, summary)
+            if catalog.save(versions_toml_path, workspace):
+                print(f"{len(summary['libraries'])} librerías añadidas a {versions_toml_path}.")
+
+            all_aliases = {normalize_alias(alias) for alias in catalog.aliases["libraries"]}
+            for path, found, _ in results:
+                if not found:
+                    continue
+                replacements = [(dependency["start"], dependency["end"],
+                                 _accessor(aliases[f"{dependency['group']}:{dependency['name']}"], all_aliases))
+                                for dependency in found]
+                workspace.write(path, _apply_replacements(workspace.read(path), replacements))
+                summary["files"].append(path)
+                summary["declarations"] += len(found)
+
+    print(f"Catálogo de versiones: {summary['declarations']} dependencias migradas en "
+          f"{len(summary['files'])} de {summary['modules']} build files "
+          f"({len(summary['libraries'])} alias nuevos, {len(summary['reused'])} reutilizados).")
+    if summary["upgraded"]:
+        print("Versiones unificadas en la más alta de cada librería o familia:")
+        for change in summary["upgraded"]:
+            print(f"   {change['module']}: {change['old']} → {change['new']}")
+    for path, skipped in summary["skipped"].items():
+        for notation, reason in skipped:
+            print(f"⚠️ Revisar {notation} en {path}: {reason}")
+    return summary
+
+def _add_libraries(catalog, versions, summary):
+    """
+    Añade al catálogo las librerías que faltan con su versión alineada y actualiza las que
+    ya estaban si algún módulo declara una versión más alta. Cada versión declarada en los
+    build files o el catálogo que cambia se anota en `summary["upgraded"]`.
+
+    Returns:
+        dict: `group:name` -> alias en el catálogo.
+    """
+    rules = load_rules()
+    families = {}
+    for module in versions:
+        group, name = module.split(":")
+        family = next((rules.rules[index]["id"] for index, _ in rules.matches(Dependency(group, name))
+                       if rules.rules[index]["kind"] == "align"), None)
+        if family:
+            families[module] = family
+
+    # Versión objetivo de cada familia: la más alta entre el código y el catálogo
+    targets = {}
+    family_refs = {}
+    for module, module_versions in versions.items():
+        existing = catalog.find_library(*module.split(":"))
+        candidates = set(module_versions)
+        if existing is not None and catalog.version_of(existing.value):
+            candidates.add(catalog.version_of(existing.value))
+            reference = existing.value.get("version") if isinstance(existing.value, dict) else None
+            if module in families and isinstance(reference, dict) and catalog.has("versions", reference.get("ref", "")):
+                family_refs.setdefault(families[module], reference["ref"])
+        key = families.get(module, module)
+        if candidates:
+            targets[key] = max(candidates | ({targets[key]} if key in targets else set()), key=version_key)
+
+    names = {}
+    for module in versions:
+        if catalog.find_library(*module.split(":")) is None:
+            base = _alias_base(module.split(":")[1])
+            names[base] = names.get(base, 0) + 1
+
+    aliases = {}
+    updates = {}
+    taken = set()
+    for module in sorted(versions):
+        group, name = module.split(":")
+        target = targets.get(families.get(module, module)) if versions[module] or module in families else None
+        existing = catalog.find_library(group, name)
+        current = catalog.version_of(existing.value) if existing is not None else None
+        if target:
+            for old in sorted(versions[module] | ({current} if current else set()), key=version_key):
+                if old != target:
+                    summary["upgraded"].append({"module": module, "old": old, "new": target})
+        if existing is not None:
+            aliases[module] = existing.alias
+            summary["reused"].append(existing.alias)
+            if target and current and version_key(current) < version_key(target):
+                updates[module] = target
+            continue
+
+        alias = _library_alias(catalog, group, name, taken, names[_alias_base(name)] > 1)
+        taken.add(normalize_alias(alias))
+        version_ref = None
+        if target and versions[module]:
+            family = families.get(module)
+            if family and family in family_refs:
+                version_ref = family_refs[family]
+                if catalog.get("versions", version_ref).value != target:
+                    catalog.set_version(version_ref, target)
+            elif family:
+                version_ref = family_refs[family] = _version_alias(catalog, f"{family.replace('-', '_')}_version", target)
+            else:
+                version_ref = _version_alias(catalog, f"{alias}_version", target)
+        # Las librerías sin versión (gestionadas por un BOM) no llevan version.ref
+        catalog.add_library(alias, group, name, version_ref=version_ref)
+        aliases[module] = alias
+        summary["libraries"].append(alias)
+
+    update_catalog_versions(catalog, updates)
+    return aliases
@@ -0,0 +1,297 @@
+import json
+import os
+import re
+
+from generate_dependencies import has_plugin
+from gradle_parser import GradleBuildFile
+from project_inspector import inspect_project
+from template_registry import COMPOSE_STABILITY_TEMPLATE, get_registry
+from tracing import traced
+from version_catalog import VersionCatalog
+from version_resolver import version_key
+from workspace import open_workspace
+
+# Plugin del compilador de Compose (Kotlin 2.0 o superior): se configura con `composeCompiler {}`
+COMPOSE_COMPILER_PLUGIN_ID = "org.jetbrains.kotlin.plugin.compose"
+# Con Kotlin 1.x las opciones se pasan al plugin del compilador con `-P`
+COMPILER_PLUGIN_OPTION = "plugin:androidx.compose.compiler.plugins.kotlin"
+# Los informes ralentizan la compilación: solo se generan con -PcomposeCompilerReports=true
+REPORTS_PROPERTY = "composeCompilerReports"
+REPORTS_DIRECTORY = "compose_compiler"
+STABILITY_FILE = "compose_stability.conf"
+# Primera versión del compilador de Compose que acepta un fichero de estabilidad
+MINIMUM_STABILITY_COMPILER = "1.5.5"
+# Paquetes de la arquitectura con las clases que reciben los composables
+STABLE_LAYERS = ("model", "state")
+
+CLASS_PATTERN = re.compile(r"^(stable|unstable|runtime)\s+class\s+(\S+)\s*\{")
+MEMBER_PATTERN = re.compile(r"^\s+(stable|unstable|runtime)\s+(?:val|var)\s+([^:\s]+)\s*:\s*(.+)$")
+COMPOSABLE_PATTERN = re.compile(r"^((?:[a-z]+\s+)*)(?:scheme\(\"[^\"]*\"\)\s+)?fun\s+([^\s(]+)\s*\((.*)$")
+PARAMETER_PATTERN = re.compile(r"^\s+(?:@\w+\s+)*(stable|unstable|runtime)\s+([^:\s]+)\s*:\s*(.+?)(?:\s*=.*)?$")
+
+def stability_configuration(package_name, layers=STABLE_LAYERS, text=None):
+    """
+    Contenido del fichero de estabilidad con los paquetes `layers` del módulo. Si ya
+    existe (`text`), solo se añaden los patrones que faltan.
+
+    Returns:
+        str | None: Texto nuevo, o None si no hay cambios.
+    """
+    patterns = [f"{package_name}.{layer}.**" for layer in layers]
+    if text is None:
+        return get_registry().render(COMPOSE_STABILITY_TEMPLATE, packages="\n".join(patterns))
+    existing = {line.split("//", 1)[0].strip() for line in text.splitlines()}
+    missing = [pattern for pattern in patterns if pattern not in existing]
+    if not missing:
+        return None
+    if text and not text.endswith("\n"):
+        text += "\n"
+    return text + "".join(f"{pattern}\n" for pattern in missing)
+
+def _compose_compiler_lines():
+    """Cuerpo del bloque `composeCompiler` (igual en Kotlin DSL y en Groovy)."""
+    return [
+        f"// Informes y métricas del compilador: -P{REPORTS_PROPERTY}=true",
+        f'if (project.findProperty("{REPORTS_PROPERTY}") == "true") {{',
+        f'    reportsDestination = layout.buildDirectory.dir("{REPORTS_DIRECTORY}")',
+        f'    metricsDestination = layout.buildDirectory.dir("{REPORTS_DIRECTORY}")',
+        "}",
+        f'stabilityConfigurationFile = layout.projectDirectory.file("{STABILITY_FILE}")',
+    ]
+
+def _compiler_argument_lines(kotlin_dsl, stability=True):
+    """Líneas de `kotlinOptions` que pasan las mismas opciones con `freeCompilerArgs` (Kotlin 1.x)."""
+    option = COMPILER_PLUGIN_OPTION
+    if kotlin_dsl:
+        lines = [f'freeCompilerArgs += listOf("-P", "{option}:stabilityConfigurationPath='
+                 f'${{project.file("{STABILITY_FILE}").absolutePath}}")'] if stability else []
+        return lines + [
+            f"// Informes y métricas del compilador: -P{REPORTS_PROPERTY}=true",
+            f'if (project.findProperty("{REPORTS_PROPERTY}") == "true") {{',
+            f'    val reports = layout.buildDirectory.dir("{REPORTS_DIRECTORY}").get().asFile.absolutePath',
+            "    freeCompilerArgs += listOf(",
+            f'        "-P", "{option}:reportsDestination=$reports",',
+            f'        "-P", "{option}:metricsDestination=$reports",',
+            "    )",
+            "}",
+        ]
+    lines = [f'freeCompilerArgs += ["-P", "{option}:stabilityConfigurationPath='
+             f"${{project.file('{STABILITY_FILE}').absolutePath}}\"]"] if stability else []
+    return lines + [
+        f"// Informes y métricas del compilador: -P{REPORTS_PROPERTY}=true",
+        f'if (project.findProperty("{REPORTS_PROPERTY}") == "true") {{',
+        f'    def reports = layout.buildDirectory.dir("{REPORTS_DIRECTORY}").get().asFile.absolutePath',
+        f'    freeCompilerArgs += ["-P", "{option}:reportsDestination=$reports",',
+        f'                         "-P", "{option}:metricsDestination=$reports"]',
+        "}",
+    ]
+
+def _compose_compiler_version(gradle_file, catalog):
+    """Versión del compilador de Compose de `composeOptions` (literal o del catálogo), o None."""
+    value = gradle_file.get_property(("android", "composeOptions"), "kotlinCompilerExtensionVersion")
+    if not value:
+        return None
+    literal = re.fullmatch(r'["\']([\w.-]+)["\']', value)
+    if literal:
+        return literal.group(1)
+    reference = re.fullmatch(r"libs\.versions\.([\w.]+)\.get\(\)", value)
+    if reference and catalog is not None:
+        entry = catalog.get("versions", reference.group(1))
+        if entry and isinstance(entry.value, str):
+            return entry.value
+    return None
+
+@traced
+def configure_compose_compiler(project_path, module="app", package_name=None, layers=None, workspace=None):
+    """
+    Prepara un módulo de Compose para detectar recomposiciones innecesarias:
+
+    - Escribe `compose_stability.conf` en el módulo con los paquetes `model` y `state`,
+      para que el compilador trate sus clases como estables.
+    - En el build file configura el fichero de estabilidad y los informes y métricas del
+      compilador en `build/compose_compiler`, que se generan al compilar con
+      `-PcomposeCompilerReports=true` (ver `summarize_compose_reports`). Con el plugin
+      `org.jetbrains.kotlin.plugin.compose` se usa el bloque `composeCompiler`; con
+      Kotlin 1.x, `freeCompilerArgs` en `kotlinOptions`.
+
+    Args:
+        package_name (str | None): Paquete base. Por defecto, el detectado en el módulo.
+        layers (iterable | None): Capas que van al fichero de estabilidad. Por defecto,
+            las de `model` y `state` que existan en el módulo (o `model`).
+        workspace (Workspace | None): Workspace compartido. Si es None, los cambios se
+            escriben juntos al terminar.
+    """
+    project_path = os.path.abspath(project_path)
+    info = inspect_project(project_path).module(module)
+    if info is None or not info["build_file"]:
+        print(f"No se encontró el archivo build.gradle.kts o build.gradle en el módulo {module}.")
+        return
+    package_name = package_name or info["package"]
+    if layers is None:
+        layers = [layer for layer in STABLE_LAYERS if layer in (info["layers"] or ())] or ["model"]
+
+    with open_workspace(workspace) as workspace:
+        gradle_file = GradleBuildFile.for_path(info["build_file"], workspace.read(info["build_file"]))
+        versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
+        catalog = VersionCatalog.load(versions_toml_path, workspace) if workspace.exists(versions_toml_path) else None
+        compiler_plugin = has_plugin(gradle_file, catalog, (COMPOSE_COMPILER_PLUGIN_ID,))
+        if not compiler_plugin and gradle_file.get_property(("android", "buildFeatures"), "compose") != "true":
+            print(f"⚠️  El módulo {module} no activa Compose (buildFeatures.compose); no se configuran sus informes.")
+            return
+
+        stability = True
+        if not compiler_plugin:
+            compiler = _compose_compiler_version(gradle_file, catalog)
+            if compiler and version_key(compiler) < version_key(MINIMUM_STABILITY_COMPILER):
+                print(f"⚠️  El compilador de Compose {compiler} no admite un fichero de estabilidad "
+                      f"(necesita {MINIMUM_STABILITY_COMPILER} o superior); solo se configuran los informes.")
+                stability = False
+
+        if stability and package_name:
+            stability_path = os.path.join(info["path"], STABILITY_FILE)
+            text = stability_configuration(package_name, layers,
+                                           workspace.read(stability_path) if workspace.exists(stability_path) else None)
+            if text is not None:
+                workspace.write(stability_path, text)
+                print(f"Paquetes {', '.join(layers)} declarados estables en {stability_path}.")
+
+        reports = REPORTS_PROPERTY not in gradle_file.text
+        stability = stability and bool(package_name) and STABILITY_FILE not in gradle_file.text
+        if not reports and not stability:
+            print(f"✔️ {info['build_file']} ya configura los informes del compilador de Compose.")
+            return
+        if compiler_plugin:
+            lines = _compose_compiler_lines()
+            lines = (lines[:-1] if reports else []) + (lines[-1:] if stability else [])
+            gradle_file.add_to_block(("composeCompiler",), lines)
+        else:
+            lines = _compiler_argument_lines(gradle_file.kotlin_dsl, stability)
+            gradle_file.add_to_block(("android", "kotlinOptions"), lines if reports else lines[:1])
+        workspace.write(info["build_file"], gradle_file.to_text())
+        print(f"Informes del compilador de Compose configurados en {info['build_file']} "
+              f"(./gradlew :{info['directory'].replace(os.sep, ':')}:assembleRelease -P{REPORTS_PROPERTY}=true).")
+
+def parse_classes_report(text):
+    """
+    Lee el informe de clases del compilador (`*-classes.txt`).
+
+    Returns:
+        list: Una entrada por clase con `name`, `stability` (`stable`, `unstable` o
+        `runtime`) y `unstable` (pares (propiedad, tipo) inestables).
+    """
+    classes = []
+    current = None
+    for line in text.splitlines():
+        match = CLASS_PATTERN.match(line)
+        if match:
+            current = {"name": match.group(2), "stability": match.group(1), "unstable": []}
+            classes.append(current)
+            continue
+        match = MEMBER_PATTERN.match(line)
+        if match and current is not None and match.group(1) == "unstable":
+            current["unstable"].append((match.group(2), match.group(3).strip()))
+        elif line.startswith("}"):
+            current = None
+    return classes
+
+def parse_composables_report(text):
+    """
+    Lee el informe de composables del compilador (`*-composables.txt`).
+
+    Returns:
+        list: Una entrada por composable con `name`, `restartable`, `skippable` y
+        `unstable` (pares (parámetro, tipo) inestables).
+    """
+    composables = []
+    current = None
+    for line in text.splitlines():
+        match = COMPOSABLE_PATTERN.match(line)
+        if match:
+            modifiers = match.group(1).split()
+            current = {"name": match.group(2), "restartable": "restartable" in modifiers,
+                       "skippable": "skippable" in modifiers, "unstable": []}
+            composables.append(current)
+            if ")" in match.group(3):
+                current = None
+            continue
+        match = PARAMETER_PATTERN.match(line)
+        if match and current is not None and match.group(1) == "unstable":
+            current["unstable"].append((match.group(2), match.group(3).strip()))
+        elif line.startswith(")"):
+            current = None
+    return composables
+
+def read_compose_reports(module_path):
+    """
+    Resume los informes del compilador de Compose de un módulo (`build/compose_compiler`):
+    uno por variante (`app_release`...), con las métricas de `*-module.json`, las clases
+    inestables y los composables reiniciables que no se pueden saltar.
+
+    Returns:
+        list: Resúmenes con las claves `variant`, `metrics`, `unstable_classes` y `non_skippable`.
+    """
+    directory = os.path.join(module_path, "build", REPORTS_DIRECTORY)
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    variants = {}
+    for name in names:
+        match = re.fullmatch(r"(.+)-(classes\.txt|composables\.txt|module\.json)", name)
+        if match:
+            variants.setdefault(match.group(1), {})[match.group(2)] = os.path.join(directory, name)
+
+    summaries = []
+    for variant, files in variants.items():
+        summary = {"variant": variant, "metrics": {}, "unstable_classes": [], "non_skippable": []}
+        if "module.json" in files:
+            with open(files["module.json"], "r", encoding="utf-8") as file:
+                summary["metrics"] = json.load(file)
+        if "classes.txt" in files:
+            with open(files["classes.txt"], "r", encoding="utf-8") as file:
+                summary["unstable_classes"] = [entry for entry in parse_classes_report(file.read())
+                                               if entry["stability"] == "unstable"]
+        if "composables.txt" in files:
+            with open(files["composables.txt"], "r", encoding="utf-8") as file:
+                summary["non_skippable"] = [entry for entry in parse_composables_report(file.read())
+                                            if entry["restartable"] and not entry["skippable"]]
+        summaries.append(summary)
+    return summaries
+
+def describe_compose_report(summary):
+    """Líneas legibles con el resumen de una variante (ver `read_compose_reports`)."""
+    lines = [f"Informe de Compose {summary['variant']}:"]
+    metrics = summary["metrics"]
+    if metrics:
+        lines.append(f"- Composables: {metrics.get('totalComposables', 0)} "
+                     f"({metrics.get('restartableComposables', 0)} reiniciables, "
+                     f"{metrics.get('skippableComposables', 0)} saltables)")
+    lines.append(f"- Clases inestables: {len(summary['unstable_classes'])}")
+    for entry in summary["unstable_classes"]:
+        members = ", ".join(f"{name}: {type_name}" for name, type_name in entry["unstable"])
+        lines.append(f"  - {entry['name']}" + (f" ({members})" if members else ""))
+    lines.append(f"- Composables que no se pueden saltar: {len(summary['non_skippable'])}")
+    for entry in summary["non_skippable"]:
+        parameters = ", ".join(f"{name}: {type_name}" for name, type_name in entry["unstable"])
+        lines.append(f"  - {entry['name']}" + (f" (parámetros inestables: {parameters})" if parameters else ""))
+    return lines
+
+@traced
+def summarize_compose_reports(project_path, module="app"):
+    """
+    Muestra el resumen de los informes del compilador de Compose de un módulo.
+
+    Returns:
+        list: Resúmenes de `read_compose_reports` (vacía si no hay informes).
+    """
+    info = inspect_project(os.path.abspath(project_path)).module(module)
+    if info is None:
+        raise ValueError(f"No se encontró el módulo {module} en settings.gradle.")
+    summaries = read_compose_reports(info["path"])
+    if not summaries:
+        print(f"No hay informes del compilador de Compose en {os.path.join(info['path'], 'build', REPORTS_DIRECTORY)}. "
+              f"Genéralos con ./gradlew :{info['directory'].replace(os.sep, ':')}:assembleRelease -P{REPORTS_PROPERTY}=true")
+    for summary in summaries:
+        for line in describe_compose_report(summary):
+            print(line)
+    return summaries
@@ -0,0 +1,338 @@
+import bisect
+import hashlib
+import json
+import os
+import pickle
+import re
+from array import array
+from collections import namedtuple
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dependencies.json")
+CATALOG_ENV = "ANDROID_ARCH_DEPENDENCIES"
+CACHE_DIR_ENV = "ANDROID_ARCH_CACHE"
+INDEX_FORMAT = 2
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Procesadores de anotaciones con soporte para KSP: se usan con `ksp` en lugar de `kapt`
+KSP_PROCESSORS = {
+    "androidx.room:room-compiler",
+    "com.google.dagger:hilt-compiler",
+    "com.google.dagger:dagger-compiler",
+    "com.squareup.moshi:moshi-kotlin-codegen",
+    "com.github.bumptech.glide:ksp",
+    "io.github.raamcosta.compose-destinations:ksp",
+}
+PROCESSOR_SUFFIXES = ("-compiler", "-processor", "-codegen", "-ksp")
+# Artefactos de test y de depuración: (grupo o `group:name` exactos, configuración).
+# Las reglas más específicas van antes.
+TEST_ARTIFACTS = (
+    ("io.mockk:mockk-android", "androidTestImplementation"),
+    ("org.mockito:mockito-android", "androidTestImplementation"),
+    ("com.google.dagger:hilt-android-testing", "androidTestImplementation"),
+    ("androidx.compose.ui:ui-test-junit4", "androidTestImplementation"),
+    ("androidx.compose.ui:ui-test-manifest", "debugImplementation"),
+    ("androidx.compose.ui:ui-tooling", "debugImplementation"),
+    ("com.squareup.leakcanary:leakcanary-android", "debugImplementation"),
+    ("androidx.test.espresso", "androidTestImplementation"),
+    ("androidx.test.ext", "androidTestImplementation"),
+    ("androidx.test.uiautomator", "androidTestImplementation"),
+    ("androidx.test", "androidTestImplementation"),
+    ("org.junit.jupiter:junit-jupiter-engine", "testRuntimeOnly"),
+    ("org.junit.platform:junit-platform-launcher", "testRuntimeOnly"),
+    ("junit", "testImplementation"),
+    ("org.junit.jupiter", "testImplementation"),
+    ("io.mockk", "testImplementation"),
+    ("org.mockito", "testImplementation"),
+    ("org.mockito.kotlin", "testImplementation"),
+    ("org.robolectric", "testImplementation"),
+    ("app.cash.turbine", "testImplementation"),
+    ("com.google.truth", "testImplementation"),
+    ("org.jetbrains.kotlinx:kotlinx-coroutines-test", "testImplementation"),
+    ("androidx.arch.core:core-testing", "testImplementation"),
+    ("com.squareup.okhttp3:mockwebserver", "testImplementation"),
+)
+
+def infer_configuration(group, name):
+    """
+    Configuración de Gradle para un artefacto que no está en el catálogo, deducida de
+    sus coordenadas: BOMs como `platform`, procesadores de anotaciones con `ksp` (si lo
+    soportan) o `kapt`, y librerías de test y de depuración en su ámbito.
+
+    Returns:
+        tuple: (configuración, platform)
+    """
+    module = f"{group}:{name}"
+    if name.endswith("-bom"):
+        return "implementation", True
+    if module in KSP_PROCESSORS:
+        return "ksp", False
+    if name.endswith(PROCESSOR_SUFFIXES) or (name == "compiler" and group != "androidx.compose.compiler"):
+        return "kapt", False
+    for pattern, configuration in TEST_ARTIFACTS:
+        if pattern in (module, group):
+            return configuration, False
+    return "implementation", False
+
+def cache_directory():
+    """Directorio de caché de la herramienta (ANDROID_ARCH_CACHE, XDG_CACHE_HOME o ~/.cache)."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "android-architecture")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+class Artifact(namedtuple("Artifact", "group name version configuration platform variant group_id")):
+    """Artefacto del catálogo con su configuración de Gradle y la variante de UI a la que aplica."""
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, coordinate, group_id, configuration="implementation", platform=False, variant=None):
+        parts = coordinate.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Coordenada no válida en el catálogo de dependencias: {coordinate}")
+        version = parts[2] if len(parts) == 3 else None
+        return cls(parts[0], parts[1], version, configuration, platform, variant, group_id)
+
+    @property
+    def module(self):
+        return f"{self.group}:{self.name}"
+
+    @property
+    def coordinate(self):
+        return f"{self.module}:{self.version}" if self.version else self.module
+
+    def applies_to(self, use_compose):
+        return self.variant is None or self.variant == ("compose" if use_compose else "xml")
+
+class KeepRules(namedtuple("KeepRules", "module since until rules note")):
+    """
+    Fragmento de reglas de R8/ProGuard de un artefacto, válido para las versiones
+    `since <= versión < until` (cualquiera de los dos límites puede faltar). Las reglas
+    pueden usar `{package}` para referirse al paquete del módulo.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, fragment, module):
+        rules = fragment.get("rules")
+        if not rules or not all(isinstance(rule, str) and rule.startswith("-") for rule in rules):
+            raise ValueError(f"Reglas de R8 no válidas en el catálogo de dependencias para {module}")
+        return cls(module, fragment.get("since"), fragment.get("until"), tuple(rules), fragment.get("note"))
+
+    def applies_to(self, version):
+        if version is None:
+            return True
+        # version_resolver importa este módulo
+        from version_resolver import version_key
+        return ((self.since is None or version_key(version) >= version_key(self.since))
+                and (self.until is None or version_key(version) < version_key(self.until)))
+
+class DependencyCatalog:
+    """
+    Catálogo de grupos de dependencias compilado a índices en memoria.
+
+    Se construye a partir del fichero de datos una única vez; después las búsquedas por
+    número de grupo, nombre, módulo (`group:name`), grupo Maven y categoría son accesos
+    a diccionarios, y la búsqueda de texto usa una lista ordenada de palabras (prefijos
+    resueltos con bisect).
+    """
+
+    def __init__(self, data):
+        self.groups = {}
+        self.group_names = {}
+        self.notes = {}
+        self.categories = {}
+        self.artifacts = []
+        self.by_module = {}
+        self.by_maven_group = {}
+        self.keep_rules = {}
+        words = {}
+
+        for entry in data.get("groups", []):
+            group_id = int(entry["id"])
+            if group_id in self.groups:
+                raise ValueError(f"Grupo de dependencias duplicado en el catálogo: {group_id}")
+            category = entry.get("category", "Otros")
+            artifacts = [
+                Artifact.parse(
+                    artifact["coordinate"],
+                    group_id,
+                    configuration=artifact.get("configuration", "implementation"),
+                    platform=artifact.get("platform", False),
+                    variant=artifact.get("variant"),
+                )
+                for artifact in entry.get("artifacts", [])
+            ]
+            # Los artefactos de un grupo son contiguos en `self.artifacts`
+            first = len(self.artifacts)
+            self.groups[group_id] = (entry["name"], category, first, first + len(artifacts))
+            self.group_names[entry["name"].lower()] = group_id
+            self.categories.setdefault(category, []).append(group_id)
+            if entry.get("notes"):
+                self.notes[group_id] = entry["notes"]
+
+            for artifact, source in zip(artifacts, entry.get("artifacts", [])):
+                if source.get("keep_rules"):
+                    self.keep_rules[artifact.module] = [KeepRules.parse(fragment, artifact.module)
+                                                        for fragment in source["keep_rules"]]
+                index = len(self.artifacts)
+                self.artifacts.append(artifact)
+                self.by_module.setdefault(artifact.module, []).append(index)
+                self.by_maven_group.setdefault(artifact.group, []).append(index)
+                for word in tokenize(f"{artifact.group} {artifact.name} {entry['name']} {category}"):
+                    words.setdefault(word, set()).add(index)
+
+        # Índice de texto: palabras ordenadas y, para cada una, su rango en `postings`.
+        # Las palabras con un mismo prefijo son contiguas, así que sus artefactos también.
+        self.sorted_words = sorted(words)
+        self.offsets = array("I", [0])
+        self.postings = array("I")
+        for word in self.sorted_words:
+            self.postings.extend(sorted(words[word]))
+            self.offsets.append(len(self.postings))
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Carga el catálogo desde su índice binario en caché o, si el fichero ha cambiado
+        (según su hash), lo compila a partir del JSON y guarda el índice.
+        """
+        path = os.path.abspath(path or os.environ.get(CATALOG_ENV) or DEFAULT_CATALOG_PATH)
+        with open(path, "rb") as file:
+            content = file.read()
+        digest = hashlib.sha1(content).hexdigest()
+        index_path = os.path.join(cache_directory(), f"dependencies-{INDEX_FORMAT}-{digest}.pickle")
+
+        try:
+            with open(index_path, "rb") as file:
+                return pickle.load(file)
+        except Exception:
+            # Sin índice o con un índice dañado o de otra versión: se vuelve a compilar
+            pass
+
+        try:
+            data = json.loads(content.decode("utf-8"))
+        except ValueError as e:
+            raise ValueError(f"El catálogo de dependencias {path} no es un JSON válido: {e}") from None
+        catalog = cls(data)
+        catalog._save_index(index_path)
+        return catalog
+
+    def _save_index(self, index_path):
+        # La caché es opcional: si no se puede escribir se compila en cada ejecución
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            temp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, index_path)
+        except OSError:
+            pass
+
+    def group_id(self, key):
+        """Devuelve el número de un grupo a partir de su número o su nombre, o None."""
+        key = str(key).strip()
+        group_id = int(key) if key.isdigit() else self.group_names.get(key.lower())
+        return group_id if group_id in self.groups else None
+
+    def group_artifacts(self, key, use_compose):
+        """Artefactos de un grupo que aplican al tipo de proyecto (Compose o XML)."""
+        group_id = self.group_id(key)
+        if group_id is None:
+            raise ValueError(f"Grupo de dependencias no válido: {key}")
+        _, _, first, last = self.groups[group_id]
+        return [artifact for artifact in self.artifacts[first:last] if artifact.applies_to(use_compose)]
+
+    def menu(self, use_compose):
+        """Devuelve los grupos en el formato del menú: número -> {nombre: [coordenadas]}."""
+        return {
+            group_id: {name: [artifact.coordinate for artifact in self.group_artifacts(group_id, use_compose)]}
+            for group_id, (name, _, _, _) in self.groups.items()
+        }
+
+    def find(self, group, name):
+        """Artefactos registrados para un módulo `group:name`."""
+        return [self.artifacts[index] for index in self.by_module.get(f"{group}:{name}", [])]
+
+    def configuration_for(self, group, name):
+        """
+        Configuración de Gradle de un artefacto: la del catálogo si está registrado y, si
+        no, la deducida de sus coordenadas. Los procesadores que soportan KSP usan `ksp`
+        aunque el catálogo indique `kapt`.
+
+        Returns:
+            tuple: (configuración, platform)
+        """
+        artifacts = self.find(group, name)
+        if not artifacts:
+            return infer_configuration(group, name)
+        configuration, platform = artifacts[0].configuration, artifacts[0].platform
+        if configuration == "kapt" and f"{group}:{name}" in KSP_PROCESSORS:
+            configuration = "ksp"
+        return configuration, platform
+
+    def keep_rules_for(self, group, name, version=None):
+        """
+        Fragmentos de reglas de R8/ProGuard (`KeepRules`) que necesita un artefacto en la
+        versión indicada. Sin versión (p. ej. gestionada por un BOM) se devuelven todos.
+        """
+        return [fragment for fragment in self.keep_rules.get(f"{group}:{name}", ()) if fragment.applies_to(version)]
+
+    def find_group(self, maven_group):
+        """Artefactos de un grupo Maven (p. ej. `com.squareup.okhttp3`)."""
+        return [self.artifacts[index] for index in self.by_maven_group.get(maven_group, [])]
+
+    def category(self, name):
+        """Números de los grupos de una categoría."""
+        return list(self.categories.get(name, []))
+
+    def _prefix_matches(self, prefix):
+        first = bisect.bisect_left(self.sorted_words, prefix)
+        last = bisect.bisect_left(self.sorted_words, prefix + "\uffff", first)
+        return set(self.postings[self.offsets[first]:self.offsets[last]])
+
+    def search(self, text):
+        """
+        Búsqueda de texto libre: cada palabra de `text` debe ser prefijo de alguna palabra
+        del artefacto (grupo Maven, nombre, nombre del grupo o categoría). Sin palabras
+        se devuelven todos los artefactos.
+        """
+        result = None
+        for word in tokenize(text):
+            matches = self._prefix_matches(word)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        if result is None:
+            return list(self.artifacts)
+        return [self.artifacts[index] for index in sorted(result)]
+
+_catalog = None
+_catalog_stamp = None
+
+def file_stamp(path):
+    """(ruta, fecha de modificación, tamaño) de un fichero, o None si no existe."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+def load_catalog(path=None):
+    """
+    Devuelve el catálogo compartido del proceso, cargándolo la primera vez que se usa
+    y de nuevo si el fichero cambia (p. ej. en un proceso de larga duración como el servidor).
+    """
+    global _catalog, _catalog_stamp
+    if path is not None:
+        return DependencyCatalog.load(path)
+    stamp = file_stamp(os.path.abspath(os.environ.get(CATALOG_ENV) or DEFAULT_CATALOG_PATH))
+    if _catalog is None or stamp != _catalog_stamp:
+        _catalog = DependencyCatalog.load()
+        _catalog_stamp = stamp
+    return _catalog
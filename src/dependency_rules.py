@@ -0,0 +1,254 @@
+import json
+import os
+
+from dependency_catalog import file_stamp
+from version_resolver import version_key
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dependency_rules.json")
+RULE_KINDS = ("exclusive", "requires", "align", "bom")
+
+class Dependency:
+    """Dependencia evaluada por las reglas: seleccionada ahora o ya declarada en el proyecto."""
+
+    __slots__ = ("group", "name", "version", "source")
+
+    def __init__(self, group, name, version=None, source="selected"):
+        self.group = group
+        self.name = name
+        self.version = version
+        self.source = source
+
+    @classmethod
+    def parse(cls, coordinate, source="selected"):
+        parts = coordinate.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Coordenada de dependencia no válida: {coordinate}")
+        return cls(parts[0], parts[1], parts[2] if len(parts) == 3 else None, source)
+
+    @property
+    def module(self):
+        return f"{self.group}:{self.name}"
+
+class Violation:
+    """
+    Incumplimiento de una regla y, si se puede corregir automáticamente, su corrección:
+    `updates` (módulo -> nueva versión, o None para quitarla) y `additions` (coordenadas).
+    """
+
+    __slots__ = ("rule", "kind", "severity", "message", "modules", "updates", "additions")
+
+    def __init__(self, rule, message, modules, updates=None, additions=None, severity=None):
+        self.rule = rule["id"]
+        self.kind = rule["kind"]
+        self.severity = severity or rule.get("severity", "error")
+        self.message = message
+        self.modules = modules
+        self.updates = updates or {}
+        self.additions = additions or []
+
+    @property
+    def fixable(self):
+        return bool(self.updates or self.additions)
+
+    def __repr__(self):
+        return f"Violation({self.rule}, {self.message!r})"
+
+class RuleSet:
+    """
+    Conjunto de reglas de dependencias precompilado.
+
+    Cada patrón (`group:name` o `group:prefijo*`) se indexa por grupo Maven, de modo que
+    para cada dependencia solo se prueban los patrones de su propio grupo. Evaluar una
+    selección es lineal en el número de dependencias más el de reglas afectadas.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        self.exact = {}
+        self.prefixes = {}
+        for rule in rules:
+            kind = rule.get("kind")
+            if kind not in RULE_KINDS:
+                raise ValueError(f"Tipo de regla no válido en '{rule.get('id')}': {kind}")
+            index = len(self.rules)
+            self.rules.append(rule)
+            if kind == "exclusive" or kind == "align":
+                patterns = rule["modules"]
+            elif kind == "requires":
+                patterns = [rule["when"]]
+            else:
+                patterns = [rule["bom"]] + rule["members"]
+            for position, pattern in enumerate(patterns):
+                group, _, name = pattern.partition(":")
+                if name.endswith("*"):
+                    self.prefixes.setdefault(group, []).append((name[:-1], index, position))
+                else:
+                    self.exact.setdefault(f"{group}:{name}", []).append((index, position))
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or DEFAULT_RULES_PATH, "r", encoding="utf-8") as file:
+            return cls(json.load(file)["rules"])
+
+    def matches(self, dependency):
+        """Pares (regla, posición del patrón) que afectan a una dependencia."""
+        found = list(self.exact.get(dependency.module, ()))
+        for prefix, index, position in self.prefixes.get(dependency.group, ()):
+            if dependency.name.startswith(prefix):
+                found.append((index, position))
+        return found
+
+    def check(self, selected, existing=()):
+        """
+        Evalúa las reglas sobre la selección y lo que ya declara el proyecto.
+
+        Args:
+            selected (list): Coordenadas `group:name[:version]` que se van a añadir.
+            existing (list): Dependencias (`Dependency`) ya presentes en el catálogo o el build.
+
+        Returns:
+            list: Incumplimientos (`Violation`) en el orden de las reglas.
+        """
+        dependencies = {}
+        for dependency in existing:
+            dependencies.setdefault(dependency.module, dependency)
+        chosen = {}
+        for coordinate in selected:
+            dependency = Dependency.parse(coordinate)
+            chosen.setdefault(dependency.module, dependency)
+            # Si ya existe en el proyecto se reutiliza la declaración existente
+            dependencies.setdefault(dependency.module, dependency)
+
+        matched = {}
+        for dependency in dependencies.values():
+            for index, position in self.matches(dependency):
+                matched.setdefault(index, []).append((position, dependency))
+
+        violations = []
+        for index in sorted(matched):
+            if all(dependency.module not in chosen for _, dependency in matched[index]):
+                # Problemas previos del proyecto que la selección no toca
+                continue
+            rule = self.rules[index]
+            check = getattr(self, f"_check_{rule['kind']}")
+            violations.extend(check(rule, matched[index], dependencies, chosen))
+        return violations
+
+    @staticmethod
+    def _check_exclusive(rule, matches, dependencies, selected):
+        patterns = {position for position, _ in matches}
+        if len(patterns) < 2:
+            return []
+        modules = sorted(dependency.module for _, dependency in matches)
+        return [Violation(rule, rule.get("message", f"Dependencias incompatibles: {', '.join(modules)}"), modules)]
+
+    @staticmethod
+    def _check_requires(rule, matches, dependencies, selected):
+        violations = []
+        for _, dependency in matches:
+            missing = [module for module in rule["requires"] if module not in dependencies]
+            if not missing:
+                continue
+            additions = []
+            for module in missing:
+                group = module.split(":")[0]
+                # Los módulos de la misma familia se añaden con la versión de quien los necesita
+                version = dependency.version if group == dependency.group else None
+                additions.append(f"{module}:{version}" if version else module)
+            message = rule.get("message", f"{dependency.module} necesita {', '.join(missing)}.")
+            violations.append(Violation(rule, message, [dependency.module] + missing, additions=additions))
+        return violations
+
+    @staticmethod
+    def _check_align(rule, matches, dependencies, selected):
+        versioned = [dependency for _, dependency in matches if dependency.version]
+        # Seleccionadas con otra versión que la declaración del proyecto que las oculta
+        shadowed = [selected[dependency.module] for dependency in versioned
+                    if dependency.module in selected and selected[dependency.module] is not dependency
+                    and selected[dependency.module].version not in (None, dependency.version)]
+        versions = {dependency.version for dependency in versioned + shadowed}
+        if len(versions) < 2:
+            return []
+        target = max(versions, key=version_key)
+        updates = {dependency.module: target for dependency in versioned + shadowed if dependency.version != target}
+        details = ", ".join([f"{dependency.name}:{dependency.version}" for dependency in versioned]
+                            + [f"{dependency.name}:{dependency.version} (seleccionada)" for dependency in shadowed])
+        message = f"Versiones desalineadas en la familia '{rule['id']}' ({details}); se usará {target}."
+        return [Violation(rule, message, sorted(updates), updates=updates, severity=rule.get("severity", "warning"))]
+
+    @staticmethod
+    def _check_bom(rule, matches, dependencies, selected):
+        bom = dependencies.get(rule["bom"])
+        members = [dependency for position, dependency in matches if position > 0 and dependency.module != rule["bom"]]
+        if bom is None:
+            unversioned = [dependency.module for dependency in members if not dependency.version]
+            if not unversioned:
+                return []
+            message = f"{', '.join(unversioned)} no declara versión y necesita {rule['bom']}."
+            return [Violation(rule, message, unversioned, additions=[rule["bom"]])]
+        versioned = [dependency for dependency in members if dependency.version]
+        if not versioned:
+            return []
+        message = (f"{', '.join(dependency.module for dependency in versioned)} declara versión aunque "
+                   f"{rule['bom']} ya la gestiona; se quitará la versión.")
+        updates = {dependency.module: None for dependency in versioned}
+        return [Violation(rule, message, sorted(updates), updates=updates, severity="warning")]
+
+def apply_fixes(selected, violations, existing=(), resolve_version=None):
+    """
+    Aplica las correcciones automáticas a la selección.
+
+    Args:
+        existing (list): Dependencias ya declaradas en el proyecto (las mismas de `check`).
+        resolve_version (callable | None): Devuelve la versión de un módulo añadido sin
+            versión (`group:name`), p. ej. desde el catálogo de dependencias.
+
+    Returns:
+        tuple: (nueva selección, {módulo: versión} para dependencias que ya estaban en el proyecto)
+    """
+    updates, additions = {}, []
+    for violation in violations:
+        updates.update(violation.updates)
+        additions.extend(violation.additions)
+
+    result = []
+    seen = set()
+    for coordinate in selected:
+        dependency = Dependency.parse(coordinate)
+        if dependency.module in updates:
+            version = updates[dependency.module]
+            coordinate = f"{dependency.module}:{version}" if version else dependency.module
+        result.append(coordinate)
+        seen.add(dependency.module)
+
+    for coordinate in additions:
+        dependency = Dependency.parse(coordinate)
+        if dependency.module in seen:
+            continue
+        version = updates.get(dependency.module, dependency.version)
+        if version is None and resolve_version and dependency.module not in updates:
+            version = resolve_version(dependency.group, dependency.name)
+        result.append(f"{dependency.module}:{version}" if version else dependency.module)
+        seen.add(dependency.module)
+
+    # Las dependencias que ya están en el proyecto se corrigen allí (la selección las reutiliza)
+    existing_versions = {}
+    for dependency in existing:
+        existing_versions.setdefault(dependency.module, dependency.version)
+    project_updates = {module: version for module, version in updates.items()
+                       if module in existing_versions and existing_versions[module] != version}
+    return result, project_updates
+
+_rules = None
+_rules_stamp = None
+
+def load_rules(path=None):
+    """Devuelve las reglas compartidas del proceso, cargándolas la primera vez que se usan y cuando el fichero cambia."""
+    global _rules, _rules_stamp
+    if path is not None:
+        return RuleSet.load(path)
+    stamp = file_stamp(DEFAULT_RULES_PATH)
+    if _rules is None or stamp != _rules_stamp:
+        _rules = RuleSet.load()
+        _rules_stamp = stamp
+    return _rules
@@ -0,0 +1,368 @@
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from architecture_migration import describe_migration, migrate_architecture
+from compose_metrics import configure_compose_compiler
+from generate_android_architecture import (
+    add_to_manifest,
+    create_architecture_structure,
+    normalize_permissions,
+    remove_kotlin_android_extensions,
+    resolve_architecture_change,
+    select_permissions,
+)
+from generate_dependencies import apply_dependencies, dependency_configuration
+from gradle_parser import GradleBuildFile
+from gradle_properties import describe_gradle_properties_changes, plan_gradle_properties, tune_gradle_properties
+from keep_rules import add_keep_rules
+from project_inspector import inspect_project
+from startup_profiling import PROFILING_MODULES, add_startup_profiling
+from tracing import propagate, traced
+from viewbinding_migration import KOTLIN_ANDROID_EXTENSIONS_IDS
+from workspace import open_workspace
+
+PLAN_FORMAT = 1
+# Hilos para los pasos independientes: la mayor parte del tiempo es E/S
+STEP_WORKERS = 4
+
+def _describe_gradle_properties(project_path):
+    # Los valores dependen del equipo en el que se ejecute el plan: se muestran los de este
+    _, _, changes, kept = plan_gradle_properties(project_path)
+    return ["Ajustar gradle.properties al equipo"] + describe_gradle_properties_changes(changes, kept)
+
+def _source_root(path):
+    """Carpeta `src` del módulo que contiene `path`."""
+    parts = os.path.normpath(path).split(os.sep)
+    return os.sep.join(parts[:len(parts) - parts[::-1].index("src")]) if "src" in parts else path
+
+# Cada tipo de paso: función que lo ejecuta (recibe los parámetros del paso y el
+# workspace), recursos que toca (dos pasos con un recurso en común se ejecutan en el
+# orden del plan) y descripción para la simulación.
+STEP_TYPES = {
+    "migrate_architecture": {
+        "run": migrate_architecture,
+        "resources": lambda params: {"sources:" + _source_root(params["base_path"])},
+        "describe": lambda params: [f"Migrar {params['source']} a {params['target']} en {params['base_path']}"]
+                                   + [f"   {line}" for line in describe_migration(params["source"], params["target"])],
+    },
+    "create_architecture_structure": {
+        "run": create_architecture_structure,
+        "resources": lambda params: {"sources:" + _source_root(params["base_path"])},
+        "describe": lambda params: [f"Crear la estructura {params['architecture']} "
+                                    f"({'Compose' if params['use_compose'] else 'XML'}) en {params['base_path']}"],
+    },
+    "add_to_manifest": {
+        "run": add_to_manifest,
+        "resources": lambda params: {"manifest:" + os.path.join(params["project_path"], params["module"])},
+        "describe": lambda params: [f"Registrar SplashActivity en el manifiesto de {params['module']}"
+                                    + (f" y añadir los permisos {', '.join(params['permissions'])}"
+                                       if params["permissions"] else "")],
+    },
+    "remove_kotlin_android_extensions": {
+        "run": remove_kotlin_android_extensions,
+        "resources": lambda params: {"build:" + os.path.join(params["project_path"], params["module"]),
+                                     "sources:" + os.path.join(params["project_path"], params["module"], "src")},
+        "describe": lambda params: [f"Migrar kotlin-android-extensions a View Binding en {params['module']}"],
+    },
+    "apply_dependencies": {
+        "run": apply_dependencies,
+        # El build.gradle raíz cambia si hay que declarar el plugin KSP
+        "resources": lambda params: {"catalog:" + params["project_path"], "build:" + params["project_path"]}
+                                    | {"build:" + os.path.join(params["project_path"], module) for module in params["modules"]},
+        "describe": lambda params: [f"Añadir {len(params['selected_dependencies'])} dependencias a "
+                                    f"{', '.join(params['modules'])}"
+                                    + (" con libs.versions.toml" if params["create_toml"] else " en build.gradle")]
+                                   + [f"   - {dependency} ({dependency_configuration(dependency)[0]})"
+                                      for dependency in params["selected_dependencies"]],
+    },
+    "add_keep_rules": {
+        "run": add_keep_rules,
+        "resources": lambda params: {"build:" + os.path.join(params["project_path"], params["module"]),
+                                     "rules:" + os.path.join(params["project_path"], params["module"])},
+        "describe": lambda params: [f"Añadir las reglas de R8 de las dependencias a {params['module']}"
+                                    + (" y activar la minificación en release" if params["minify"] else "")],
+    },
+    "add_startup_profiling": {
+        "run": add_startup_profiling,
+        # Los módulos nuevos se incluyen en settings y sus plugins se declaran en el build.gradle raíz
+        "resources": lambda params: {"settings:" + params["project_path"], "catalog:" + params["project_path"],
+                                     "build:" + params["project_path"],
+                                     "build:" + os.path.join(params["project_path"], params["module"]),
+                                     "manifest:" + os.path.join(params["project_path"], params["module"])},
+        "describe": lambda params: [f"Añadir los módulos {', '.join(':' + name for name in PROFILING_MODULES)} "
+                                    f"para medir y optimizar el arranque de {params['module']}"],
+    },
+    "configure_compose_compiler": {
+        "run": configure_compose_compiler,
+        "resources": lambda params: {"build:" + os.path.join(params["project_path"], params["module"]),
+                                     "stability:" + os.path.join(params["project_path"], params["module"])},
+        "describe": lambda params: [f"Configurar los informes del compilador de Compose en {params['module']} y "
+                                    f"declarar estables los paquetes {', '.join(params['layers'])}"],
+    },
+    "tune_gradle_properties": {
+        "run": tune_gradle_properties,
+        "resources": lambda params: {"properties:" + params["project_path"]},
+        "describe": lambda params: _describe_gradle_properties(params["project_path"]),
+    },
+}
+
+class ExecutionPlan:
+    """
+    Pasos que se van a aplicar a un proyecto, decididos antes de tocar el disco.
+
+    Todas las preguntas al usuario se hacen al construir el plan; ejecutarlo no es
+    interactivo. El plan se puede mostrar (simulación), guardar en JSON y ejecutar más
+    tarde con `execute_plan`.
+    """
+
+    def __init__(self, project_path, steps=None):
+        self.project_path = os.path.abspath(project_path)
+        self.steps = list(steps or [])
+
+    def add(self, kind, **params):
+        if kind not in STEP_TYPES:
+            raise ValueError(f"Tipo de paso desconocido: {kind}")
+        self.steps.append({"kind": kind, "params": params})
+
+    def resources(self, step):
+        return STEP_TYPES[step["kind"]]["resources"](step["params"])
+
+    def dependencies(self):
+        """Para cada paso, los índices de los pasos anteriores con los que comparte algún recurso."""
+        resources = [self.resources(step) for step in self.steps]
+        return [{earlier for earlier in range(index) if resources[earlier] & resources[index]}
+                for index in range(len(self.steps))]
+
+    def describe(self):
+        """Líneas legibles con lo que hará cada paso."""
+        if not self.steps:
+            return ["No hay cambios que aplicar."]
+        lines = []
+        for number, step in enumerate(self.steps, 1):
+            description = STEP_TYPES[step["kind"]]["describe"](step["params"])
+            lines.append(f"{number}. {description[0]}")
+            lines.extend(f"   {line}" for line in description[1:])
+        return lines
+
+    def to_dict(self):
+        return {"format": PLAN_FORMAT, "project_path": self.project_path, "steps": self.steps}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Raises:
+            ValueError: Si el plan es de otra versión o contiene pasos desconocidos.
+        """
+        if not isinstance(data, dict) or data.get("format") != PLAN_FORMAT:
+            raise ValueError("El fichero no es un plan de ejecución compatible.")
+        plan = cls(data["project_path"])
+        for step in data.get("steps", []):
+            plan.add(step["kind"], **step["params"])
+        return plan
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2, ensure_ascii=False)
+            file.write("\n")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+def _uses_kotlin_android_extensions(build_file):
+    try:
+        with open(build_file, "r", encoding="utf-8") as file:
+            gradle_file = GradleBuildFile.for_path(build_file, file.read())
+    except (OSError, ValueError):
+        return False
+    return any(gradle_file.has_plugin(plugin_id) for plugin_id in KOTLIN_ANDROID_EXTENSIONS_IDS)
+
+def plan_architecture(project_path, architecture, use_compose, package_name=None, permissions=None,
+                      replace_existing=None, module="app", plan=None, tune_properties=True, startup_profiling=False):
+    """
+    Decide los pasos para añadir una arquitectura a un módulo, sin modificar nada.
+
+    Las preguntas pendientes (migrar la arquitectura existente si `replace_existing` es
+    None, permisos si `permissions` es None) se hacen aquí. Con `tune_properties` el plan
+    también ajusta gradle.properties al equipo (ver `gradle_properties.tune_gradle_properties`)
+    y con `startup_profiling` añade los módulos de perfilado del arranque (ver `plan_startup_profiling`).
+    Con Compose se configuran los informes y la estabilidad del compilador de Compose
+    (ver `compose_metrics.configure_compose_compiler`).
+
+    Returns:
+        ExecutionPlan | None: El plan (vacío si la arquitectura ya está configurada), o
+        None si el proyecto, el módulo o el paquete no son válidos.
+    """
+    project_path = os.path.abspath(project_path)
+    if not os.path.exists(project_path):
+        print(f"El directorio {project_path} no existe. Por favor, verifica la ruta.")
+        return None
+
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        print("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+        return None
+
+    module_info = model.module(module)
+    if not package_name:
+        package_name = module_info["package"] if module_info else None
+        if not package_name:
+            print(f"No se pudo detectar el paquete base del módulo {module}. Indícalo de forma explícita.")
+            return None
+        print(f"Paquete detectado: {package_name}")
+
+    src_main_path, existing_folders = model.locate_package(module, package_name)
+    if existing_folders is None:
+        print(f"El paquete base {src_main_path} no existe. Por favor, verifica el nombre del paquete.")
+        return None
+
+    plan = plan if plan is not None else ExecutionPlan(project_path)
+    existing_architecture, action = resolve_architecture_change(src_main_path, architecture, replace_existing,
+                                                                existing_folders)
+    if action == "keep":
+        return plan
+    if action == "migrate":
+        plan.add("migrate_architecture", base_path=src_main_path, package_name=package_name,
+                 source=existing_architecture, target=architecture)
+    plan.add("create_architecture_structure", base_path=src_main_path, architecture=architecture,
+             package_name=package_name, use_compose=bool(use_compose))
+
+    if permissions is None:
+        permissions = select_permissions()
+    plan.add("add_to_manifest", project_path=project_path, package_name=package_name,
+             permissions=sorted(normalize_permissions(permissions)), module=module)
+
+    build_file = module_info["build_file"] if module_info else None
+    if build_file and _uses_kotlin_android_extensions(build_file):
+        plan.add("remove_kotlin_android_extensions", project_path=project_path, module=module)
+    if use_compose:
+        # En MVI el estado se pasa entero a los composables: sus clases también deben ser estables
+        plan.add("configure_compose_compiler", project_path=project_path, module=module, package_name=package_name,
+                 layers=["model", "state"] if architecture == "MVI" else ["model"])
+    if tune_properties:
+        plan.add("tune_gradle_properties", project_path=project_path)
+    if startup_profiling:
+        plan_startup_profiling(plan, module)
+    return plan
+
+def plan_dependencies(plan, dependencies, create_toml=None, modules=("app",), minify=False):
+    """
+    Añade al plan el paso de las dependencias y el de sus reglas de R8 en cada módulo. Si
+    el proyecto no tiene libs.versions.toml y `create_toml` es None, pregunta si se crea.
+
+    Args:
+        minify (bool): Activa además la minificación de `release` en los módulos (ver
+            `keep_rules.add_keep_rules`), aunque no haya dependencias.
+    """
+    if not dependencies:
+        if minify:
+            for module in modules:
+                plan.add("add_keep_rules", project_path=plan.project_path, dependencies=[], module=module, minify=True)
+        return plan
+    if create_toml is None:
+        if os.path.exists(os.path.join(plan.project_path, "gradle", "libs.versions.toml")):
+            create_toml = True
+        else:
+            answer = input("El archivo 'libs.versions.toml' no existe. ¿Quieres crearlo? (s/n): ").strip().lower()
+            create_toml = answer == "s"
+    plan.add("apply_dependencies", project_path=plan.project_path, selected_dependencies=list(dependencies),
+             create_toml=bool(create_toml), modules=list(modules))
+    for module in modules:
+        plan.add("add_keep_rules", project_path=plan.project_path, dependencies=list(dependencies), module=module,
+                 minify=bool(minify))
+    return plan
+
+def plan_startup_profiling(plan, module="app"):
+    """
+    Añade al plan los módulos `:baselineprofile` y `:macrobenchmark` para la app `module`
+    (ver `startup_profiling.add_startup_profiling`).
+    """
+    plan.add("add_startup_profiling", project_path=plan.project_path, module=module)
+    return plan
+
+def _run_step(step, workspace):
+    return STEP_TYPES[step["kind"]]["run"](workspace=workspace, **step["params"])
+
+class _StepOutput:
+    """
+    Salida estándar mientras los pasos se ejecutan en paralelo: lo que escribe cada hilo
+    de un paso va a su búfer, y el resto a la salida original.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        if getattr(self.local, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def run(self, buffer, step, workspace):
+        self.local.buffer = buffer
+        try:
+            return _run_step(step, workspace)
+        finally:
+            self.local.buffer = None
+
+@traced
+def execute_plan(plan, workspace=None, max_workers=None):
+    """
+    Ejecuta los pasos del plan sobre un único workspace.
+
+    Los pasos que no comparten recursos (código Kotlin, manifiesto, catálogo, build.gradle
+    de cada módulo) se ejecutan a la vez en un pool de hilos; los que sí, en el orden del
+    plan. La salida de cada paso se guarda y se muestra en el orden del plan, sin mezclar
+    líneas de pasos distintos. Si un paso falla no se lanzan más, se espera a los que están
+    en marcha y se relanza el error sin escribir nada.
+    """
+    dependencies = plan.dependencies()
+    workers = max(1, min(max_workers or STEP_WORKERS, len(plan.steps)))
+    with open_workspace(workspace) as workspace:
+        if workers == 1:
+            for step in plan.steps:
+                _run_step(step, workspace)
+            return
+
+        pending = list(range(len(plan.steps)))
+        running, done, error = {}, set(), None
+        buffers, emitted = {}, 0
+        output = _StepOutput(sys.stdout)
+        run = propagate(output.run)
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                while (pending and error is None) or running:
+                    for index in list(pending):
+                        if error is None and dependencies[index] <= done:
+                            pending.remove(index)
+                            buffers[index] = io.StringIO()
+                            running[executor.submit(run, buffers[index], plan.steps[index], workspace)] = index
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index = running.pop(future)
+                        if future.exception() is not None:
+                            error = error or future.exception()
+                        done.add(index)
+                    # Salida de los pasos terminados que ya no esperan a uno anterior
+                    while emitted in done:
+                        output.stream.write(buffers.pop(emitted).getvalue())
+                        emitted += 1
+        finally:
+            sys.stdout = output.stream
+            # Tras un error, los pasos terminados detrás de uno que no llegó a lanzarse
+            for index in sorted(index for index in buffers if index in done):
+                output.stream.write(buffers[index].getvalue())
+        if error is not None:
+            raise error
@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_android_architecture import add_architecture_to_existing_project
+from gradle_parser import GradleBuildFile
+from manifest_editor import AndroidManifest
+from project_inspector import inspect_project
+from template_registry import get_registry
+from tracing import traced
+from viewbinding_migration import binding_class_name
+from workspace import open_workspace
+
+FEATURE_NAME_PATTERN = re.compile(r"^[A-Z][A-Za-z0-9]*$")
+# Features por proceso a partir de las que compensa repartir el renderizado
+PARALLEL_THRESHOLD = 500
+
+def normalize_feature_name(raw):
+    """
+    Convierte `user profile`, `user-profile`, `user_profile` o `userProfile` en `UserProfile`.
+
+    Raises:
+        ValueError: Si el resultado no es un nombre de clase Kotlin válido.
+    """
+    parts = [part for part in re.split(r"[^A-Za-z0-9]+", str(raw).strip()) if part]
+    name = "".join(part[:1].upper() + part[1:] for part in parts)
+    if not FEATURE_NAME_PATTERN.match(name):
+        raise ValueError(f"Nombre de feature no válido: {raw!r}")
+    return name
+
+def to_snake_case(name):
+    """`UserProfile` -> `user_profile`."""
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_", name).lower()
+
+def load_feature_spec(spec_path):
+    """
+    Lee un fichero de features (JSON, o YAML si PyYAML está instalado).
+
+    El fichero puede ser una lista de nombres (o de objetos con `name`) o un objeto con
+    `features` y, opcionalmente, `architecture`, `compose`, `module` y `package_name`.
+
+    Returns:
+        tuple: (lista de nombres, dict de opciones)
+    """
+    with open(spec_path, "r", encoding="utf-8") as file:
+        content = file.read()
+
+    if spec_path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Para leer especificaciones YAML es necesario instalar PyYAML.")
+        spec = yaml.safe_load(content)
+    else:
+        spec = json.loads(content)
+
+    if isinstance(spec, list):
+        spec = {"features": spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get("features"), list):
+        raise ValueError("La especificación debe contener una lista 'features'.")
+    names = [entry["name"] if isinstance(entry, dict) else entry for entry in spec["features"]]
+    options = {key: spec[key] for key in ("architecture", "compose", "module", "package_name") if key in spec}
+    return names, options
+
+def _render_features(architecture, package_name, use_compose, names):
+    """Renderiza un lote de features. Se ejecuta en el proceso actual o en uno del pool."""
+    registry = get_registry()
+    rendered = []
+    for name in names:
+        layout = f"activity_{to_snake_case(name)}"
+        sources, resources = registry.render_feature(architecture, package_name, use_compose, name,
+                                                     layout, binding_class_name(layout))
+        rendered.append((name, sources, resources))
+    return rendered
+
+def render_features(architecture, package_name, use_compose, names, max_workers=None):
+    """
+    Renderiza todas las features, repartiéndolas entre procesos cuando son muchas.
+
+    Returns:
+        list: (nombre, ficheros de código, ficheros de recursos) en el orden de `names`.
+    """
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(names) // PARALLEL_THRESHOLD or 1))
+    if workers == 1:
+        return _render_features(architecture, package_name, use_compose, names)
+
+    size = -(-len(names) // workers)
+    chunks = [names[index:index + size] for index in range(0, len(names), size)]
+    rendered = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_render_features, architecture, package_name, use_compose, chunk) for chunk in chunks]
+        for future in futures:
+            rendered.extend(future.result())
+    return rendered
+
+@traced
+def generate_features(project_path, names, architecture=None, use_compose=False, package_name=None,
+                      module="app", workspace=None, max_workers=None):
+    """
+    Genera una pantalla completa por cada feature con la estructura de la arquitectura.
+
+    Por cada nombre se crean la vista (Activity XML con su layout, o Activity + pantalla
+    Compose), el ViewModel/Presenter/Intent+State, la interfaz y la implementación del
+    repositorio, y se registra la Activity en el manifiesto del módulo. Si el módulo aún
+    no tiene arquitectura se configura antes, y con vistas XML se activa `viewBinding`.
+    Los ficheros que ya existen no se tocan y todo se escribe en un único commit del
+    workspace.
+
+    Args:
+        names (iterable): Nombres de las features (se normalizan a PascalCase).
+        architecture (str | None): MVP, MVVM o MVI. Si es None se usa la detectada.
+        package_name (str | None): Paquete base. Si es None se usa el detectado.
+
+    Returns:
+        dict: `features`, `written` (ficheros nuevos), `existing` (ya existían) y `activities`.
+
+    Raises:
+        ValueError: Si el proyecto, el paquete o la arquitectura no son válidos.
+    """
+    start = time.perf_counter()
+    features = list(dict.fromkeys(normalize_feature_name(name) for name in names))
+    if not features:
+        raise ValueError("No se indicó ninguna feature.")
+
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        raise ValueError("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+    module_info = model.module(module)
+    if module_info is None:
+        raise ValueError(f"No se encontró el módulo {module} en settings.gradle.")
+    package_name = package_name or module_info["package"]
+    if not package_name:
+        raise ValueError(f"No se pudo detectar el paquete base del módulo {module}. Indícalo de forma explícita.")
+
+    detected = module_info["architecture"] if package_name == module_info["package"] else None
+    architecture = (architecture or detected or "").upper()
+    if not architecture:
+        raise ValueError("No se detectó ninguna arquitectura en el módulo; indica cuál usar.")
+    if detected and detected != architecture:
+        raise ValueError(f"El módulo usa {detected}; no se pueden generar features {architecture}.")
+
+    rendered = render_features(architecture, package_name, use_compose, features, max_workers)
+
+    summary = {"features": len(features), "written": 0, "existing": 0, "activities": 0}
+    with open_workspace(workspace) as workspace:
+        if not detected and not add_architecture_to_existing_project(
+            model.path, architecture, use_compose, package_name, permissions=[], replace_existing=False,
+            module=module_info["directory"], workspace=workspace,
+        ):
+            raise ValueError("No se pudo configurar la arquitectura del módulo.")
+
+        source_path, _ = model.locate_package(module_info["name"], package_name)
+        resources_path = os.path.join(module_info["path"], "src", "main", "res")
+        activities = []
+        for name, sources, resources in rendered:
+            files = [(source_path, sources), (resources_path, resources)]
+            for base_path, contents in files:
+                for relative_path, content in contents.items():
+                    path = os.path.join(base_path, *relative_path.split("/"))
+                    if workspace.exists(path):
+                        summary["existing"] += 1
+                        continue
+                    workspace.write(path, content)
+                    summary["written"] += 1
+            activities.append((f"{package_name}.view.{name}Activity", False))
+
+        manifest_path = module_info["manifest"] or os.path.join(module_info["path"], "src", "main", "AndroidManifest.xml")
+        if workspace.exists(manifest_path):
+            manifest = AndroidManifest(workspace.read(manifest_path), package_name)
+            summary["activities"] = len(manifest.add_activities(activities))
+            if manifest.changed:
+                workspace.write(manifest_path, manifest.to_text())
+        else:
+            print(f"No se encontró el manifiesto {manifest_path}; las actividades no se registraron.")
+
+        build_file = module_info["build_file"]
+        if not use_compose and architecture != "MVI" and build_file:
+            # Las Activity XML inflan su layout con la clase de View Binding
+            gradle_file = GradleBuildFile.for_path(build_file, workspace.read(build_file))
+            if gradle_file.set_property(("android", "buildFeatures"), "viewBinding", "true"):
+                workspace.write(build_file, gradle_file.to_text())
+                print(f"viewBinding activado en {build_file}.")
+
+    print(f"Features generadas: {summary['features']} ({summary['written']} ficheros nuevos, "
+          f"{summary['existing']} ya existían, {summary['activities']} actividades añadidas al manifiesto) "
+          f"en {time.perf_counter() - start:.2f}s.")
+    return summary
@@ -1,6 +1,14 @@
 import os
 import re
-import shutil
+
+from architecture_migration import describe_migration, migrate_architecture, package_from_path
+from gradle_parser import GradleBuildFile
+from manifest_editor import PERMISSION_PREFIX, AndroidManifest
+from project_inspector import detect_architecture
+from template_registry import SPLASH_TEMPLATE, get_registry
+from tracing import traced
+from viewbinding_migration import KOTLIN_ANDROID_EXTENSIONS_IDS, migrate_to_view_binding
+from workspace import open_workspace
 
 def get_architecture_choice():
     print("\nSelecciona la arquitectura que deseas usar:")
@@ -12,268 +20,249 @@ def get_architecture_choice():
     architectures = {"1": "MVP", "2": "MVVM", "3": "MVI"}
     return architectures.get(choice)
 
-def add_architecture_to_existing_project(project_path, architecture, use_compose, package_name):
+@traced
+def add_architecture_to_existing_project(project_path, architecture, use_compose, package_name,
+                                         permissions=None, replace_existing=None, module="app", workspace=None,
+                                         tune_properties=True, startup_profiling=False):
     """
     Añade la arquitectura deseada a un proyecto Android ya existente.
-    """
-    project_path = os.path.abspath(project_path)
 
-    if not os.path.exists(project_path):
-        print(f"El directorio {project_path} no existe. Por favor, verifica la ruta.")
-        return
-
-    # Validar si es un proyecto Android (buscar settings.gradle o settings.gradle.kts)
-    if not os.path.exists(os.path.join(project_path, "settings.gradle")) and not os.path.exists(os.path.join(project_path, "settings.gradle.kts")):
-        print("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
-        return
+    Primero se decide el plan completo (ver `execution_plan.plan_architecture`) y después
+    se ejecuta: la estructura, el manifiesto y la migración a View Binding se aplican a la
+    vez cuando no tocan los mismos ficheros.
 
-    package_path = os.path.join(*package_name.split('.'))
-    src_main_path = os.path.join(project_path, "app", "src", "main", "java", package_path)
+    Args:
+        package_name (str | None): Paquete base. Si es None se usa el detectado en el
+            módulo (namespace, manifiesto, applicationId o estructura de carpetas).
+        module (str): Directorio del módulo Gradle relativo al proyecto (por defecto `app`).
+        permissions (iterable | None): Permisos a añadir al manifiesto. Si es None se
+            preguntan de forma interactiva.
+        replace_existing (bool | None): Si se detecta otra arquitectura, indica si se
+            reemplaza. Si es None se pregunta al usuario.
+        workspace (Workspace | None): Workspace compartido. Si es None, todos los cambios
+            se escriben juntos al terminar.
+        tune_properties (bool): Ajusta también gradle.properties al equipo. Quien configura
+            varios módulos lo hace una sola vez para todo el proyecto.
+        startup_profiling (bool): Añade los módulos de Baseline Profile y Macrobenchmark
+            para la app (ver `startup_profiling.add_startup_profiling`).
 
-    if not os.path.exists(src_main_path):
-        print(f"El paquete base {src_main_path} no existe. Por favor, verifica el nombre del paquete.")
-        return
-    
-    # Comprobar si ya existe una arquitectura y manejar el cambio si es necesario
-    if check_existing_architecture(src_main_path, architecture):
-        return
+    Returns:
+        bool: False si el proyecto no es válido, True en caso contrario.
+    """
+    # Import diferido: execution_plan usa los pasos de este módulo
+    from execution_plan import execute_plan, plan_architecture
+
+    plan = plan_architecture(project_path, architecture, use_compose, package_name, permissions, replace_existing, module,
+                             tune_properties=tune_properties, startup_profiling=startup_profiling)
+    if plan is None:
+        return False
+    if not plan.steps:
+        return True
+    execute_plan(plan, workspace)
+    print(f"Arquitectura {architecture} añadida correctamente al módulo {module} del proyecto en {plan.project_path}.")
+    return True
 
-    # Crear la nueva estructura de arquitectura
-    create_architecture_structure(src_main_path, architecture, package_name, use_compose)
-    add_to_manifest(project_path, package_name)
-    print(f"Arquitectura {architecture} añadida correctamente al proyecto en {project_path}.")
+def resolve_architecture_change(base_path, architecture, replace_existing=None, existing_folders=None):
+    """
+    Decide qué hacer con la arquitectura que ya hay en `base_path`, sin modificar nada.
 
-    # Crear estructura según la arquitectura
-    """if architecture in ["MVP", "MVVM", "MVI"]:
-        create_architecture_structure(src_main_path, architecture, package_name, use_compose)
-        add_to_manifest(project_path, package_name)
-    else:
-        print("Arquitectura no válida. Por favor, selecciona MVP, MVVM o MVI.")
-        return
+    Args:
+        replace_existing (bool | None): Respuesta a la confirmación de migrar la arquitectura
+            existente. Si es None se pregunta al usuario.
+        existing_folders (iterable | None): Subcarpetas ya conocidas de `base_path` (p. ej.
+            del modelo del proyecto). Si es None se lista el directorio.
 
-    print(f"Arquitectura {architecture} añadida correctamente al proyecto en {project_path}.") """
-    # Llama a la función para eliminar kotlin-android-extensions
-    remove_kotlin_android_extensions(project_path)
+    Returns:
+        tuple: (arquitectura existente o None, acción), donde la acción es `create` (no hay
+        otra arquitectura), `migrate` o `keep` (ya está configurada o no se quiere migrar).
+    """
+    if existing_folders is None:
+        try:
+            existing_folders = [entry.name for entry in os.scandir(base_path) if entry.is_dir()]
+        except OSError:
+            existing_folders = []
+    existing_architecture = detect_architecture(set(existing_folders))
 
-def check_existing_architecture(base_path, architecture):
+    if existing_architecture == architecture:
+        print(f"La arquitectura {architecture} ya está configurada. No se realizaron cambios.")
+        return existing_architecture, "keep"
+    if not existing_architecture:
+        return None, "create"
+
+    print(f"Se detectó una arquitectura diferente ({existing_architecture}).")
+    print("El código existente se moverá a las capas de la nueva arquitectura:")
+    for line in describe_migration(existing_architecture, architecture):
+        print(line)
+    if replace_existing is None:
+        confirm = input(f"¿Deseas migrar la arquitectura actual ({existing_architecture}) a {architecture}? (s/n): ").strip().lower()
+        replace_existing = confirm == "s"
+    if not replace_existing:
+        print("No se realizaron cambios en la arquitectura.")
+        return existing_architecture, "keep"
+    return existing_architecture, "migrate"
+
+@traced
+def check_existing_architecture(base_path, architecture, replace_existing=None, workspace=None, existing_folders=None,
+                                package_name=None):
     """
-    Verifica si ya existe una arquitectura en el proyecto.
+    Verifica si ya existe una arquitectura en el proyecto y, si es otra y se confirma, la migra.
 
     Args:
         base_path (str): Ruta base donde se crean las carpetas de la arquitectura.
         architecture (str): Arquitectura actual seleccionada.
+        replace_existing (bool | None): Respuesta a la confirmación de migrar la arquitectura
+            existente. Si es None se pregunta al usuario.
+        existing_folders (iterable | None): Subcarpetas ya conocidas de `base_path` (p. ej.
+            del modelo del proyecto). Si es None se lista el directorio.
+        package_name (str | None): Paquete de `base_path`. Si es None se deduce de la ruta.
 
     Returns:
         bool: True si las carpetas de la arquitectura seleccionada ya existen, False en caso contrario.
     """
-    architectures = {
-        "MVP": ["presenter", "view", "model", "repository"],
-        "MVVM": ["viewmodel", "repository", "model", "view"],
-        "MVI": ["intent", "view", "state", "model", "repository"],
-    }
-
-    existing_architecture = None
-    for arch, folders in architectures.items():
-        if all(os.path.exists(os.path.join(base_path, folder)) for folder in folders):
-            existing_architecture = arch
-            break
-
-    if existing_architecture == architecture:
-        print(f"La arquitectura {architecture} ya está configurada. No se realizaron cambios.")
-        return True
-    elif existing_architecture:
-        print(f"Se detectó una arquitectura diferente ({existing_architecture}).")
-        print("Se eliminarán las siguientes carpetas:")
-        for folder in architectures[existing_architecture]:
-            folder_path = os.path.join(base_path, folder)
-            if os.path.exists(folder_path):
-                print(f"- {folder_path}")
-
-        confirm = input(f"¿Deseas eliminar la arquitectura actual ({existing_architecture}) y configurar {architecture}? (s/n): ").strip().lower()
-        if confirm == "s":
-            print(f"Eliminando la arquitectura {existing_architecture}...")
-            for folder in architectures[existing_architecture]:
-                folder_path = os.path.join(base_path, folder)
-                if os.path.exists(folder_path):
-                    shutil.rmtree(folder_path)
-                    print(f"Carpeta eliminada: {folder_path}")
-        else:
-            print("No se realizaron cambios en la arquitectura.")
-            return True
-    return False
-
-def create_architecture_structure(base_path, architecture, package_name, use_compose):
+    existing_architecture, action = resolve_architecture_change(base_path, architecture, replace_existing,
+                                                                existing_folders)
+    if action == "migrate":
+        print(f"Migrando la arquitectura {existing_architecture} a {architecture}...")
+        migrate_architecture(base_path, package_name or package_from_path(base_path),
+                             existing_architecture, architecture, workspace)
+    return action == "keep"
+
+@traced
+def create_architecture_structure(base_path, architecture, package_name, use_compose, workspace=None):
     """
     Crea la estructura de carpetas y las clases base para la arquitectura especificada.
     """
-    if architecture == "MVP":
-        paths = ["presenter", "view", "model", "repository"]
-    elif architecture == "MVVM":
-        paths = ["viewmodel", "repository", "model", "view"]
-    elif architecture == "MVI":
-        paths = ["intent", "view", "state", "model", "repository"]
-
-    for folder in paths:
-        full_path = os.path.join(base_path, folder)
-        os.makedirs(full_path, exist_ok=True)
-        print(f"Carpeta creada: {full_path}")
+    with open_workspace(workspace) as workspace:
+        if architecture == "MVP":
+            paths = ["presenter", "view", "model", "repository"]
+        elif architecture == "MVVM":
+            paths = ["viewmodel", "repository", "model", "view"]
+        elif architecture == "MVI":
+            paths = ["intent", "view", "state", "model", "repository"]
+
+        for folder in paths:
+            full_path = os.path.join(base_path, folder)
+            workspace.makedirs(full_path)
+            print(f"Carpeta creada: {full_path}")
     
-    create_base_classes(base_path, architecture, package_name, use_compose)
-    create_splash_class(base_path, package_name)
+        create_base_classes(base_path, architecture, package_name, use_compose, workspace)
+        create_splash_class(base_path, package_name, workspace)
 
-def create_base_classes(base_path, architecture, package_name, use_compose):
+def create_base_classes(base_path, architecture, package_name, use_compose, workspace=None):
     """
     Crea las clases base y adicionales según la arquitectura elegida.
     """
-    if architecture == "MVP":
-        create_mvp_classes(base_path, package_name)
-    elif architecture == "MVVM":
-        create_mvvm_classes(base_path, package_name, use_compose)
-    elif architecture == "MVI":
-        create_mvi_classes(base_path, package_name)
-
-def create_mvp_classes(base_path, package_name):
+    with open_workspace(workspace) as workspace:
+        if architecture == "MVP":
+            create_mvp_classes(base_path, package_name, workspace)
+        elif architecture == "MVVM":
+            create_mvvm_classes(base_path, package_name, use_compose, workspace)
+        elif architecture == "MVI":
+            create_mvi_classes(base_path, package_name, workspace)
+
+def write_generated_files(base_path, files, workspace=None):
+    """
+    Escribe los ficheros renderizados por el registro de plantillas.
+
+    Args:
+        files (dict): Ruta relativa a `base_path` -> contenido.
+    """
+    with open_workspace(workspace) as workspace:
+        for relative_path, content in files.items():
+            path = os.path.join(base_path, *relative_path.split("/"))
+            if workspace.exists(path):
+                # No se sobrescribe código existente (p. ej. el que trae una migración)
+                print(f"La clase ya existe, se conserva: {path}")
+                continue
+            workspace.write(path, content)
+            print(f"Clase creada: {path}")
+
+def create_mvp_classes(base_path, package_name, workspace=None):
     """
     Crea las clases base y adicionales para la arquitectura MVP.
     """
-    presenter_path = os.path.join(base_path, "presenter", "BasePresenter.kt")
-    with open(presenter_path, "w", encoding="utf-8") as file:
-        file.write(
-            f"""package {package_name}.presenter\n\n
-            interface BasePresenter {{\n    fun start()\n}}\n""")
-    print(f"Clase creada: {presenter_path}")
-
-    model_path = os.path.join(base_path, "model", "BaseModel.kt")
-    with open(model_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.model\n\ninterface BaseModel {{\n    fun getData(): String\n}}\n""")
-    print(f"Clase creada: {model_path}")
-
-    repository_path = os.path.join(base_path, "repository", "BaseRepository.kt")
-    with open(repository_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.repository\n\ninterface BaseRepository {{\n    fun fetchData(): String\n}}\n""")
-    print(f"Clase creada: {repository_path}")
-
-def create_mvvm_classes(base_path, package_name, use_compose):
+    files = get_registry().render_architecture("MVP", package_name, False, include_splash=False)
+    write_generated_files(base_path, files, workspace)
+
+def create_mvvm_classes(base_path, package_name, use_compose, workspace=None):
     """
     Crea las clases base y adicionales para la arquitectura MVVM.
     """
-    viewmodel_path = os.path.join(base_path, "viewmodel", "BaseViewModel.kt")
-    with open(viewmodel_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.viewmodel\n\nimport androidx.lifecycle.ViewModel\n\nopen class BaseViewModel : ViewModel() {{\n    // Configuración base\n}}\n""")
-    print(f"Clase creada: {viewmodel_path}")
-
-    model_path = os.path.join(base_path, "model", "BaseModel.kt")
-    with open(model_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.model\n\ninterface BaseModel {{\n    fun getData(): String\n}}\n""")
-    print(f"Clase creada: {model_path}")
-
-    repository_path = os.path.join(base_path, "repository", "BaseRepository.kt")
-    with open(repository_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.repository\n\ninterface BaseRepository {{\n    fun fetchData(): String\n}}\n""")
-    print(f"Clase creada: {repository_path}")
-
-    view_path = os.path.join(base_path, "view", "BaseView.kt")
-    if use_compose:
-        with open(view_path, "w", encoding="utf-8") as file:
-            file.write(f"""package {package_name}.view\n\nimport androidx.compose.runtime.Composable\n\n@Composable\nfun BaseView() {{\n    // Implementación de la vista con Jetpack Compose\n}}\n""")
-    else:
-        with open(view_path, "w", encoding="utf-8") as file:
-            file.write(f"""package {package_name}.view\n\nimport android.os.Bundle\nimport androidx.appcompat.app.AppCompatActivity\n\nclass BaseView : AppCompatActivity() {{\n    override fun onCreate(savedInstanceState: Bundle?) {{\n        super.onCreate(savedInstanceState)\n        setContentView(R.layout.activity_example)\n    }}\n}}\n""")
-    print(f"Clase creada: {view_path}")
+    files = get_registry().render_architecture("MVVM", package_name, use_compose, include_splash=False)
+    write_generated_files(base_path, files, workspace)
 
-def create_mvi_classes(base_path, package_name):
+def create_mvi_classes(base_path, package_name, workspace=None):
     """
     Crea las clases base y adicionales para la arquitectura MVI.
     """
-    model_path = os.path.join(base_path, "model", "BaseModel.kt")
-    with open(model_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.model\n\ninterface BaseModel {{\n    fun getData(): String\n}}\n""")
-    print(f"Clase creada: {model_path}")
-
-    view_path = os.path.join(base_path, "view", "BaseView.kt")
-    with open(view_path, "w", encoding="utf-8") as file:
-            file.write(f"""package {package_name}.view\n\nimport androidx.compose.runtime.Composable\n\n@Composable\nfun BaseView() {{\n    // Implementación de la vista con Jetpack Compose\n}}\n""")
-
-    repository_path = os.path.join(base_path, "repository", "BaseRepository.kt")
-    with open(repository_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.repository\n\ninterface BaseRepository {{\n    fun fetchData(): String\n}}\n""")
-    print(f"Clase creada: {repository_path}")
-
-    intent_path = os.path.join(base_path, "intent", "BaseIntent.kt")
-    with open(intent_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.intent\n\ninterface BaseIntent\n""")
-    print(f"Clase creada: {intent_path}")
-
-def create_splash_class(base_path, package_name):
+    files = get_registry().render_architecture("MVI", package_name, True, include_splash=False)
+    write_generated_files(base_path, files, workspace)
+
+def create_splash_class(base_path, package_name, workspace=None):
     """
     Crea una clase SplashActivity.
     """
-    splash_path = os.path.join(base_path, "view", "SplashActivity.kt")
-    with open(splash_path, "w", encoding="utf-8") as file:
-        file.write(f"""package {package_name}.view\n\nimport android.os.Bundle\nimport androidx.appcompat.app.ComponentActivity\n\nclass SplashActivity : ComponentActivity() {{\n    override fun onCreate(savedInstanceState: Bundle?) {{\n        super.onCreate(savedInstanceState)\n        setContentView(R.layout.activity_splash)\n    }}\n}}\n""")
-    print(f"Clase creada: {splash_path}")
+    files = get_registry().render_tree([SPLASH_TEMPLATE], package=package_name)
+    write_generated_files(base_path, files, workspace)
 
-def add_to_manifest(project_path, package_name):
+@traced
+def add_to_manifest(project_path, package_name, permissions=None, module="app", workspace=None):
     """
-    Añade las actividades al AndroidManifest.xml.
+    Añade las actividades al AndroidManifest.xml del módulo indicado.
     """
-    manifest_path = os.path.join(project_path, "app", "src", "main", "AndroidManifest.xml")
-    if not os.path.exists(manifest_path):
+    with open_workspace(workspace) as workspace:
+        _add_to_manifest(project_path, package_name, permissions, module, workspace)
+
+def _add_to_manifest(project_path, package_name, permissions, module, workspace):
+    manifest_path = os.path.join(project_path, module, "src", "main", "AndroidManifest.xml")
+    if not workspace.exists(manifest_path):
         print(f"AndroidManifest.xml no encontrado en {manifest_path}.")
         return
 
-    with open(manifest_path, "r", encoding="utf-8") as file:
-        content = file.read()
-
-    # Actividad correctamente formateada
-    splash_activity = f"""<activity android:name="{package_name}.view.SplashActivity" android:exported="true"/>"""
-
-    # Lista de actividades (en este caso solo una)
-    activities = [splash_activity]
-
-    for activity in activities:
-         # Verificar si la actividad ya está configurada (asegurarse de que `activity` sea una cadena)
-        if activity in content:
-            print(f"✔️ La actividad ya está configurada en el AndroidManifest.xml.")
-            continue
-
-        # Añadir la nueva actividad antes de la etiqueta </application>
-        if "</application>" in content:
-            content = content.replace(
-                "</application>",
-                f"    {activity}\n</application>"
-            )
-
-    with open(manifest_path, "w", encoding="utf-8") as file:
-        file.write(content)
-
-    print("Actividades añadidas al AndroidManifest.xml.")
-    add_permissions_to_manifest(manifest_path)
-
-def add_permissions_to_manifest(manifest_path):
-    """Permite al usuario seleccionar permisos para añadir al AndroidManifest.xml."""
-    manifest_path = os.path.abspath(manifest_path)
-    permissions = {
-        "1": ("INTERNET", "Acceso a internet"),
-        "2": ("ACCESS_FINE_LOCATION", "Acceso a la ubicación precisa"),
-        "3": ("ACCESS_COARSE_LOCATION", "Acceso a la ubicación aproximada"),
-        "4": ("CAMERA", "Acceso a la cámara"),
-        "5": ("WRITE_EXTERNAL_STORAGE", "Escribir en almacenamiento externo"),
-        "6": ("READ_EXTERNAL_STORAGE", "Leer desde almacenamiento externo"),
-        "7": ("RECORD_AUDIO", "Grabar audio"),
-        "8": ("BLUETOOTH", "Acceso a Bluetooth"),
-        "9": ("BLUETOOTH_ADMIN", "Administrar Bluetooth"),
-        "10": ("VIBRATE", "Control de vibración"),
-        "11": ("ACCESS_NETWORK_STATE", "Verificar si el dispositivo tiene conexión a internet"),
-        "12": ("ACCESS_WIFI_STATE", "Para apps que necesiten información sobre el Wi-Fi"),
-        "13": ("READ_PHONE_STATE", "Acceso a información del dispositivo, como el número de teléfono o la red actual."),
-        "14": ("CALL_PHONE", "Permitir realizar llamadas directamente desde la app"),
-        "15": ("BODY_SENSORS", "Apps que usen dispositivos de fitness o sensores biométricos"),
-        "16": ("ACTIVITY_RECOGNITION", "Apps que rastrean movimiento, como podómetros o aplicaciones de fitness."),
-    }
-
+    activities = [(f"{package_name}.view.SplashActivity", True)]
+    try:
+        manifest = AndroidManifest(workspace.read(manifest_path), package_name)
+        added = manifest.add_activities(activities)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if added:
+        workspace.write(manifest_path, manifest.to_text())
+        print("Actividades añadidas al AndroidManifest.xml.")
+    else:
+        print("✔️ La actividad ya está configurada en el AndroidManifest.xml.")
+    add_permissions_to_manifest(manifest_path, permissions, workspace)
+
+PERMISSIONS = {
+    "1": ("INTERNET", "Acceso a internet"),
+    "2": ("ACCESS_FINE_LOCATION", "Acceso a la ubicación precisa"),
+    "3": ("ACCESS_COARSE_LOCATION", "Acceso a la ubicación aproximada"),
+    "4": ("CAMERA", "Acceso a la cámara"),
+    "5": ("WRITE_EXTERNAL_STORAGE", "Escribir en almacenamiento externo"),
+    "6": ("READ_EXTERNAL_STORAGE", "Leer desde almacenamiento externo"),
+    "7": ("RECORD_AUDIO", "Grabar audio"),
+    "8": ("BLUETOOTH", "Acceso a Bluetooth"),
+    "9": ("BLUETOOTH_ADMIN", "Administrar Bluetooth"),
+    "10": ("VIBRATE", "Control de vibración"),
+    "11": ("ACCESS_NETWORK_STATE", "Verificar si el dispositivo tiene conexión a internet"),
+    "12": ("ACCESS_WIFI_STATE", "Para apps que necesiten información sobre el Wi-Fi"),
+    "13": ("READ_PHONE_STATE", "Acceso a información del dispositivo, como el número de teléfono o la red actual."),
+    "14": ("CALL_PHONE", "Permitir realizar llamadas directamente desde la app"),
+    "15": ("BODY_SENSORS", "Apps que usen dispositivos de fitness o sensores biométricos"),
+    "16": ("ACTIVITY_RECOGNITION", "Apps que rastrean movimiento, como podómetros o aplicaciones de fitness."),
+}
+
+# Features de hardware que se declaran (como opcionales) junto a cada permiso
+PERMISSION_FEATURES = {
+    "CAMERA": "android.hardware.camera",
+    "RECORD_AUDIO": "android.hardware.microphone",
+    "BODY_SENSORS": "android.hardware.sensor.body",
+}
+
+def select_permissions():
+    """Muestra el menú de permisos y devuelve los seleccionados por el usuario."""
     print("Selecciona los permisos que necesita tu aplicación:")
-    for key, (permission, description) in permissions.items():
+    for key, (permission, description) in PERMISSIONS.items():
         print(f"{key}: {description} ({permission})")
     print("0: Finalizar selección")
 
@@ -282,56 +271,75 @@ def add_permissions_to_manifest(manifest_path):
         choice = input("Ingresa el número correspondiente o 0 para finalizar: ").strip()
         if choice == "0":
             break
-        if choice in permissions:
-            selected_permissions.add(permissions[choice][0])
-            if permissions[choice][0] == "INTERNET":
-                selected_permissions.add("ACCESS_FINE_LOCATION")
-                selected_permissions.add("ACCESS_COARSE_LOCATION")
+        if choice in PERMISSIONS:
+            selected_permissions.add(PERMISSIONS[choice][0])
         else:
             print("Opción no válida. Inténtalo de nuevo.")
+    return selected_permissions
+
+def normalize_permissions(permissions):
+    """
+    Normaliza una lista de permisos (nombre, número del menú o nombre completo
+    `android.permission.X`) y añade los permisos que dependen de ellos.
+
+    Raises:
+        ValueError: Si algún permiso no está en el listado soportado.
+    """
+    known = {permission for permission, _ in PERMISSIONS.values()}
+    selected_permissions = set()
+    for permission in permissions:
+        permission = str(permission).strip()
+        if permission in PERMISSIONS:
+            permission = PERMISSIONS[permission][0]
+        permission = permission.replace("android.permission.", "").upper()
+        if permission not in known:
+            raise ValueError(f"Permiso no soportado: {permission}")
+        selected_permissions.add(permission)
+
+    if "INTERNET" in selected_permissions:
+        selected_permissions.add("ACCESS_FINE_LOCATION")
+        selected_permissions.add("ACCESS_COARSE_LOCATION")
+    return selected_permissions
+
+@traced
+def add_permissions_to_manifest(manifest_path, permissions=None, workspace=None):
+    """
+    Añade permisos al AndroidManifest.xml. Si no se indican `permissions`, permite al
+    usuario seleccionarlos de forma interactiva.
+    """
+    manifest_path = os.path.abspath(manifest_path)
+    if permissions is None:
+        permissions = select_permissions()
+    selected_permissions = normalize_permissions(permissions)
+    with open_workspace(workspace) as workspace:
+        _add_permissions_to_manifest(manifest_path, selected_permissions, workspace)
+
+def _add_permissions_to_manifest(manifest_path, selected_permissions, workspace):
 
     if not selected_permissions:
         print("No se añadieron permisos al manifiesto.")
         return
 
-    # Leer el archivo AndroidManifest.xml
     try:
-        with open(manifest_path, "r", encoding="utf-8") as manifest_file:
-            manifest_content = manifest_file.read()
+        manifest = AndroidManifest(workspace.read(manifest_path))
     except FileNotFoundError:
         print(f"Error: No se encontró el archivo {manifest_path}.")
         return
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if manifest.application is None:
+        print("Error: El archivo AndroidManifest.xml no tiene la etiqueta <application>")
+        return
+
+    # Solo se añaden los permisos y features que no existan ya
+    selected_permissions = sorted(selected_permissions)
+    added = manifest.add_permissions(selected_permissions)
+    manifest.add_features(
+        [PERMISSION_FEATURES[perm] for perm in selected_permissions if perm in PERMISSION_FEATURES],
+        required=False,
+    )
 
-   # Insertar los permisos seleccionados antes del tag <application>
-    existing_permissions = set()
-    for line in manifest_content.splitlines():
-        if "<uses-permission android:name=" in line:
-            start = line.find('"') + 1
-            end = line.rfind('"')
-            existing_permissions.add(line[start:end].replace("android.permission.", ""))
-
-
-     # Añadir solo los permisos que no existan ya
-    new_permissions = [
-    f'<uses-permission android:name="android.permission.{perm}" />'
-        for perm in selected_permissions
-        if perm not in existing_permissions
-    ]
-
-    # Añadir dependencias específicas
-    features_block = ""
-    if "CAMERA" in selected_permissions:
-        camera_feature = '<uses-feature android:name="android.hardware.camera" android:required="false" />'
-        if camera_feature not in manifest_content:
-            new_permissions.append(camera_feature)
-    if "RECORD_AUDIO" in selected_permissions:
-        features_block += (
-            '<uses-feature android:name="android.hardware.microphone" android:required="false" />\n'
-        )
-    if "BODY_SENSORS" in selected_permissions:
-        features_block += (
-            '<uses-feature android:name="android.hardware.sensor.body" android:required="false" />\n'
-        )
     if "WRITE_EXTERNAL_STORAGE" in selected_permissions:
         print(
             "Nota: WRITE_EXTERNAL_STORAGE está limitado en Android 10 y versiones superiores. Considere usar Scoped Storage."
@@ -341,49 +349,31 @@ def add_permissions_to_manifest(manifest_path):
             "ACTIVITY_RECOGNITION requiere permisos especiales en Android para su uso en segundo plano."
         )
 
-    # Añadir permisos al manifiesto
-    if new_permissions:
-        permissions_block = "\n".join(new_permissions)
-        if "<application" in manifest_content:
-            manifest_content = manifest_content.replace(
-                "<application",
-                f"{permissions_block}\n\n    <application"
-            )
-        else:
-            print("Error: El archivo AndroidManifest.xml no tiene la etiqueta <application>")
-            return
-        # Guardar el archivo actualizado
-        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
-            manifest_file.write(manifest_content)
-
-        print(f"Permisos añadidos correctamente: {', '.join(selected_permissions)}")
+    if manifest.changed:
+        workspace.write(manifest_path, manifest.to_text())
+    if added:
+        print(f"Permisos añadidos correctamente: {', '.join(name.replace(PERMISSION_PREFIX, '') for name in added)}")
     else:
         print("Todos los permisos seleccionados ya existen en el manifiesto.")
 
-
-def remove_kotlin_android_extensions(app_path):
+@traced
+def remove_kotlin_android_extensions(project_path, module="app", workspace=None):
     """
-    Elimina el plugin kotlin-android-extensions del archivo build.gradle.kts del módulo app.
+    Elimina el plugin kotlin-android-extensions del build.gradle(.kts) del módulo y, si
+    estaba aplicado, migra sus imports sintéticos a View Binding.
     """
-    build_gradle_path = os.path.join(app_path, "build.gradle.kts")
-    
+    module_path = os.path.join(project_path, module)
+    build_gradle_path = next((os.path.join(module_path, name) for name in ("build.gradle.kts", "build.gradle")
+                              if os.path.exists(os.path.join(module_path, name))), None)
+    if build_gradle_path is None:
+        print(f"No se encontró el archivo build.gradle(.kts) en {module_path}.")
+        return
+
     try:
-        if os.path.exists(build_gradle_path):
-            with open(build_gradle_path, "r") as file:
-                lines = file.readlines()
-            
-            # Filtra las líneas que contienen kotlin-android-extensions
-            updated_lines = [
-                line for line in lines 
-                if "kotlin(\"android.extensions\")" not in line and "kotlin-android-extensions" not in line
-            ]
-            
-            # Sobrescribe el archivo sin las líneas obsoletas
-            with open(build_gradle_path, "w") as file:
-                file.writelines(updated_lines)
-            
-        else:
-            print(f"No se encontró el archivo {build_gradle_path}.")
+        with open_workspace(workspace) as workspace:
+            gradle_file = GradleBuildFile.for_path(build_gradle_path, workspace.read(build_gradle_path))
+            if any(gradle_file.has_plugin(plugin_id) for plugin_id in KOTLIN_ANDROID_EXTENSIONS_IDS):
+                migrate_to_view_binding(project_path, [module], workspace)
     except Exception as e:
         print(f"Error eliminando 'kotlin-android-extensions': {e}")
 
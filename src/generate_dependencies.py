@@ -1,7 +1,75 @@
 import os
 import re
 
-def get_dependencies(dependencies, project_path):
+from dependency_catalog import load_catalog
+from dependency_rules import Dependency, apply_fixes, load_rules
+from gradle_parser import GradleBuildFile
+from tracing import traced
+from version_resolver import version_key
+from version_catalog import VersionCatalog, alias_to_accessor
+from workspace import open_workspace
+
+KSP_PLUGIN_ID = "com.google.devtools.ksp"
+KAPT_PLUGIN_IDS = ("org.jetbrains.kotlin.kapt", "kotlin-kapt")
+KOTLIN_PLUGIN_IDS = ("org.jetbrains.kotlin.android", "org.jetbrains.kotlin.jvm", "org.jetbrains.kotlin.multiplatform")
+# Cada versión de KSP se publica para una versión concreta de Kotlin
+KSP_VERSIONS = {
+    "1.8.10": "1.8.10-1.0.9",
+    "1.8.20": "1.8.20-1.0.11",
+    "1.8.21": "1.8.21-1.0.11",
+    "1.8.22": "1.8.22-1.0.11",
+    "1.9.0": "1.9.0-1.0.13",
+    "1.9.10": "1.9.10-1.0.13",
+    "1.9.20": "1.9.20-1.0.14",
+    "1.9.21": "1.9.21-1.0.16",
+    "1.9.22": "1.9.22-1.0.17",
+    "1.9.23": "1.9.23-1.0.20",
+    "1.9.24": "1.9.24-1.0.20",
+    "2.0.0": "2.0.0-1.0.24",
+    "2.0.10": "2.0.10-1.0.24",
+    "2.0.20": "2.0.20-1.0.25",
+    "2.0.21": "2.0.21-1.0.28",
+    "2.1.0": "2.1.0-1.0.29",
+}
+DEFAULT_KOTLIN_VERSION = "1.9.0"
+KOTLIN_VERSION_PATTERNS = (
+    re.compile(r'org\.jetbrains\.kotlin[\w.]*["\']\)?\s*version\s*\(?\s*["\']([^"\'$]+)["\']'),
+    re.compile(r'kotlin\(\s*["\']\w+["\']\s*\)\s*version\s*["\']([^"\'$]+)["\']'),
+    re.compile(r'kotlin_version\s*=\s*["\']([^"\'$]+)["\']'),
+)
+
+def get_dependency_groups(use_compose):
+    """
+    Devuelve los grupos de dependencias disponibles indexados por su número de menú.
+
+    Los grupos se leen del catálogo de datos (data/dependencies.json o el indicado en
+    ANDROID_ARCH_DEPENDENCIES), que se carga una sola vez por proceso.
+    """
+    return load_catalog().menu(use_compose)
+
+def resolve_dependency_groups(groups, use_compose):
+    """
+    Convierte una lista de grupos (número del menú o nombre, p. ej. `10` o "Retrofit")
+    en la lista de coordenadas correspondiente.
+
+    Raises:
+        ValueError: Si algún grupo no existe.
+    """
+    catalog = load_catalog()
+    selected_dependencies = []
+    for group in groups:
+        for artifact in catalog.group_artifacts(group, use_compose):
+            if artifact.coordinate not in selected_dependencies:
+                selected_dependencies.append(artifact.coordinate)
+    return selected_dependencies
+
+def select_dependencies(dependencies):
+    """
+    Muestra el menú de grupos de dependencias hasta que el usuario confirma una selección.
+
+    Returns:
+        list: Coordenadas seleccionadas (vacía si el usuario termina sin seleccionar nada).
+    """
     # Filtrar dependencias vacías (por ejemplo, Jetpack Compose si no aplica)
     dependencies = {k: v for k, v in dependencies.items() if any(v.values())}
     for idx, group in dependencies.items():
@@ -13,7 +81,7 @@ def get_dependencies(dependencies, project_path):
     
         # Si selecciona 0 se sale del menú
         if selected_keys == "0":
-            break
+            return []
         if selected_keys == "9":
             warn_firebase_configuration()
         if selected_keys == "22":
@@ -51,229 +119,489 @@ def get_dependencies(dependencies, project_path):
         # Confirmación del usuario
         confirm = input("\n¿Estás seguro de añadir estas dependencias? (s/n): ").strip().lower()
         if confirm == 's':
-            print("\nAñadiendo dependencias al proyecto...")
-             # Detectar si usar libs.versions.toml o build.gradle.kts
-            versions_toml_path = check_or_create_versions_toml(project_path)
-
-            if versions_toml_path:
-                # Añadir dependencias al archivo TOML y obtener los aliases generados
-                aliases = add_dependencies_to_versions_toml(versions_toml_path, selected_dependencies)
-                # Añadir los aliases al build.gradle.kts
-                add_dependencies_to_build_gradle(project_path, aliases, use_aliases=True)
-                print("\nDependencias añadidas a 'libs.versions.toml'.")
-                break
-            else:
-                build_gradle_path = os.path.join(project_path, "app", "build.gradle.kts")
-                add_dependencies_to_build_gradle(build_gradle_path, selected_dependencies, use_aliases=False)
-                print("\nDependencias añadidas a 'build.gradle.kts'.")
-            break
+            return selected_dependencies
 
         else:
             print("\nVolviendo al menú de dependencias...\n")
 
-def add_dependencies_to_versions_toml(versions_toml_path, dependencies):
+@traced
+def get_dependencies(dependencies, project_path):
+    selected_dependencies = select_dependencies(dependencies)
+    if selected_dependencies:
+        apply_dependencies(project_path, selected_dependencies)
+
+@traced
+def apply_dependencies(project_path, selected_dependencies, create_toml=None, modules=("app",), workspace=None):
+    """
+    Añade las dependencias seleccionadas al proyecto, usando libs.versions.toml si
+    existe (o se decide crearlo) y build.gradle(.kts) en caso contrario.
+
+    Args:
+        project_path (str): Ruta raíz del proyecto Android.
+        selected_dependencies (list): Coordenadas `group:name[:version]`.
+        create_toml (bool | None): Si se crea libs.versions.toml cuando no existe. Si es
+            None se pregunta al usuario.
+        modules (iterable): Directorios de los módulos cuyo build.gradle(.kts) se modifica.
+        workspace (Workspace | None): Workspace compartido. Si es None, el catálogo y los
+            build.gradle se escriben juntos al terminar.
+    """
+    print("\nAñadiendo dependencias al proyecto...")
+    with open_workspace(workspace) as workspace:
+        selected_dependencies, version_updates = check_dependency_rules(project_path, selected_dependencies, modules, workspace)
+
+        # Detectar si usar libs.versions.toml o build.gradle.kts
+        versions_toml_path = check_or_create_versions_toml(project_path, create_toml, workspace)
+
+        # Las dependencias del proyecto declaradas en línea se alinean en su build.gradle
+        version_updates = update_build_versions(project_path, version_updates, modules, workspace)
+        if versions_toml_path:
+            # Añadir dependencias al archivo TOML y obtener los aliases generados
+            aliases = add_dependencies_to_versions_toml(versions_toml_path, selected_dependencies, workspace, version_updates)
+            register_processor_plugins(project_path, selected_dependencies, True, workspace)
+            # Añadir los aliases al build.gradle.kts
+            for module in modules:
+                add_dependencies_to_build_gradle(project_path, aliases, use_aliases=True, module=module, workspace=workspace)
+            print("\nDependencias añadidas a 'libs.versions.toml'.")
+        else:
+            for module, version in version_updates.items():
+                print(f"⚠️  Actualiza a mano la versión de {module} a {version or 'la de su BOM'}.")
+            register_processor_plugins(project_path, selected_dependencies, False, workspace)
+            for module in modules:
+                add_dependencies_to_build_gradle(project_path, selected_dependencies, use_aliases=False, module=module, workspace=workspace)
+            print("\nDependencias añadidas a 'build.gradle.kts'.")
+
+@traced
+def add_dependencies_to_versions_toml(versions_toml_path, dependencies, workspace=None, version_updates=None):
     """
     Añade dependencias al archivo libs.versions.toml, evitando duplicados,
     y gestiona las versiones en la sección `[versions]`.
+
+    Solo se insertan las líneas nuevas al final de cada sección: el resto del
+    fichero (comentarios, orden de secciones, formato) se conserva tal cual.
+
+    Args:
+        version_updates (dict | None): Nuevas versiones (`group:name` -> versión) para
+            librerías que ya estaban en el catálogo, p. ej. para alinear una familia.
+
+    Returns:
+        list: Alias del catálogo de cada dependencia, tanto nuevos como ya existentes.
     """
-    if not os.path.exists(versions_toml_path):
+    with open_workspace(workspace) as workspace:
+        return _add_dependencies_to_versions_toml(versions_toml_path, dependencies, workspace, version_updates or {})
+
+def _add_dependencies_to_versions_toml(versions_toml_path, dependencies, workspace, version_updates):
+    if not workspace.exists(versions_toml_path):
         print(f"No se encontró el archivo {versions_toml_path}. Creando uno nuevo.")
-        check_or_create_versions_toml(os.path.dirname(versions_toml_path))
-
-    # Leer contenido actual del archivo
-    with open(versions_toml_path, "r", encoding="utf-8") as file:
-        lines = file.readlines()
-
-    sections = {}
-    current_section = None
-    for line in lines:
-        stripped_line = line.strip()
-        if stripped_line.startswith("[") and stripped_line.endswith("]"):
-            current_section = stripped_line.lower()  # Convertir a minúsculas
-            if current_section not in sections:
-                sections[current_section] = []
-        else:
-            if current_section:
-                sections[current_section].append(line.rstrip("\n"))
-
-    # Imprimir las secciones detectadas
-    print("Secciones detectadas en el archivo:")
-    for section_name in sections.keys():
-        print(f"- {section_name}")
-
-    # Inicializar diccionarios para versiones y librerías existentes
-    existing_versions = set()
-    existing_libraries = set()
-
-    # Procesar secciones existentes
-    if "[versions]" in sections:
-        for line in sections["[versions]"]:
-            match = re.match(r'^(\w[\w_-]*)\s*=\s*"(.*)"$', line.strip())
-            if match:
-                key = match.group(1)
-                existing_versions.add(key)
-
-    if "[libraries]" in sections:
-        for line in sections["[libraries]"]:
-            match = re.match(r'^(\w[\w_-]*)\s*=', line.strip())
-            if match:
-                alias = match.group(1)
-                existing_libraries.add(alias)
+        check_or_create_versions_toml(os.path.dirname(os.path.dirname(versions_toml_path)), True, workspace)
 
-    added_aliases = []
+    catalog = VersionCatalog.load(versions_toml_path, workspace)
+    update_catalog_versions(catalog, version_updates)
 
-    # Añadir nuevas dependencias
+    aliases = []
+    added_aliases = []
     for dep in dependencies:
-        group, name, version = dep.split(":")
+        group, name, version = split_coordinate(dep)
+
+        # Reutilizar la librería si ya está declarada con cualquier alias
+        existing = catalog.find_library(group, name)
+        if existing:
+            if existing.alias not in aliases:
+                aliases.append(existing.alias)
+            continue
+
         alias = name.replace("-", "_")
-        version_key = f"{alias}_version"
-
-        # Añadir versión si no existe
-        if version_key not in existing_versions:
-            if "[versions]" not in sections:
-                sections["[versions]"] = []
-            sections["[versions]"].append(f'{version_key} = "{version}"')
-            existing_versions.add(version_key)
-
-        # Añadir librería si no existe
-        if alias not in existing_libraries:
-            if "[libraries]" not in sections:
-                sections["[libraries]"] = []
-            lib_entry = f'{alias} = {{ group = "{group}", name = "{name}", version.ref = "{version_key}" }}'
-            sections["[libraries]"].append(lib_entry)
-            existing_libraries.add(alias)
-            added_aliases.append(alias)
-
-        # Reconstruir el contenido del archivo
-    with open(versions_toml_path, "w", encoding="utf-8") as file:
-
-        # Escribir secciones en el orden original o en un orden específico
-        for section_name in ["[versions]", "[libraries]", "[plugins]"]:
-            if section_name in sections:
-                file.write(section_name + "\n")
-                for line in sections[section_name]:
-                    file.write(line + "\n")
-                file.write("\n")  # Añadir una línea en blanco después de cada sección
-
-        # Escribir cualquier otra sección que no hayamos cubierto
-        for section_name, lines in sections.items():
-            if section_name not in ["[versions]", "[libraries]", "[plugins]"]:
-                file.write(section_name + "\n")
-                for line in lines:
-                    file.write(line + "\n")
-                file.write("\n")
-
-    print(f"Dependencias añadidas correctamente al archivo {versions_toml_path}:")
-    for alias in added_aliases:
-        print(f"- {alias}")
-
-    return added_aliases
-
-def check_or_create_versions_toml(project_path):
-    """
-    Verifica si existe el archivo libs.versions.toml. Si no existe, ofrece crearlo.
+        if catalog.has("libraries", alias):
+            # El alias lo usa otra librería: se distingue con el último segmento del grupo
+            alias = f"{group.split('.')[-1]}_{alias}".replace("-", "_")
+
+        version_key = None
+        if version:
+            version_key = f"{alias}_version"
+            # Añadir versión si no existe
+            if not catalog.has("versions", version_key):
+                catalog.add_version(version_key, version)
+
+        # Las librerías sin versión (gestionadas por un BOM) no llevan version.ref
+        catalog.add_library(alias, group, name, version_ref=version_key)
+        aliases.append(alias)
+        added_aliases.append(alias)
+
+    if catalog.save(versions_toml_path, workspace):
+        print(f"Dependencias añadidas correctamente al archivo {versions_toml_path}:")
+        for alias in added_aliases:
+            print(f"- {alias}")
+    else:
+        print(f"Todas las dependencias ya estaban en {versions_toml_path}.")
+
+    return aliases
+
+def update_catalog_versions(catalog, version_updates):
+    """
+    Cambia la versión de librerías ya declaradas en el catálogo. Solo se editan las que
+    usan `version.ref`; el resto (incluidas las declaradas en línea en un build.gradle)
+    se indica para que se revise a mano.
+    """
+    for module, version in version_updates.items():
+        entry = catalog.find_library(*module.split(":"))
+        if version is None:
+            print(f"⚠️  Quita a mano la versión de {module}: ya la gestiona su BOM.")
+            continue
+        if entry is None:
+            print(f"⚠️  Actualiza a mano la versión de {module} en build.gradle a {version}.")
+            continue
+        reference = entry.value.get("version") if isinstance(entry.value, dict) else None
+        if isinstance(reference, dict) and "ref" in reference and catalog.has("versions", reference["ref"]):
+            if catalog.set_version(reference["ref"], version):
+                print(f"Versión '{reference['ref']}' actualizada a {version} en libs.versions.toml.")
+        else:
+            print(f"⚠️  Actualiza a mano la versión de {module} en libs.versions.toml a {version}.")
+
+def update_build_versions(project_path, version_updates, modules=("app",), workspace=None):
+    """
+    Cambia la versión de las dependencias declaradas con coordenadas en línea en los
+    build.gradle(.kts) de los módulos (ver `GradleBuildFile.set_dependency_version`).
+
+    Returns:
+        dict: Las actualizaciones que no corresponden a ninguna coordenada en línea
+        (p. ej. librerías del catálogo).
+    """
+    remaining = dict(version_updates)
+    if not remaining:
+        return remaining
+    with open_workspace(workspace) as workspace:
+        for module in modules:
+            build_file = next((path for path in (os.path.join(project_path, module, name)
+                                                 for name in ("build.gradle.kts", "build.gradle"))
+                               if workspace.exists(path)), None)
+            if build_file is None:
+                continue
+            gradle_file = GradleBuildFile.for_path(build_file, workspace.read(build_file))
+            for dependency, version in version_updates.items():
+                if gradle_file.set_dependency_version(dependency, version):
+                    remaining.pop(dependency, None)
+                    print(f"Versión de {dependency} {'actualizada a ' + version if version else 'eliminada'} en {build_file}.")
+            if gradle_file.changed:
+                workspace.write(build_file, gradle_file.to_text())
+    return remaining
+
+def project_dependencies(project_path, modules=("app",), workspace=None):
+    """
+    Devuelve las dependencias ya declaradas en libs.versions.toml y, con coordenadas
+    en línea, en los build.gradle(.kts) de los módulos indicados.
+
+    Returns:
+        list: Dependencias (`Dependency`) con su origen (`catalog` o `build`).
+    """
+    dependencies = []
+    with open_workspace(workspace) as workspace:
+        versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
+        if workspace.exists(versions_toml_path):
+            catalog = VersionCatalog.load(versions_toml_path, workspace)
+            for entry in catalog.entries["libraries"].values():
+                coordinate = catalog.library_coordinate(entry.value)
+                if coordinate and coordinate.count(":") == 1:
+                    group, name = coordinate.split(":")
+                    dependencies.append(Dependency(group, name, catalog.version_of(entry.value), "catalog"))
+
+        for module in modules:
+            for build_name in ("build.gradle.kts", "build.gradle"):
+                gradle_path = os.path.join(project_path, module, build_name)
+                if not workspace.exists(gradle_path):
+                    continue
+                gradle_file = GradleBuildFile.for_path(gradle_path, workspace.read(gradle_path))
+                for declaration in gradle_file.dependencies:
+                    coordinate = re.search(r'["\']([^"\'$]+)["\']', declaration.notation)
+                    if declaration.kind == "coordinate" and coordinate:
+                        parts = coordinate.group(1).split("@")[0].split(":")
+                        if len(parts) in (2, 3):
+                            dependencies.append(Dependency.parse(":".join(parts), "build"))
+                break
+    return dependencies
+
+@traced
+def check_dependency_rules(project_path, selected_dependencies, modules=("app",), workspace=None):
+    """
+    Evalúa las reglas de dependencias (exclusiones, dependencias necesarias, alineación
+    de versiones y BOMs) sobre la selección y lo que ya declara el proyecto, y aplica
+    las correcciones automáticas.
+
+    Returns:
+        tuple: (selección corregida, {`group:name`: versión} para librerías que ya estaban
+        en el proyecto y deben actualizarse)
+
+    Raises:
+        ValueError: Si hay algún conflicto que no se puede corregir automáticamente.
+    """
+    existing = project_dependencies(project_path, modules, workspace)
+    violations = load_rules().check(selected_dependencies, existing)
+    errors = [violation for violation in violations if violation.severity == "error" and not violation.fixable]
+    for violation in violations:
+        print(f"⚠️  {violation.message}")
+    if errors:
+        raise ValueError("; ".join(violation.message for violation in errors))
+
+    catalog = load_catalog()
+
+    def catalog_version(group, name):
+        artifacts = catalog.find(group, name)
+        return artifacts[0].version if artifacts else None
+
+    fixed, version_updates = apply_fixes(selected_dependencies, violations, existing, catalog_version)
+    for coordinate in fixed:
+        if coordinate not in selected_dependencies:
+            print(f"✔️ Corregido automáticamente: {coordinate}")
+    return fixed, version_updates
+
+def split_coordinate(dependency):
+    """
+    Separa una coordenada `group:name[:version]` en sus partes.
+
+    Returns:
+        tuple: (group, name, version o None)
+    """
+    parts = dependency.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Coordenada de dependencia no válida: {dependency}")
+    return parts[0], parts[1], parts[2] if len(parts) == 3 else None
+
+def check_or_create_versions_toml(project_path, create=None, workspace=None):
+    """
+    Verifica si existe el archivo libs.versions.toml. Si no existe, ofrece crearlo
+    (o lo crea directamente según `create` cuando no es None).
     """
     versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
-    if not os.path.exists(versions_toml_path):
-        create = input(f"El archivo 'libs.versions.toml' no existe. ¿Quieres crearlo? (s/n): ").strip().lower()
-        if create == "s":
+    if not (workspace.exists(versions_toml_path) if workspace else os.path.exists(versions_toml_path)):
+        if create is None:
+            create = input(f"El archivo 'libs.versions.toml' no existe. ¿Quieres crearlo? (s/n): ").strip().lower() == "s"
+        if create:
             print(f"Creando {versions_toml_path}...")
-            os.makedirs(os.path.dirname(versions_toml_path), exist_ok=True)
-            with open(versions_toml_path, "w", encoding="utf-8") as file:
-                file.write("[versions]\n[libraries]\n[plugins]\n")
+            with open_workspace(workspace) as workspace:
+                workspace.write(versions_toml_path, "[versions]\n[libraries]\n[plugins]\n")
             print("Archivo 'libs.versions.toml' creado exitosamente.")
         else:
             print("No se creó el archivo 'libs.versions.toml'. Las dependencias se añadirán al archivo 'build.gradle.kts'.")
             return None
     return versions_toml_path
 
-def add_dependencies_to_build_gradle(project_path, dependencies, use_aliases=False):
+@traced
+def add_dependencies_to_build_gradle(project_path, dependencies, use_aliases=False, module="app", workspace=None):
     """
-    Añade dependencias al archivo build.gradle.kts o build.gradle del proyecto.
+    Añade dependencias al archivo build.gradle.kts o build.gradle de un módulo del proyecto.
     Si use_aliases es True, usa el formato `implementation(libs.<alias>)`.
     Si es False, usa el formato `implementation("group:name:version")`.
     """
-    app_gradle_path_kts = os.path.join(project_path, "app", "build.gradle.kts")
-    app_gradle_path = os.path.join(project_path, "app", "build.gradle")
+    with open_workspace(workspace) as workspace:
+        _add_dependencies_to_build_gradle(project_path, dependencies, use_aliases, module, workspace)
+
+def _add_dependencies_to_build_gradle(project_path, dependencies, use_aliases, module, workspace):
+    app_gradle_path_kts = os.path.join(project_path, module, "build.gradle.kts")
+    app_gradle_path = os.path.join(project_path, module, "build.gradle")
 
-    if os.path.exists(app_gradle_path_kts):
+    if workspace.exists(app_gradle_path_kts):
         gradle_path = app_gradle_path_kts
-    elif os.path.exists(app_gradle_path):
+    elif workspace.exists(app_gradle_path):
         gradle_path = app_gradle_path
     else:
-        print("No se encontró el archivo build.gradle.kts o build.gradle en el módulo app.")
+        print(f"No se encontró el archivo build.gradle.kts o build.gradle en el módulo {module}.")
         return
 
     # Leer el contenido actual del archivo
     try:
-        with open(gradle_path, "r", encoding="utf-8") as file:
-            gradle_content = file.read()
+        gradle_file = GradleBuildFile.for_path(gradle_path, workspace.read(gradle_path))
     except Exception as e:
         print(f"Error al leer el archivo {gradle_path}: {e}")
         return
-    
-    # Filtrar dependencias ya existentes
-    if use_aliases:
-        dependencies_to_add = [
-            f"libs.{alias}" for alias in dependencies if f"libs.{alias}" not in gradle_content
-        ]
-    else:
-        dependencies_to_add = [
-            dep for dep in dependencies if (
-                f'implementation("{dep}")' not in gradle_content and
-                f'implementation "{dep}"' not in gradle_content
-            )
-        ]
-
-    if not dependencies_to_add:
+
+    # Cada dependencia va con su configuración (ksp, testImplementation, platform...)
+    catalog = _project_catalog(project_path, workspace, shared=True)
+    dependency_catalog = load_catalog()
+    declarations = []
+    for dependency in dependencies:
+        if use_aliases:
+            entry = catalog.get("libraries", dependency) if catalog else None
+            coordinate = catalog.library_coordinate(entry.value) if entry else None
+            if coordinate and gradle_file.has_dependency(coordinate):
+                # Ya declarada con la coordenada en línea
+                continue
+            configuration, platform = (dependency_configuration(coordinate, dependency_catalog) if coordinate
+                                       else ("implementation", False))
+            declarations.append((configuration, alias_to_accessor(dependency), platform))
+        else:
+            configuration, platform = dependency_configuration(dependency, dependency_catalog)
+            declarations.append((configuration, dependency, platform))
+
+    # Las dependencias ya declaradas (con cualquier configuración) se omiten
+    added = gradle_file.add_dependencies(declarations)
+
+    if not added:
         print("Todas las dependencias ya están añadidas. No se realizaron cambios.")
         return
 
-    # Crear el bloque de dependencias en el formato adecuado
-    dependencies_block = ""
-    for dep in dependencies_to_add:
-        dependencies_block += f"    implementation({dep})\n"
-
-    # Añadir dependencias dentro del bloque dependencies
-    if "dependencies {" in gradle_content:
-        gradle_content = gradle_content.replace(
-            "dependencies {",
-            f"dependencies {{\n{dependencies_block}"
-        )
-    else:
-        # Si no existe el bloque dependencies, añadirlo
-        gradle_content += f"\ndependencies {{\n{dependencies_block}}}\n"
-
-    # Configuración adicional según las dependencias
-    my_application_path = os.path.join(project_path, "build.gradle.kts")
+    plugins = _processor_plugin_lines(gradle_file, {declaration[0] for declaration in declarations}, catalog)
+    if plugins:
+        gradle_file.add_plugins(plugins)
 
     # Guardar el contenido modificado
-    try:
-        with open(gradle_path, "w", encoding="utf-8") as file:
-            file.write(gradle_content)
-            print(f"Archivo {gradle_path} modificado: {dependencies_block}")
-    except Exception as e:
-        print(f"Error al escribir en el archivo {gradle_path}: {e}")
-        return
+    workspace.write(gradle_path, gradle_file.to_text())
 
     print(f"Dependencias añadidas correctamente al archivo {gradle_path}:")
-    for dep in dependencies_to_add:
-        if use_aliases:
-            print(f"- {dep}")
-        else:
-            print(f"- {dep}")   
+    for declaration in added:
+        print(f"- {declaration}")
+    for plugin in plugins:
+        print(f"- Plugin: {plugin}")
+
+def dependency_configuration(dependency, catalog=None):
+    """
+    Configuración de Gradle de una coordenada `group:name[:version]` según el catálogo de
+    dependencias (o deducida de sus coordenadas si no está en él).
+
+    Returns:
+        tuple: (configuración, platform)
+    """
+    group, name, _ = split_coordinate(dependency)
+    return (catalog or load_catalog()).configuration_for(group, name)
+
+_parsed_catalogs = {}
+
+def _project_catalog(project_path, workspace, shared=False):
+    """
+    Catálogo de versiones del proyecto (None si no existe). Con `shared` se reutiliza el
+    último analizado mientras el texto no cambie: solo para consultas, no para editarlo.
+    """
+    versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
+    if not workspace.exists(versions_toml_path):
+        return None
+    if not shared:
+        return VersionCatalog.load(versions_toml_path, workspace)
+    text = workspace.read(versions_toml_path)
+    cached = _parsed_catalogs.get(versions_toml_path)
+    if cached is None or cached[0] != text:
+        cached = _parsed_catalogs[versions_toml_path] = (text, VersionCatalog(text))
+    return cached[1]
+
+def plugin_accessor(catalog, plugin_id):
+    """Accesor `libs.plugins.*` del plugin en el catálogo, o None si no está declarado."""
+    entry = catalog.find_plugin(plugin_id) if catalog else None
+    return "libs.plugins." + re.sub(r"[-_]", ".", entry.alias) if entry else None
+
+def has_plugin(gradle_file, catalog, plugin_ids):
+    """Indica si el build file aplica alguno de los plugins, por id o por su accesor del catálogo."""
+    accessors = [plugin_accessor(catalog, plugin_id) for plugin_id in plugin_ids]
+    return any(gradle_file.has_plugin(plugin) for plugin in list(plugin_ids) + [accessor for accessor in accessors if accessor])
+
+def plugin_line(gradle_file, catalog, plugin_id):
+    """Línea del bloque `plugins` de un módulo: el alias del catálogo si lo hay o el id."""
+    accessor = plugin_accessor(catalog, plugin_id)
+    if accessor:
+        return f"alias({accessor})"
+    return f'id("{plugin_id}")' if gradle_file.kotlin_dsl else f"id '{plugin_id}'"
+
+def _processor_plugin_lines(gradle_file, configurations, catalog):
+    """Líneas del bloque `plugins` de un módulo para los procesadores que usan sus dependencias."""
+    lines = []
+    if any(configuration.startswith("ksp") for configuration in configurations) \
+            and not has_plugin(gradle_file, catalog, (KSP_PLUGIN_ID,)):
+        lines.append(plugin_line(gradle_file, catalog, KSP_PLUGIN_ID))
+    if any(configuration.startswith("kapt") for configuration in configurations) \
+            and not has_plugin(gradle_file, catalog, KAPT_PLUGIN_IDS):
+        lines.append('kotlin("kapt")' if gradle_file.kotlin_dsl else "id 'kotlin-kapt'")
+    return lines
+
+def kotlin_version(project_path, catalog=None, workspace=None):
+    """
+    Versión de Kotlin del proyecto: la del plugin de Kotlin en el catálogo, la entrada
+    `kotlin` de `[versions]` o la declarada en el build.gradle raíz. None si no se encuentra.
+    """
+    if catalog is not None:
+        for plugin_id in KOTLIN_PLUGIN_IDS:
+            entry = catalog.find_plugin(plugin_id)
+            if entry and catalog.version_of(entry.value):
+                return catalog.version_of(entry.value)
+        entry = catalog.get("versions", "kotlin")
+        if entry and isinstance(entry.value, str):
+            return entry.value
+    with open_workspace(workspace) as workspace:
+        for build_name in ("build.gradle.kts", "build.gradle"):
+            path = os.path.join(project_path, build_name)
+            if workspace.exists(path):
+                content = workspace.read(path)
+                for pattern in KOTLIN_VERSION_PATTERNS:
+                    match = pattern.search(content)
+                    if match:
+                        return match.group(1)
+    return None
+
+def ksp_version(kotlin):
+    """
+    Versión de KSP que corresponde a una versión de Kotlin. Si no se conoce, se usa la de
+    la versión de Kotlin conocida más cercana por debajo y se avisa para revisarla.
+    """
+    if kotlin in KSP_VERSIONS:
+        return KSP_VERSIONS[kotlin]
+    known = sorted(KSP_VERSIONS, key=version_key)
+    candidates = [version for version in known if kotlin and version_key(version) <= version_key(kotlin)]
+    fallback = KSP_VERSIONS[candidates[-1] if candidates else DEFAULT_KOTLIN_VERSION]
+    print(f"⚠️  No se conoce la versión de KSP para Kotlin {kotlin or '(no detectado)'}; se usa {fallback}. "
+          "Ajústala para que coincida con la versión de Kotlin del proyecto.")
+    return fallback
+
+@traced
+def register_processor_plugins(project_path, dependencies, use_catalog, workspace=None):
+    """
+    Si alguna dependencia se procesa con KSP, declara el plugin en el proyecto: en
+    `[plugins]` de libs.versions.toml (con la versión de KSP que corresponde a la de
+    Kotlin) y en el build.gradle raíz con `apply false`. Los módulos lo aplican al
+    añadir sus dependencias.
+    """
+    if not any(dependency_configuration(dependency)[0].startswith("ksp") for dependency in dependencies):
+        return
+    with open_workspace(workspace) as workspace:
+        versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
+        catalog = _project_catalog(project_path, workspace) if use_catalog else None
+        if catalog is not None and catalog.find_plugin(KSP_PLUGIN_ID) is None:
+            version = ksp_version(kotlin_version(project_path, catalog, workspace))
+            version_ref = "ksp" if not catalog.has("versions", "ksp") else None
+            if version_ref:
+                catalog.add_version(version_ref, version)
+            catalog.add_plugin("ksp" if not catalog.has("plugins", "ksp") else "google_ksp", KSP_PLUGIN_ID,
+                               version=None if version_ref else version, version_ref=version_ref)
+            catalog.save(versions_toml_path, workspace)
+            print(f"Plugin KSP ({version}) añadido a {versions_toml_path}.")
+
+        for build_name in ("build.gradle.kts", "build.gradle"):
+            root_build = os.path.join(project_path, build_name)
+            if not workspace.exists(root_build):
+                continue
+            gradle_file = GradleBuildFile.for_path(root_build, workspace.read(root_build))
+            if has_plugin(gradle_file, catalog, (KSP_PLUGIN_ID,)):
+                return
+            accessor = plugin_accessor(catalog, KSP_PLUGIN_ID)
+            if accessor:
+                line = f"alias({accessor}) apply false"
+            else:
+                version = ksp_version(kotlin_version(project_path, None, workspace))
+                line = (f'id("{KSP_PLUGIN_ID}") version "{version}" apply false' if gradle_file.kotlin_dsl
+                        else f"id '{KSP_PLUGIN_ID}' version '{version}' apply false")
+            gradle_file.add_plugins([line])
+            workspace.write(root_build, gradle_file.to_text())
+            print(f"Plugin KSP declarado en {root_build}.")
+            return
 
 def warn_firebase_configuration():
     print("⚠️  Recuerda añadir el archivo 'google-services.json' en el módulo app para configurar Firebase correctamente.")
 
 def validate_moshi_gson_selection(selected_dependencies):
     """
-    Valida que no se seleccionen Moshi y Gson al mismo tiempo.
+    Valida que la selección no incluya librerías incompatibles entre sí (p. ej. Moshi y
+    Gson). Las exclusiones se definen en data/dependency_rules.json.
     """
-    if "com.squareup.moshi:moshi-kotlin:1.15.0" in selected_dependencies and "com.google.code.gson:gson:2.10" in selected_dependencies:
-        print("⚠️  Solo puedes seleccionar una librería entre Moshi y Gson. Elige una y vuelve a intentarlo.")
-        return False
-    return True
+    conflicts = [
+        violation for violation in load_rules().check(selected_dependencies)
+        if violation.kind == "exclusive" and violation.severity == "error"
+    ]
+    for violation in conflicts:
+        print(f"⚠️  {violation.message}")
+    return not conflicts
 
 def warn_crashlytics_configuration():
     print("⚠️  Recuerda que Crashlytics requiere configuración adicional en 'google-services.json'.")
@@ -0,0 +1,176 @@
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+from generate_android_architecture import add_architecture_to_existing_project
+from generate_dependencies import (
+    add_dependencies_to_build_gradle,
+    add_dependencies_to_versions_toml,
+    check_dependency_rules,
+    check_or_create_versions_toml,
+    register_processor_plugins,
+    update_build_versions,
+)
+from gradle_properties import tune_gradle_properties
+from keep_rules import add_keep_rules
+from project_inspector import inspect_project
+from startup_profiling import PROFILING_MODULES, add_startup_profiling, application_module
+from tracing import call_and_collect, merge, traced
+from workspace import Workspace
+
+def find_modules(project_path, selected=None):
+    """
+    Devuelve la información de los módulos del proyecto, opcionalmente filtrados.
+
+    Args:
+        selected (iterable | None): Nombres Gradle (`:feature:home`) o directorios
+            (`feature/home`) de los módulos a incluir. Si es None se incluyen todos.
+    """
+    return inspect_project(project_path).find_modules(selected)
+
+@traced
+def scaffold_module(project_path, module, architecture, use_compose, permissions, replace_existing, aliases, use_aliases,
+                    dependencies=()):
+    """
+    Añade la arquitectura, el manifiesto, las dependencias y sus reglas de R8 a un único módulo.
+
+    Se ejecuta en un proceso del pool: captura la salida y nunca propaga excepciones.
+    Los cambios del módulo se escriben juntos y solo si todos los pasos terminan bien.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {"module": module["name"], "ok": False, "error": None}
+    try:
+        with redirect_stdout(log), Workspace() as workspace:
+            if not module["package"]:
+                raise ValueError("No se encontró el paquete del módulo en build.gradle, el manifiesto ni el código.")
+            if not add_architecture_to_existing_project(
+                project_path,
+                architecture,
+                use_compose,
+                module["package"],
+                permissions=permissions,
+                replace_existing=replace_existing,
+                module=module["directory"],
+                workspace=workspace,
+                tune_properties=False,
+            ):
+                raise RuntimeError("No se pudo añadir la arquitectura al módulo.")
+            if aliases:
+                add_dependencies_to_build_gradle(project_path, aliases, use_aliases=use_aliases,
+                                                 module=module["directory"], workspace=workspace)
+            if dependencies:
+                add_keep_rules(project_path, list(dependencies), module["directory"], workspace=workspace)
+        result.update(ok=True, written=len(workspace.written), skipped=len(workspace.skipped))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+    result["elapsed"] = time.perf_counter() - start
+    result["log"] = log.getvalue()
+    return result
+
+def scaffold_modules(project_path, architecture, use_compose, modules=None, dependencies=None,
+                     permissions=(), replace_existing=False, create_toml=True, max_workers=None,
+                     startup_profiling=False, minify=False):
+    """
+    Aplica la arquitectura, las dependencias y los permisos a varios módulos en paralelo.
+
+    Los ficheros compartidos (libs.versions.toml, gradle.properties, los build.gradle raíz y
+    de la app, settings.gradle) se actualizan una sola vez, en un único commit, antes de
+    repartir los módulos entre los procesos del pool. Cada módulo escribe sus cambios solo
+    si todos sus pasos terminan bien; si alguno falla, los ficheros compartidos ya escritos
+    se mantienen (se informa de cuáles son) y basta con volver a ejecutarlo para ese módulo.
+
+    Args:
+        modules (iterable | None): Módulos a configurar. Si es None se usan todos los de
+            settings.gradle salvo los de perfilado (`:baselineprofile` y `:macrobenchmark`).
+        dependencies (list | None): Coordenadas `group:name[:version]` a añadir a cada módulo.
+        max_workers (int | None): Número máximo de procesos. Con 1 se ejecuta sin pool.
+        startup_profiling (bool): Añade los módulos de perfilado del arranque de la app
+            (ver `startup_profiling.add_startup_profiling`).
+        minify (bool): Activa la minificación con R8 en el build type `release` de la app
+            (ver `keep_rules.add_keep_rules`).
+
+    Returns:
+        list: Resultado de cada módulo con las claves `module`, `ok`, `error`, `elapsed` y `log`.
+    """
+    project_path = os.path.abspath(project_path)
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        raise ValueError("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+
+    module_infos = model.find_modules(modules)
+    if not modules:
+        module_infos = [module for module in module_infos if module["name"].strip(":") not in PROFILING_MODULES]
+    if not module_infos:
+        print("No se encontraron módulos en settings.gradle.")
+        return []
+
+    # Los ficheros compartidos (catálogo, build.gradle raíz, gradle.properties, settings.gradle
+    # y el build.gradle de la app) se escriben juntos en un solo commit antes del pool, porque
+    # los módulos los leen de disco
+    aliases, use_aliases = [], False
+    with Workspace() as shared:
+        if dependencies:
+            directories = [module["directory"] for module in module_infos]
+            dependencies, version_updates = check_dependency_rules(project_path, dependencies, directories, shared)
+            version_updates = update_build_versions(project_path, version_updates, directories, shared)
+            versions_toml_path = check_or_create_versions_toml(project_path, create_toml, shared)
+            if versions_toml_path:
+                aliases = add_dependencies_to_versions_toml(versions_toml_path, dependencies, shared, version_updates)
+                use_aliases = True
+            else:
+                aliases = list(dependencies)
+                for module, version in version_updates.items():
+                    print(f"⚠️  Actualiza a mano la versión de {module} a {version or 'la de su BOM'}.")
+            # El plugin KSP se declara una vez en el catálogo y el build.gradle raíz
+            register_processor_plugins(project_path, dependencies, bool(versions_toml_path), shared)
+
+        # gradle.properties se ajusta aquí y no en cada módulo
+        tune_gradle_properties(project_path, workspace=shared)
+        if startup_profiling or minify:
+            app = application_module(model)
+            if app is None:
+                print("No se encontró el módulo de la app; no se añade el perfilado del arranque ni se activa R8.")
+            else:
+                if startup_profiling:
+                    add_startup_profiling(project_path, app["directory"], shared)
+                if minify:
+                    # Las reglas de las dependencias las escribe después cada módulo
+                    add_keep_rules(project_path, [], app["directory"], minify=True, workspace=shared)
+
+    args = (architecture, use_compose, list(permissions), replace_existing, aliases, use_aliases, list(dependencies or []))
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(module_infos)))
+    print(f"Configurando {len(module_infos)} módulos con {workers} procesos...")
+
+    results = []
+    if workers == 1:
+        results = [scaffold_module(project_path, module, *args) for module in module_infos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(call_and_collect, scaffold_module, project_path, module, *args)
+                       for module in module_infos]
+            for future in as_completed(futures):
+                result, events = future.result()
+                merge(events)
+                results.append(result)
+        order = {module["name"]: index for index, module in enumerate(module_infos)}
+        results.sort(key=lambda result: order[result["module"]])
+
+    for result in results:
+        if result["ok"]:
+            print(f"✔️ {result['module']} ({result['elapsed']:.2f}s, "
+                  f"{result['written']} ficheros escritos, {result['skipped']} sin cambios)")
+        else:
+            print(f"❌ {result['module']}: {result['error']}")
+    failed = sum(1 for result in results if not result["ok"])
+    print(f"Módulos configurados: {len(results) - failed}/{len(results)}.")
+    if failed and shared.written:
+        # Los módulos que fallaron no escribieron nada, pero los ficheros compartidos se mantienen
+        print("⚠️  Los ficheros compartidos ya se habían escrito antes de configurar los módulos: "
+              + ", ".join(os.path.relpath(path, project_path) for path in shared.written)
+              + ". Vuelve a ejecutar el comando con los módulos que fallaron para completarlos.")
+    return results
@@ -0,0 +1,633 @@
+import re
+
+from version_catalog import normalize_alias
+
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+NUMBER_PATTERN = re.compile(r"[0-9][0-9A-Za-z_.]*")
+
+# Plugins declarados con `kotlin("...")` en Kotlin DSL
+KOTLIN_PLUGIN_PREFIX = "org.jetbrains.kotlin."
+PROJECT_NOTATION_PATTERN = re.compile(r'^project\(\s*(?:path\s*[:=]\s*)?["\']([^"\']+)["\']\s*\)$')
+
+class Token:
+    __slots__ = ("kind", "text", "start", "end")
+
+    def __init__(self, kind, text, start, end):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r})"
+
+def _skip_string(text, position):
+    """Devuelve la posición tras la cadena que empieza en `position` (admite `${...}` y `\"\"\"`)."""
+    if text.startswith('"""', position):
+        end = text.find('"""', position + 3)
+        return len(text) if end == -1 else end + 3
+    quote = text[position]
+    position += 1
+    while position < len(text):
+        char = text[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == quote:
+            return position + 1
+        if char == "\n" and quote == "'":
+            return position
+        if char == "$" and text.startswith("${", position):
+            # Las expresiones interpoladas pueden contener llaves y otras cadenas
+            depth = 0
+            position += 1
+            while position < len(text):
+                char = text[position]
+                if char in "\"'":
+                    position = _skip_string(text, position)
+                    continue
+                if char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                position += 1
+        position += 1
+    return position
+
+def tokenize(text):
+    """
+    Divide un script Gradle (Kotlin DSL o Groovy) en tokens.
+
+    Se descartan espacios y comentarios. Las cadenas (incluidas las de triple comilla y
+    las interpoladas) forman un único token, por lo que las llaves dentro de ellas no
+    afectan a la estructura de bloques.
+    """
+    tokens = []
+    position = 0
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if char in " \t\r\n;":
+            position += 1
+        elif text.startswith("//", position):
+            newline = text.find("\n", position)
+            position = length if newline == -1 else newline
+        elif text.startswith("/*", position):
+            end = text.find("*/", position + 2)
+            position = length if end == -1 else end + 2
+        elif char in "\"'":
+            end = _skip_string(text, position)
+            tokens.append(Token("string", text[position:end], position, end))
+            position = end
+        elif char == "`":
+            end = text.find("`", position + 1)
+            end = length if end == -1 else end + 1
+            tokens.append(Token("name", text[position + 1:end - 1], position, end))
+            position = end
+        else:
+            match = NAME_PATTERN.match(text, position)
+            if match:
+                tokens.append(Token("name", match.group(0), position, match.end()))
+                position = match.end()
+                continue
+            match = NUMBER_PATTERN.match(text, position)
+            if match:
+                tokens.append(Token("number", match.group(0), position, match.end()))
+                position = match.end()
+                continue
+            tokens.append(Token("punct", char, position, position + 1))
+            position += 1
+    return tokens
+
+def string_value(token):
+    """Devuelve el contenido de un token de cadena sin comillas."""
+    text = token.text
+    if text.startswith('"""'):
+        return text[3:-3]
+    return text[1:-1]
+
+def accessor_key(accessor):
+    """Normaliza un accesor del catálogo (`libs.room.ktx`, `libs.room_ktx`) para compararlo."""
+    return normalize_alias(accessor)
+
+def coordinate_key(coordinate):
+    """Devuelve `group:name` de una coordenada `group:name[:version][@ext]`."""
+    parts = coordinate.split("@")[0].split(":")
+    return ":".join(parts[:2]) if len(parts) >= 2 else coordinate
+
+class Block:
+    """Bloque `nombre { ... }` del script con la posición de sus llaves."""
+
+    __slots__ = ("name", "argument", "open", "close", "parent", "open_index", "close_index", "start")
+
+    def __init__(self, name, argument, start, open_index, parent):
+        self.name = name
+        self.argument = argument
+        self.start = start
+        self.open_index = open_index
+        self.open = None
+        self.close = None
+        self.close_index = None
+        self.parent = parent
+
+    @property
+    def depth(self):
+        return 0 if self.parent is None else self.parent.depth + 1
+
+    def matches(self, name):
+        return name in (self.name, self.argument)
+
+class Declaration:
+    """Declaración de una dependencia o plugin dentro de un bloque."""
+
+    __slots__ = ("configuration", "notation", "kind", "key", "start", "end")
+
+    def __init__(self, configuration, notation, kind, key, start, end):
+        self.configuration = configuration
+        self.notation = notation
+        self.kind = kind
+        self.key = key
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Declaration({self.configuration}, {self.notation!r})"
+
+class GradleBuildFile:
+    """
+    Modelo de un build.gradle(.kts) basado en tokens.
+
+    Localiza los bloques por su ruta (p. ej. `dependencies` de primer nivel, sin confundirlo
+    con el de `buildscript`), indexa las dependencias por coordenada `group:name` y por
+    accesor `libs.*`, y los plugins por id. Las ediciones se aplican como parches sobre
+    el texto original.
+    """
+
+    def __init__(self, text, kotlin_dsl=True):
+        self.text = text
+        self.kotlin_dsl = kotlin_dsl
+        self.tokens = tokenize(text)
+        self.blocks = []
+        self.edits = []
+        self._parse_blocks()
+        self.dependencies = self._parse_declarations(self.find_block("dependencies"))
+        self.dependency_index = {}
+        for declaration in self.dependencies:
+            self.dependency_index.setdefault(declaration.key, declaration)
+        self.plugins = self._parse_plugins()
+        self.plugin_index = {declaration.key: declaration for declaration in self.plugins}
+
+    @classmethod
+    def for_path(cls, path, text):
+        return cls(text, kotlin_dsl=path.endswith(".kts"))
+
+    def _parse_blocks(self):
+        stack = []
+        tokens = self.tokens
+        for index, token in enumerate(tokens):
+            if token.kind != "punct":
+                continue
+            if token.text == "{":
+                name, argument, start = self._block_header(index)
+                block = Block(name, argument, start, index, stack[-1] if stack else None)
+                block.open = token.start
+                self.blocks.append(block)
+                stack.append(block)
+            elif token.text == "}" and stack:
+                block = stack.pop()
+                block.close = token.start
+                block.close_index = index
+
+    def _block_header(self, index):
+        """Obtiene el nombre (y el primer argumento) de la llamada que abre un bloque."""
+        tokens = self.tokens
+        previous = index - 1
+        if previous < 0:
+            return None, None, tokens[index].start
+        if tokens[previous].kind == "name":
+            return tokens[previous].text, None, tokens[previous].start
+        if tokens[previous].text == ")":
+            depth = 0
+            position = previous
+            while position >= 0:
+                if tokens[position].text == ")":
+                    depth += 1
+                elif tokens[position].text == "(":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                position -= 1
+            if position > 0 and tokens[position - 1].kind == "name":
+                argument = tokens[position + 1]
+                argument = string_value(argument) if argument.kind == "string" else None
+                return tokens[position - 1].text, argument, tokens[position - 1].start
+        return None, None, tokens[index].start
+
+    def find_block(self, *path):
+        """
+        Busca un bloque por su ruta desde el primer nivel, p. ej.
+        `find_block("android", "buildTypes", "release")`. Devuelve None si no existe.
+        """
+        parent = None
+        block = None
+        for name in path:
+            block = next((block for block in self.blocks if block.parent is parent and block.matches(name)), None)
+            if block is None:
+                return None
+            parent = block
+        return block
+
+    def _statements(self, block):
+        """Agrupa los tokens de primer nivel de un bloque en sentencias (una por línea lógica)."""
+        if block is None or block.close_index is None:
+            return []
+        statements = []
+        current = []
+        depth = 0
+        last_line_end = None
+        for token in self.tokens[block.open_index + 1:block.close_index]:
+            newline_between = last_line_end is not None and "\n" in self.text[last_line_end:token.start]
+            if depth == 0 and current and newline_between and token.text not in ".)" and current[-1].text not in ".,(=":
+                statements.append(current)
+                current = []
+            current.append(token)
+            if token.text in "({[":
+                depth += 1
+            elif token.text in ")}]":
+                depth -= 1
+            last_line_end = token.end
+        if current:
+            statements.append(current)
+        return statements
+
+    def _statement_span(self, statement):
+        """Rango de líneas completas que ocupa una sentencia, incluido el salto de línea final."""
+        start = self.text.rfind("\n", 0, statement[0].start) + 1
+        if self.text[start:statement[0].start].strip():
+            start = statement[0].start
+        end = self.text.find("\n", statement[-1].end)
+        end = len(self.text) if end == -1 else end + 1
+        return start, end
+
+    def _parse_declarations(self, block):
+        declarations = []
+        for statement in self._statements(block):
+            if statement[0].kind != "name" or len(statement) < 2:
+                continue
+            configuration = statement[0].text
+            arguments = statement[1:]
+            if arguments[0].text == "(":
+                # Kotlin DSL o Groovy con paréntesis: configuration(...)
+                depth = 0
+                for position, token in enumerate(arguments):
+                    if token.text == "(":
+                        depth += 1
+                    elif token.text == ")":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                arguments = arguments[1:position]
+            elif arguments[0].text in ".=":
+                continue
+            if not arguments:
+                continue
+            notation = self.text[arguments[0].start:arguments[-1].end]
+            kind, key = self._classify_notation(arguments)
+            start, end = self._statement_span(statement)
+            declarations.append(Declaration(configuration, notation, kind, key, start, end))
+        return declarations
+
+    def _classify_notation(self, arguments):
+        first = arguments[0]
+        if first.kind == "string":
+            return "coordinate", coordinate_key(string_value(first))
+        if first.kind == "name" and first.text in ("platform", "enforcedPlatform") and len(arguments) > 2:
+            kind, key = self._classify_notation(arguments[2:-1])
+            return kind, key
+        if first.kind == "name" and first.text == "project" and len(arguments) > 2 and arguments[2].kind == "string":
+            return "project", string_value(arguments[2])
+        if first.kind == "name" and first.text == "libs":
+            accessor = "".join(token.text for token in arguments if token.kind == "name" or token.text == ".")
+            return "alias", accessor_key(accessor)
+        return "other", "".join(token.text for token in arguments)
+
+    def _parse_plugins(self):
+        plugins = []
+        for statement in self._statements(self.find_block("plugins")):
+            first = statement[0]
+            if first.kind != "name" or len(statement) < 2:
+                continue
+            start, end = self._statement_span(statement)
+            if first.text in ("id", "kotlin"):
+                value = next((token for token in statement[1:] if token.kind == "string"), None)
+                if value is None:
+                    continue
+                plugin_id = string_value(value)
+                if first.text == "kotlin":
+                    plugin_id = KOTLIN_PLUGIN_PREFIX + plugin_id
+                plugins.append(Declaration(first.text, self.text[first.start:statement[-1].end], "id", plugin_id, start, end))
+            elif first.text == "alias":
+                arguments = []
+                for token in statement[2:]:
+                    if token.text == ")":
+                        break
+                    arguments.append(token)
+                accessor = "".join(token.text for token in arguments if token.kind == "name" or token.text == ".")
+                plugins.append(Declaration("alias", self.text[first.start:statement[-1].end], "alias", accessor_key(accessor), start, end))
+        # Sintaxis antigua de Groovy: apply plugin: 'id'
+        for index, token in enumerate(self.tokens[:-3]):
+            if token.text == "apply" and self.tokens[index + 1].text == "plugin" and self.tokens[index + 3].kind == "string":
+                statement = self.tokens[index:index + 4]
+                start, end = self._statement_span(statement)
+                plugins.append(Declaration("apply", self.text[token.start:statement[-1].end], "id", string_value(statement[-1]), start, end))
+        return plugins
+
+    def has_dependency(self, notation):
+        """Indica si ya existe una dependencia con la misma coordenada `group:name` o el mismo accesor."""
+        return self.dependency_key(notation) in self.dependency_index
+
+    @staticmethod
+    def dependency_key(notation):
+        if notation.startswith("libs."):
+            return accessor_key(notation)
+        project = PROJECT_NOTATION_PATTERN.match(notation)
+        if project:
+            return project.group(1)
+        return coordinate_key(notation.strip("\"'"))
+
+    def format_declaration(self, configuration, notation, platform=False):
+        """Devuelve la línea de una dependencia con la sintaxis del script (Kotlin DSL o Groovy)."""
+        if not notation.startswith(("libs.", "project(")):
+            notation = f'"{notation}"' if self.kotlin_dsl else f"'{notation}'"
+        if platform:
+            notation = f"platform({notation})"
+        if self.kotlin_dsl:
+            return f"{configuration}({notation})"
+        return f"{configuration} {notation}"
+
+    def _indentation(self, block, declarations):
+        """Sangría de las declaraciones existentes o la del bloque más cuatro espacios."""
+        if declarations:
+            return re.match(r"[ \t]*", self.text[declarations[-1].start:]).group(0) or " " * 4
+        line_start = self.text.rfind("\n", 0, block.start) + 1
+        return re.match(r"[ \t]*", self.text[line_start:]).group(0) + " " * 4
+
+    def _insert_in_block(self, block, lines, declarations):
+        """Inserta líneas justo antes de la llave de cierre de un bloque."""
+        indentation = self._indentation(block, declarations)
+        body = "".join(f"{indentation}{line}\n" for line in lines)
+        line_start = self.text.rfind("\n", 0, block.close) + 1
+        if self.text[line_start:block.close].strip():
+            # La llave de cierre comparte línea con otro contenido
+            self.edits.append((block.close, block.close, "\n" + body))
+        elif line_start <= block.open:
+            self.edits.append((block.close, block.close, "\n" + body))
+        else:
+            self.edits.append((line_start, line_start, body))
+
+    def add_dependencies(self, declarations):
+        """
+        Añade dependencias al bloque `dependencies` de primer nivel (o lo crea al final).
+
+        Args:
+            declarations (list): Tuplas (configuración, notación) o (configuración,
+                notación, platform). La notación es una coordenada o un accesor `libs.*`.
+
+        Returns:
+            list: Declaraciones añadidas (se omiten las que ya existían).
+        """
+        lines = []
+        added = []
+        for declaration in declarations:
+            configuration, notation = declaration[0], declaration[1]
+            platform = len(declaration) > 2 and declaration[2]
+            key = self.dependency_key(notation)
+            if key in self.dependency_index:
+                continue
+            line = self.format_declaration(configuration, notation, platform)
+            self.dependency_index[key] = Declaration(configuration, notation, "new", key, None, None)
+            lines.append(line)
+            added.append(line)
+        if not lines:
+            return added
+
+        block = self.find_block("dependencies")
+        if block is None:
+            body = "".join(f"    {line}\n" for line in lines)
+            prefix = "" if self.text.endswith("\n") or not self.text else "\n"
+            self.edits.append((len(self.text), len(self.text), f"{prefix}\ndependencies {{\n{body}}}\n"))
+        else:
+            self._insert_in_block(block, lines, self.dependencies)
+        return added
+
+    def remove_dependencies(self, predicate):
+        """Elimina las dependencias para las que `predicate(declaration)` es True."""
+        removed = [declaration for declaration in self.dependencies if declaration.start is not None and predicate(declaration)]
+        for declaration in removed:
+            self.edits.append((declaration.start, declaration.end, ""))
+            self.dependency_index.pop(declaration.key, None)
+        return removed
+
+    def set_dependency_version(self, module, version):
+        """
+        Cambia la versión de las dependencias `module` (`group:name`) declaradas con una
+        coordenada en línea, o la quita si `version` es None. Las coordenadas con
+        interpolaciones (`"$roomVersion"`) no se tocan.
+
+        Returns:
+            bool: True si el fichero cambia.
+        """
+        changed = False
+        for declaration in self.dependencies:
+            if declaration.kind != "coordinate" or declaration.key != module or declaration.start is None:
+                continue
+            token = next((token for token in self.tokens
+                          if declaration.start <= token.start < declaration.end and token.kind == "string"
+                          and coordinate_key(string_value(token)) == module), None)
+            if token is None or "$" in token.text:
+                continue
+            coordinate, _, extension = string_value(token).partition("@")
+            parts = coordinate.split(":")
+            if len(parts) < 3 or parts[2] == version:
+                continue
+            parts = parts[:2] + ([version] if version else []) + parts[3:]
+            value = ":".join(parts) + (f"@{extension}" if extension else "")
+            quote = token.text[0]
+            self.edits.append((token.start, token.end, f"{quote}{value}{quote}"))
+            changed = True
+        return changed
+
+    def has_plugin(self, plugin_id):
+        return plugin_id in self.plugin_index or accessor_key(plugin_id) in self.plugin_index
+
+    def add_plugins(self, lines):
+        """Añade líneas al bloque `plugins` (p. ej. `id("com.google.devtools.ksp")`)."""
+        block = self.find_block("plugins")
+        if block is not None:
+            self._insert_in_block(block, lines, self.plugins)
+            return
+        body = "".join(f"    {line}\n" for line in lines)
+        position = self._plugins_position()
+        if position == 0:
+            self.edits.append((0, 0, f"plugins {{\n{body}}}\n\n"))
+        else:
+            self.edits.append((position, position, f"\n\nplugins {{\n{body}}}"))
+
+    def _plugins_position(self):
+        """
+        Posición para un bloque `plugins` nuevo: Gradle solo admite antes los imports y los
+        bloques `buildscript` y `pluginManagement`, así que va detrás de ellos (o al principio).
+        """
+        position = 0
+        first_block = min((block.start for block in self.blocks), default=len(self.text))
+        for token in self.tokens:
+            if token.start >= first_block:
+                break
+            if token.kind == "name" and token.text == "import":
+                newline = self.text.find("\n", token.end)
+                position = len(self.text) if newline == -1 else newline
+        for block in self.blocks:
+            if block.parent is None and block.name in ("buildscript", "pluginManagement") and block.close is not None:
+                position = max(position, block.close + 1)
+        return position
+
+    def remove_plugins(self, plugin_ids):
+        """Elimina los plugins cuyos ids están en `plugin_ids`."""
+        removed = [plugin for plugin in self.plugins if plugin.key in plugin_ids]
+        for plugin in removed:
+            self.edits.append((plugin.start, plugin.end, ""))
+            self.plugin_index.pop(plugin.key, None)
+        return removed
+
+    def get_property(self, path, name):
+        """
+        Devuelve el valor de `name = valor` (o `name valor` en Groovy) en el bloque `path`,
+        p. ej. `get_property(("android", "buildFeatures"), "viewBinding")`. None si no está.
+        """
+        statement = self._find_property(self.find_block(*path), name)
+        if statement is None:
+            return None
+        values = statement[2:] if statement[1].text == "=" else statement[1:]
+        return self.text[values[0].start:values[-1].end] if values else None
+
+    def _find_property(self, block, name):
+        for statement in self._statements(block):
+            if statement[0].kind == "name" and statement[0].text == name and len(statement) > 1 and statement[1].text not in "({.":
+                return statement
+        return None
+
+    def set_property(self, path, name, value):
+        """
+        Asigna una propiedad en el bloque `path`, creando los bloques que falten
+        (p. ej. `buildFeatures` dentro de `android`).
+
+        Returns:
+            bool: True si el fichero cambia.
+        """
+        block = self.find_block(*path)
+        if block is not None:
+            statement = self._find_property(block, name)
+            if statement is not None:
+                values = statement[2:] if statement[1].text == "=" else statement[1:]
+                if self.text[values[0].start:values[-1].end] == value:
+                    return False
+                self.edits.append((values[0].start, values[-1].end, value))
+                return True
+        self.add_to_block(path, [f"{name} = {value}" if self.kotlin_dsl else f"{name} {value}"])
+        return True
+
+    def _find_call(self, block, name):
+        for statement in self._statements(block):
+            if statement[0].kind == "name" and statement[0].text == name and len(statement) > 1 and statement[1].text not in "=.{":
+                return statement
+        return None
+
+    def get_call(self, path, name):
+        """Texto de la llamada `name(...)` (o `name ...` en Groovy) del bloque `path`, o None si no está."""
+        statement = self._find_call(self.find_block(*path), name)
+        return self.text[statement[0].start:statement[-1].end] if statement else None
+
+    def get_call_strings(self, path, name):
+        """
+        Cadenas pasadas directamente a la llamada `name(...)` (o `name ...` en Groovy) del
+        bloque `path`, sin las de llamadas anidadas: para `proguardFiles(getDefaultProguardFile(
+        "proguard-android-optimize.txt"), "proguard-rules.pro")` devuelve `["proguard-rules.pro"]`.
+        None si el bloque no hace la llamada.
+        """
+        statement = self._find_call(self.find_block(*path), name)
+        if statement is None:
+            return None
+        arguments = statement[2:-1] if statement[1].text == "(" else statement[1:]
+        depth = 0
+        values = []
+        for token in arguments:
+            if token.text in "([":
+                depth += 1
+            elif token.text in ")]":
+                depth -= 1
+            elif token.kind == "string" and depth == 0:
+                values.append(string_value(token))
+        return values
+
+    def set_call(self, path, name, arguments):
+        """
+        Sustituye la llamada `name(...)` del bloque `path` por `name(arguments)` (`name arguments`
+        en Groovy) o la añade si no está.
+
+        Returns:
+            bool: True si el fichero cambia.
+        """
+        line = f"{name}({arguments})" if self.kotlin_dsl else f"{name} {arguments}"
+        statement = self._find_call(self.find_block(*path), name)
+        if statement is None:
+            self.add_to_block(path, [line])
+            return True
+        if self.text[statement[0].start:statement[-1].end] == line:
+            return False
+        self.edits.append((statement[0].start, statement[-1].end, line))
+        return True
+
+    def add_to_block(self, path, lines):
+        """
+        Añade líneas al final del bloque `path`, creando los bloques que falten
+        (p. ej. `add_to_block(("android", "buildTypes"), [...])`).
+        """
+        block = self.find_block(*path)
+        if block is not None:
+            self._insert_in_block(block, lines, [])
+            return
+
+        # Bloque más profundo de la ruta que ya existe
+        depth = len(path) - 1
+        while depth > 0 and self.find_block(*path[:depth]) is None:
+            depth -= 1
+        parent = self.find_block(*path[:depth]) if depth else None
+        for block_name in reversed(path[depth:]):
+            lines = [f"{block_name} {{"] + [f"    {line}" for line in lines] + ["}"]
+        if parent is None:
+            body = "".join(f"{line}\n" for line in lines)
+            prefix = "" if self.text.endswith("\n") or not self.text else "\n"
+            self.edits.append((len(self.text), len(self.text), f"{prefix}\n{body}"))
+        else:
+            self._insert_in_block(parent, lines, [])
+
+    @property
+    def changed(self):
+        return bool(self.edits)
+
+    def to_text(self):
+        """Aplica los parches al texto original."""
+        if not self.edits:
+            return self.text
+        output = []
+        position = 0
+        for start, end, replacement in sorted(self.edits, key=lambda edit: (edit[0], edit[1])):
+            if start < position:
+                start = position
+            output.append(self.text[position:start])
+            output.append(replacement)
+            position = max(position, end)
+        output.append(self.text[position:])
+        return "".join(output)
@@ -0,0 +1,372 @@
+import os
+import re
+
+from project_inspector import inspect_project
+from tracing import traced
+from version_resolver import version_key
+from workspace import open_workspace
+
+# Cabecera del bloque con las claves que se añaden al final de gradle.properties
+TUNING_HEADER = "# Rendimiento de la compilación (ajustado al equipo)"
+# Flags de la JVM que se añaden si faltan en org.gradle.jvmargs
+GRADLE_JVM_FLAGS = ("-XX:+HeapDumpOnOutOfMemoryError", "-Dfile.encoding=UTF-8")
+# Gradle usa esta clave para la configuration cache desde la 8.1; antes era experimental
+CONFIGURATION_CACHE_KEYS = ("org.gradle.configuration-cache", "org.gradle.unsafe.configuration-cache")
+STABLE_CONFIGURATION_CACHE = "8.1"
+# Límites del heap (MiB): por encima de 8 GB el daemon de Gradle no compila más rápido
+GRADLE_HEAP_LIMITS = (1024, 8192)
+KOTLIN_HEAP_LIMITS = (1024, 4096)
+# Heap base del daemon de Gradle y lo que suma cada módulo (MiB)
+GRADLE_HEAP_BASE = 2048
+GRADLE_HEAP_PER_MODULE = 64
+
+PROPERTY_PATTERN = re.compile(r"^(\s*)((?:\\.|[^\s=:\\])+)(\s*[=:]\s*|\s+|$)(.*)$")
+DISTRIBUTION_PATTERN = re.compile(r"gradle-(\d+(?:\.\d+)*)(?:-[\w.-]+)?-(?:bin|all)\.zip")
+HEAP_PATTERN = re.compile(r"^-Xmx(\d+)([kKmMgG]?)$")
+METASPACE_PATTERN = re.compile(r"^-XX:MaxMetaspaceSize=(\d+)([kKmMgG]?)$")
+
+class PropertyEntry:
+    """Clave de gradle.properties con las líneas (inicio y fin exclusivo) que ocupa."""
+
+    def __init__(self, key, value, start, end, prefix, separator):
+        self.key = key
+        self.value = value
+        self.start = start
+        self.end = end
+        self.prefix = prefix
+        self.separator = separator
+
+def _continues(line):
+    """Indica si la línea sigue en la siguiente (acaba en un número impar de `\\`)."""
+    stripped = line.rstrip("\r\n")
+    return (len(stripped) - len(stripped.rstrip("\\"))) % 2 == 1
+
+class GradleProperties:
+    """
+    Modelo de un fichero gradle.properties que conserva el texto original.
+
+    Los comentarios, las líneas en blanco y el orden de las claves no cambian: al
+    modificar una clave solo se reescriben sus líneas, y las claves nuevas se añaden al
+    final bajo `TUNING_HEADER`.
+    """
+
+    def __init__(self, text=""):
+        self.lines = text.splitlines(keepends=True)
+        if self.lines and not self.lines[-1].endswith("\n"):
+            self.lines[-1] += "\n"
+        self.original_text = text
+        self.entries = {}
+        self.replacements = {}
+        self.additions = []
+        self._parse()
+
+    @classmethod
+    def load(cls, path, workspace=None):
+        """Lee el fichero (a través del workspace si se indica). Si no existe se crea uno vacío."""
+        with open_workspace(workspace) as workspace:
+            if not workspace.exists(path):
+                return cls("")
+            return cls(workspace.read(path))
+
+    def _parse(self):
+        index = 0
+        while index < len(self.lines):
+            start = index
+            line = self.lines[index]
+            logical = line.rstrip("\r\n")
+            while _continues(self.lines[index]) and index + 1 < len(self.lines):
+                index += 1
+                logical = logical[:-1] + self.lines[index].strip()
+            index += 1
+            if not logical.strip() or logical.lstrip().startswith(("#", "!")):
+                continue
+            match = PROPERTY_PATTERN.match(logical)
+            if match:
+                prefix, key, separator, value = match.groups()
+                key = re.sub(r"\\(.)", r"\1", key)
+                # Si una clave se repite, Gradle usa la última
+                self.entries[key] = PropertyEntry(key, value.strip(), start, index, prefix, separator)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        return entry.value if entry is not None else None
+
+    def has(self, key):
+        return key in self.entries
+
+    def set(self, key, value):
+        """
+        Asigna un valor a la clave, editando su línea si ya existe.
+
+        Returns:
+            bool: True si el valor ha cambiado.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.value == value:
+                return False
+            self.replacements[entry.start] = (entry.end, f"{entry.prefix}{key}{entry.separator}{value}\n")
+            entry.value = value
+            return True
+        self.additions.append(f"{key}={value}\n")
+        self.entries[key] = PropertyEntry(key, value, None, None, "", "=")
+        return True
+
+    @property
+    def changed(self):
+        return bool(self.replacements or self.additions)
+
+    def to_text(self):
+        """Devuelve el contenido del fichero con los cambios aplicados."""
+        if not self.changed:
+            return self.original_text
+        output = []
+        index = 0
+        while index < len(self.lines):
+            if index in self.replacements:
+                index, line = self.replacements[index]
+                output.append(line)
+                continue
+            output.append(self.lines[index])
+            index += 1
+        if self.additions:
+            if output and output[-1].strip():
+                output.append("\n")
+            if TUNING_HEADER + "\n" not in output:
+                output.append(TUNING_HEADER + "\n")
+            output.extend(self.additions)
+        return "".join(output)
+
+    def save(self, path, workspace=None):
+        """
+        Guarda el fichero si hay cambios.
+
+        Returns:
+            bool: True si había cambios que guardar.
+        """
+        with open_workspace(workspace) as workspace:
+            if not self.changed:
+                return False
+            workspace.write(path, self.to_text())
+        return True
+
+def _read_first_line(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return file.readline().strip()
+    except OSError:
+        return None
+
+def _cgroup_cpus():
+    """CPUs asignadas por la cuota de cgroups (contenedores), o None si no hay límite."""
+    quota = _read_first_line("/sys/fs/cgroup/cpu.max")
+    if quota:
+        limit, _, period = quota.partition(" ")
+        if limit != "max" and period:
+            return max(1, int(int(limit) / int(period)))
+        return None
+    limit, period = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"), _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if limit and period and int(limit) > 0:
+        return max(1, int(int(limit) / int(period)))
+    return None
+
+def _cgroup_memory():
+    """Límite de memoria de cgroups en MiB, o None si no hay límite."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        value = _read_first_line(path)
+        if value and value.isdigit() and int(value) < 1 << 60:
+            return int(value) // (1024 * 1024)
+    return None
+
+def _physical_memory():
+    """Memoria física total en MiB, o None si no se puede saber (p. ej. en Windows)."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def host_resources():
+    """
+    CPUs y memoria que puede usar la compilación en este equipo, teniendo en cuenta la
+    afinidad del proceso y los límites de cgroups cuando se ejecuta en un contenedor.
+
+    Returns:
+        dict: `cpus` (usables), `total_cpus` y `memory_mib` (None si no se conoce).
+    """
+    total_cpus = os.cpu_count() or 1
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else total_cpus
+    cgroup_cpus = _cgroup_cpus()
+    if cgroup_cpus:
+        cpus = min(cpus, cgroup_cpus)
+    memory = [value for value in (_physical_memory(), _cgroup_memory()) if value]
+    return {"cpus": cpus, "total_cpus": total_cpus, "memory_mib": min(memory) if memory else None}
+
+def gradle_version(project_path):
+    """Versión de Gradle del wrapper del proyecto, o None si no tiene wrapper."""
+    path = os.path.join(project_path, "gradle", "wrapper", "gradle-wrapper.properties")
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            url = GradleProperties(file.read()).get("distributionUrl") or ""
+    except OSError:
+        return None
+    match = DISTRIBUTION_PATTERN.search(url)
+    return match.group(1) if match else None
+
+def _to_mib(amount, unit):
+    factor = {"": 1 / (1024 * 1024), "k": 1 / 1024, "m": 1, "g": 1024}[unit.lower()]
+    return int(int(amount) * factor)
+
+def _format_mib(mib):
+    return f"{mib // 1024}g" if mib % 1024 == 0 else f"{mib}m"
+
+def _round_up(mib, step=512):
+    return -(-mib // step) * step
+
+def _clamp(value, limits, budget):
+    low, high = limits
+    return max(low, min(value, high, budget))
+
+def _merge_jvm_args(current, heap_mib, heap_limit=None, metaspace_mib=None, extra=()):
+    """
+    Sustituye el heap y el metaspace de unos argumentos de la JVM y conserva el resto.
+    Un heap mayor que el recomendado se mantiene (lo decidió el proyecto) mientras no
+    pase de `heap_limit`, igual que un metaspace mayor.
+    """
+    tokens = (current or "").split()
+    heap, metaspace, metaspace_token, others = None, None, None, []
+    for token in tokens:
+        heap_match, metaspace_match = HEAP_PATTERN.match(token), METASPACE_PATTERN.match(token)
+        if heap_match:
+            heap = _to_mib(*heap_match.groups())
+        elif metaspace_match:
+            metaspace, metaspace_token = _to_mib(*metaspace_match.groups()), token
+        else:
+            others.append(token)
+    if heap and heap > heap_mib and (heap_limit is None or heap <= heap_limit):
+        heap_mib = heap
+    arguments = [f"-Xmx{_format_mib(heap_mib)}"]
+    if metaspace_mib:
+        arguments.append(f"-XX:MaxMetaspaceSize={_format_mib(max(metaspace_mib, metaspace or 0))}")
+    elif metaspace_token:
+        # Sin recomendación (p. ej. el daemon de Kotlin) se conserva el del proyecto
+        arguments.append(metaspace_token)
+    arguments += others + [flag for flag in extra if flag not in others]
+    return " ".join(arguments)
+
+def recommend_properties(properties, host, module_count, gradle=None):
+    """
+    Valores recomendados para las claves de rendimiento, a partir de los recursos del
+    equipo, el número de módulos y la versión de Gradle.
+
+    El heap del daemon de Gradle crece con el número de módulos hasta un cuarto de la
+    memoria del equipo, y el del daemon de Kotlin es la mitad, porque el IDE y el
+    emulador también la necesitan. Los heaps mayores que ya tenga el proyecto se
+    conservan si caben en la mitad de la memoria.
+
+    Returns:
+        dict: clave -> valor recomendado (en el orden en que se añaden).
+    """
+    memory = host["memory_mib"]
+    gradle_budget = _clamp(memory // 4 // 256 * 256, GRADLE_HEAP_LIMITS, GRADLE_HEAP_LIMITS[1]) if memory \
+        else GRADLE_HEAP_LIMITS[1]
+    gradle_heap = _clamp(_round_up(GRADLE_HEAP_BASE + GRADLE_HEAP_PER_MODULE * module_count), GRADLE_HEAP_LIMITS,
+                         gradle_budget)
+    kotlin_heap = _clamp(_round_up(gradle_heap // 2), KOTLIN_HEAP_LIMITS, max(gradle_budget // 2, KOTLIN_HEAP_LIMITS[0]))
+    heap_limit = memory // 2 if memory else None
+    metaspace = 1024 if module_count > 10 else 512
+
+    if gradle and version_key(gradle) < version_key(STABLE_CONFIGURATION_CACHE):
+        configuration_cache = CONFIGURATION_CACHE_KEYS[1]
+    else:
+        configuration_cache = CONFIGURATION_CACHE_KEYS[0]
+
+    recommended = {}
+    if host["cpus"] > 1 and module_count > 1:
+        recommended["org.gradle.parallel"] = "true"
+    if host["cpus"] < host["total_cpus"]:
+        # Gradle usa tantos workers como CPU tiene el equipo, aunque el contenedor tenga menos
+        recommended["org.gradle.workers.max"] = str(host["cpus"])
+    recommended["org.gradle.caching"] = "true"
+    recommended[configuration_cache] = "true"
+    recommended["org.gradle.jvmargs"] = _merge_jvm_args(properties.get("org.gradle.jvmargs"), gradle_heap, heap_limit,
+                                                        metaspace, GRADLE_JVM_FLAGS)
+    recommended["kotlin.daemon.jvmargs"] = _merge_jvm_args(properties.get("kotlin.daemon.jvmargs"), kotlin_heap,
+                                                           heap_limit and heap_limit // 2)
+    recommended["android.nonTransitiveRClass"] = "true"
+    return recommended
+
+def plan_gradle_properties(project_path, host=None, workspace=None):
+    """
+    Calcula los cambios de gradle.properties sin escribir nada.
+
+    Las opciones que el proyecto desactiva de forma explícita (`false`) se respetan: la
+    configuration cache o las clases R no transitivas pueden romper la compilación de
+    algunos proyectos.
+
+    Returns:
+        tuple: (ruta de gradle.properties, GradleProperties con los cambios aplicados,
+        lista de cambios como dicts con `key`, `old` y `new`, claves respetadas)
+    """
+    project_path = os.path.abspath(project_path)
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        raise ValueError("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+    path = model.gradle_properties or os.path.join(project_path, "gradle.properties")
+    host = host or host_resources()
+
+    with open_workspace(workspace) as workspace:
+        properties = GradleProperties.load(path, workspace)
+    # Si el proyecto ya usa la otra clave de la configuration cache, se edita esa
+    legacy = next((key for key in CONFIGURATION_CACHE_KEYS if properties.has(key)), None)
+    recommended = recommend_properties(properties, host, len(model.modules), gradle_version(project_path))
+
+    changes, kept = [], []
+    for key, value in recommended.items():
+        if key in CONFIGURATION_CACHE_KEYS and legacy:
+            key = legacy
+        old = properties.get(key)
+        if value == "true" and old is not None and old.lower() == "false":
+            kept.append(key)
+            continue
+        if properties.set(key, value):
+            changes.append({"key": key, "old": old, "new": value})
+    return path, properties, changes, kept
+
+def describe_gradle_properties_changes(changes, kept=()):
+    """Líneas legibles con cada cambio de gradle.properties."""
+    lines = [f"{change['key']}: {change['old'] if change['old'] is not None else '(sin definir)'} → {change['new']}"
+             for change in changes]
+    lines += [f"{key}: se mantiene desactivado (false) en el proyecto" for key in kept]
+    return lines
+
+@traced
+def tune_gradle_properties(project_path, host=None, workspace=None):
+    """
+    Ajusta gradle.properties a los recursos del equipo y al tamaño del proyecto: ejecución
+    en paralelo, caché de compilación, configuration cache, memoria de los daemons de
+    Gradle y Kotlin, y clases R no transitivas. El resto de claves y los comentarios se
+    conservan. Cada cambio se muestra por pantalla.
+
+    Args:
+        host (dict | None): Recursos del equipo (ver `host_resources`). Si es None se detectan.
+        workspace (Workspace | None): Workspace compartido. Si es None el fichero se escribe al terminar.
+
+    Returns:
+        list: Cambios aplicados como dicts con `key`, `old` y `new`.
+
+    Raises:
+        ValueError: Si el directorio no es un proyecto Android.
+    """
+    host = host or host_resources()
+    with open_workspace(workspace) as workspace:
+        path, properties, changes, kept = plan_gradle_properties(project_path, host, workspace)
+        properties.save(path, workspace)
+
+    memory = f"{host['memory_mib'] / 1024:.1f} GB" if host["memory_mib"] else "memoria desconocida"
+    if changes:
+        print(f"gradle.properties ajustado al equipo ({host['cpus']} CPU, {memory}):")
+    else:
+        print(f"✔️ gradle.properties ya está ajustado al equipo ({host['cpus']} CPU, {memory}).")
+    for line in describe_gradle_properties_changes(changes, kept):
+        print(f"   {line}")
+    return changes
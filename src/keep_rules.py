@@ -0,0 +1,196 @@
+import os
+
+from dependency_catalog import load_catalog
+from generate_dependencies import has_plugin, project_dependencies, split_coordinate
+from gradle_parser import GradleBuildFile
+from project_inspector import inspect_project
+from tracing import traced
+from version_catalog import VersionCatalog
+from workspace import open_workspace
+
+ANDROID_LIBRARY_PLUGIN_ID = "com.android.library"
+RELEASE_BUILD_TYPE = ("android", "buildTypes", "release")
+DEFAULT_CONFIG = ("android", "defaultConfig")
+# Reglas de AGP con las optimizaciones de R8 activadas (`proguard-android.txt` las desactiva)
+OPTIMIZE_PROGUARD_FILE = "proguard-android-optimize.txt"
+APP_RULES_FILE = "proguard-rules.pro"
+CONSUMER_RULES_FILE = "consumer-rules.pro"
+
+def split_rules(text):
+    """
+    Divide un fichero de reglas de ProGuard/R8 en reglas normalizadas para compararlas:
+    sin comentarios y con los espacios colapsados. Cada regla empieza por `-` y continúa
+    en las líneas siguientes que no empiezan por `-` (p. ej. su cuerpo `{ ... }`).
+    """
+    rules = []
+    current = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("-") and current:
+            rules.append(" ".join(current))
+            current = []
+        current.extend(line.split())
+    if current:
+        rules.append(" ".join(current))
+    return rules
+
+def _fragment_title(catalog, fragment, version):
+    group, name = fragment.module.split(":")
+    artifacts = catalog.find(group, name)
+    title = catalog.groups[artifacts[0].group_id][0] if artifacts else fragment.module
+    title = f"{title} ({fragment.module}:{version})" if version else f"{title} ({fragment.module})"
+    return f"{title}: {fragment.note}" if fragment.note else title
+
+def collect_keep_rules(dependencies, package=None, catalog=None):
+    """
+    Fragmentos de reglas que necesitan las dependencias según el catálogo de dependencias
+    y su versión, en el orden de la selección. `{package}` se sustituye por el paquete del
+    módulo; sin paquete, los fragmentos que lo usan se omiten con un aviso.
+
+    Returns:
+        list: Tuplas (título, reglas).
+    """
+    catalog = catalog or load_catalog()
+    fragments = []
+    for dependency in dependencies:
+        group, name, version = split_coordinate(dependency)
+        for fragment in catalog.keep_rules_for(group, name, version):
+            rules = list(fragment.rules)
+            if any("{package}" in rule for rule in rules):
+                if not package:
+                    print(f"⚠️  No se encontró el paquete del módulo: añade a mano las reglas de los modelos de {fragment.module}.")
+                    continue
+                rules = [rule.replace("{package}", package) for rule in rules]
+            fragments.append((_fragment_title(catalog, fragment, version), rules))
+    return fragments
+
+def merge_keep_rules(text, fragments):
+    """
+    Añade los fragmentos al final del fichero de reglas, cada uno precedido de un
+    comentario con la librería. Se omiten las reglas que el fichero (u otro fragmento)
+    ya contiene, y los fragmentos que se quedan sin reglas nuevas.
+
+    Returns:
+        tuple: (texto resultante, número de reglas añadidas)
+    """
+    known = set(split_rules(text))
+    blocks = []
+    added = 0
+    for title, rules in fragments:
+        new_rules = []
+        for rule in rules:
+            key = " ".join(rule.split())
+            if key not in known:
+                known.add(key)
+                new_rules.append(rule)
+        if new_rules:
+            blocks.append("".join(f"{line}\n" for line in [f"# {title}"] + new_rules))
+            added += len(new_rules)
+    if not blocks:
+        return text, 0
+    if text and not text.endswith("\n"):
+        text += "\n"
+    return text + ("\n" if text.strip() else "") + "\n".join(blocks), added
+
+def enable_minification(gradle_file, rules_name=APP_RULES_FILE):
+    """
+    Activa R8 en el build type `release` de una aplicación: minificación, eliminación de
+    recursos sin usar y las reglas de AGP con optimizaciones más `rules_name`.
+
+    Returns:
+        list: Líneas añadidas o cambiadas (vacía si ya estaba activado).
+    """
+    kotlin_dsl = gradle_file.kotlin_dsl
+    quote = '"' if kotlin_dsl else "'"
+    flags = ("isMinifyEnabled", "isShrinkResources") if kotlin_dsl else ("minifyEnabled", "shrinkResources")
+    files = gradle_file.get_call_strings(RELEASE_BUILD_TYPE, "proguardFiles") or []
+    names = files if rules_name in files else files + [rules_name]
+    arguments = ", ".join([f"getDefaultProguardFile({quote}{OPTIMIZE_PROGUARD_FILE}{quote})"]
+                          + [f"{quote}{name}{quote}" for name in names])
+    call = f"proguardFiles({arguments})" if kotlin_dsl else f"proguardFiles {arguments}"
+
+    if gradle_file.find_block(*RELEASE_BUILD_TYPE) is None:
+        # Todas las líneas en un único bloque `release` nuevo
+        lines = [f"{flag} = true" if kotlin_dsl else f"{flag} true" for flag in flags] + [call]
+        gradle_file.add_to_block(RELEASE_BUILD_TYPE, lines)
+        return lines
+
+    changes = []
+    for flag in flags:
+        if gradle_file.get_property(RELEASE_BUILD_TYPE, flag) != "true":
+            gradle_file.set_property(RELEASE_BUILD_TYPE, flag, "true")
+            changes.append(f"{flag} = true" if kotlin_dsl else f"{flag} true")
+    current = gradle_file.get_call(RELEASE_BUILD_TYPE, "proguardFiles")
+    if current is None or OPTIMIZE_PROGUARD_FILE not in current or rules_name not in files:
+        gradle_file.set_call(RELEASE_BUILD_TYPE, "proguardFiles", arguments)
+        changes.append(call)
+    return changes
+
+@traced
+def add_keep_rules(project_path, dependencies=None, module="app", minify=False, workspace=None):
+    """
+    Escribe en el fichero de reglas del módulo las reglas de R8/ProGuard que necesitan sus
+    dependencias (fragmentos del catálogo de dependencias según la versión de cada una),
+    sin repetir las que ya tiene.
+
+    En una aplicación las reglas van al fichero de `proguardFiles` del build type `release`
+    (`proguard-rules.pro` por defecto); en una librería, a su `consumerProguardFiles`
+    (`consumer-rules.pro`, que se declara si falta) para que R8 las aplique al compilar la app.
+
+    Args:
+        dependencies (list | None): Coordenadas `group:name[:version]`. Si es None se usan
+            las que ya declaran libs.versions.toml y el build.gradle del módulo.
+        module (str): Directorio o nombre Gradle del módulo (por defecto `app`).
+        minify (bool): Activa la minificación y la eliminación de recursos en `release`
+            (ver `enable_minification`). Solo en aplicaciones.
+        workspace (Workspace | None): Workspace compartido. Si es None, los cambios se
+            escriben juntos al terminar.
+    """
+    project_path = os.path.abspath(project_path)
+    info = inspect_project(project_path).module(module)
+    if info is None or not info["build_file"]:
+        print(f"No se encontró el archivo build.gradle.kts o build.gradle en el módulo {module}.")
+        return
+
+    with open_workspace(workspace) as workspace:
+        if dependencies is None:
+            dependencies = [f"{dependency.module}:{dependency.version}" if dependency.version else dependency.module
+                            for dependency in project_dependencies(project_path, (info["directory"],), workspace)]
+        gradle_file = GradleBuildFile.for_path(info["build_file"], workspace.read(info["build_file"]))
+        versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
+        catalog = VersionCatalog.load(versions_toml_path, workspace) if workspace.exists(versions_toml_path) else None
+        library = has_plugin(gradle_file, catalog, (ANDROID_LIBRARY_PLUGIN_ID,))
+
+        if library:
+            files = gradle_file.get_call_strings(DEFAULT_CONFIG, "consumerProguardFiles")
+            if minify:
+                print(f"⚠️  {module} es una librería: la minificación se activa en el módulo de la app.")
+        else:
+            files = gradle_file.get_call_strings(RELEASE_BUILD_TYPE, "proguardFiles")
+        rules_name = files[0] if files else (CONSUMER_RULES_FILE if library else APP_RULES_FILE)
+        rules_path = os.path.join(info["path"], *rules_name.split("/"))
+
+        fragments = collect_keep_rules(dependencies, info["package"])
+        text = workspace.read(rules_path) if workspace.exists(rules_path) else ""
+        text, added = merge_keep_rules(text, fragments)
+        if added:
+            workspace.write(rules_path, text)
+            print(f"Reglas de R8 añadidas a {rules_path}: {added}.")
+            if library and not files:
+                quote = '"' if gradle_file.kotlin_dsl else "'"
+                gradle_file.set_call(DEFAULT_CONFIG, "consumerProguardFiles", f"{quote}{rules_name}{quote}")
+        elif fragments:
+            print(f"✔️ {rules_path} ya tiene las reglas de R8 de las dependencias.")
+
+        changes = enable_minification(gradle_file, rules_name) if minify and not library else []
+        if changes:
+            print(f"R8 activado en el build type release de {info['build_file']}:")
+            for line in changes:
+                print(f"- {line}")
+        elif added and not library and files is None:
+            print(f"⚠️  El build type release no declara proguardFiles: {rules_name} no se aplica hasta que se añada "
+                  "(o se active la minificación).")
+        if gradle_file.changed:
+            workspace.write(info["build_file"], gradle_file.to_text())
@@ -1,9 +1,295 @@
+import argparse
 import os
 from generate_android_architecture import *
 from generate_dependencies import *
+from dependency_catalog import CATALOG_ENV, load_catalog
+from execution_plan import ExecutionPlan, execute_plan, plan_architecture, plan_dependencies, plan_startup_profiling
+from project_inspector import inspect_project
+from template_registry import TEMPLATES_ENV, configure_templates
+from tracing import TRACE_ENV, enable as enable_tracing
+from version_resolver import VersionResolver, resolve_versions
 
-def main() -> None:
+def parse_args(argv=None):
+    """Define los subcomandos no interactivos. Sin subcomando se usa el menú interactivo."""
+    parser = argparse.ArgumentParser(description="Configurador de arquitecturas para proyectos Android.")
+    parser.add_argument("--templates", action="append", default=[],
+                        help="Directorio con plantillas propias que sustituyen a las incluidas (se puede repetir).")
+    parser.add_argument("--dependency-catalog",
+                        help="Fichero JSON con el catálogo de dependencias a usar en lugar del incluido.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="En el modo interactivo, muestra el plan de cambios sin aplicarlo.")
+    parser.add_argument("--save-plan", metavar="RUTA",
+                        help="En el modo interactivo, guarda el plan en JSON para aplicarlo después con `apply`.")
+    parser.add_argument("--trace", metavar="PREFIJO",
+                        help="Registra el tiempo y la E/S de cada fase y guarda PREFIJO.json y PREFIJO.trace.json (Chrome trace).")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="Configura varios proyectos en paralelo desde un fichero de especificación.")
+    batch_parser.add_argument("spec", help="Fichero JSON/YAML con la lista de proyectos.")
+    batch_parser.add_argument("--workers", type=int, help="Número máximo de procesos en paralelo.")
+    batch_parser.add_argument("--report", help="Ruta donde guardar el resultado de cada proyecto en JSON.")
+
+    modules_parser = subparsers.add_parser("modules", help="Añade la arquitectura a varios módulos de settings.gradle en paralelo.")
+    modules_parser.add_argument("project", help="Ruta del proyecto Android.")
+    modules_parser.add_argument("--architecture", required=True, choices=["MVP", "MVVM", "MVI"], type=str.upper)
+    modules_parser.add_argument("--modules", help="Módulos separados por comas (p. ej. :feature:home,:core). Por defecto, todos.")
+    modules_parser.add_argument("--compose", action="store_true", help="Genera las vistas con Jetpack Compose.")
+    modules_parser.add_argument("--dependencies", help="Grupos de dependencias separados por comas (número o nombre).")
+    modules_parser.add_argument("--permissions", help="Permisos separados por comas (p. ej. INTERNET,CAMERA).")
+    modules_parser.add_argument("--replace-existing", action="store_true", help="Reemplaza la arquitectura existente.")
+    modules_parser.add_argument("--workers", type=int, help="Número máximo de procesos en paralelo.")
+    modules_parser.add_argument("--startup-profiling", action="store_true",
+                                help="Añade los módulos :baselineprofile y :macrobenchmark para el arranque de la app.")
+    modules_parser.add_argument("--minify", action="store_true",
+                                help="Activa R8 (minificación y eliminación de recursos) en el build type release de la app.")
+    modules_parser.add_argument("--resolve-versions", action="store_true",
+                                help="Usa la versión estable más reciente disponible en las cachés locales de Maven/Gradle.")
+
+    search_parser = subparsers.add_parser("search", help="Busca artefactos en el catálogo de dependencias.")
+    search_parser.add_argument("text", nargs="?", default="", help="Palabras (o prefijos) a buscar.")
+    search_parser.add_argument("--category", help="Muestra solo los grupos de esta categoría.")
+
+    versions_parser = subparsers.add_parser("versions", help="Consulta las versiones disponibles en las cachés locales de Maven/Gradle.")
+    versions_parser.add_argument("coordinates", nargs="*", help="Artefactos `group:name` a consultar.")
+    versions_parser.add_argument("--repository", action="append", default=[],
+                                 help="Repositorio local a indexar (se puede repetir). Por defecto, ~/.m2 y la caché de Gradle.")
+    versions_parser.add_argument("--refresh", action="store_true", help="Actualiza el índice antes de consultar.")
+    versions_parser.add_argument("--full", action="store_true", help="Vuelve a escanear todos los directorios.")
+    versions_parser.add_argument("--workers", type=int, help="Número máximo de procesos para el escaneo.")
+
+    features_parser = subparsers.add_parser("features", help="Genera pantallas completas (vista, lógica y repositorio) para varias features.")
+    features_parser.add_argument("project", help="Ruta del proyecto Android.")
+    features_parser.add_argument("names", nargs="*", help="Nombres de las features (p. ej. Home UserProfile).")
+    features_parser.add_argument("--spec", help="Fichero JSON/YAML con la lista de features.")
+    features_parser.add_argument("--architecture", choices=["MVP", "MVVM", "MVI"], type=str.upper,
+                                 help="Arquitectura a usar. Por defecto, la detectada en el módulo.")
+    features_parser.add_argument("--compose", action="store_true", help="Genera las vistas con Jetpack Compose.")
+    features_parser.add_argument("--module", help="Directorio del módulo (por defecto `app`).")
+    features_parser.add_argument("--package", help="Paquete base. Por defecto, el detectado en el módulo.")
+    features_parser.add_argument("--workers", type=int, help="Número máximo de procesos para el renderizado.")
+
+    viewbinding_parser = subparsers.add_parser("viewbinding", help="Migra los imports sintéticos de kotlin-android-extensions a View Binding.")
+    viewbinding_parser.add_argument("project", help="Ruta del proyecto Android.")
+    viewbinding_parser.add_argument("--modules", help="Módulos separados por comas. Por defecto, todos.")
+    viewbinding_parser.add_argument("--workers", type=int, help="Número máximo de procesos en paralelo.")
+
+    catalog_parser = subparsers.add_parser("catalog", help="Mueve las dependencias en línea de los build.gradle a libs.versions.toml.")
+    catalog_parser.add_argument("project", help="Ruta del proyecto Android.")
+    catalog_parser.add_argument("--modules", help="Módulos separados por comas. Por defecto, todos.")
+    catalog_parser.add_argument("--workers", type=int, help="Número máximo de procesos en paralelo.")
+    catalog_parser.add_argument("--dry-run", action="store_true", help="Muestra el resultado sin modificar ningún fichero.")
+
+    profiling_parser = subparsers.add_parser("profiling", help="Añade los módulos de Baseline Profile y Macrobenchmark para el arranque de la app.")
+    profiling_parser.add_argument("project", help="Ruta del proyecto Android.")
+    profiling_parser.add_argument("--module", default="app", help="Directorio del módulo de la app (por defecto `app`).")
+    profiling_parser.add_argument("--dry-run", action="store_true", help="Muestra los cambios sin modificar ningún fichero.")
+
+    r8_parser = subparsers.add_parser("r8", help="Escribe las reglas de R8/ProGuard que necesitan las dependencias declaradas de un módulo.")
+    r8_parser.add_argument("project", help="Ruta del proyecto Android.")
+    r8_parser.add_argument("--module", default="app", help="Directorio del módulo (por defecto `app`).")
+    r8_parser.add_argument("--minify", action="store_true",
+                           help="Activa la minificación y la eliminación de recursos en el build type release.")
+    r8_parser.add_argument("--dry-run", action="store_true", help="Muestra los cambios sin modificar ningún fichero.")
+
+    compose_parser = subparsers.add_parser("compose", help="Configura los informes y la estabilidad del compilador de Compose, o resume sus informes.")
+    compose_parser.add_argument("project", help="Ruta del proyecto Android.")
+    compose_parser.add_argument("--module", default="app", help="Directorio del módulo (por defecto `app`).")
+    compose_parser.add_argument("--report", action="store_true",
+                                help="Resume los informes generados con -PcomposeCompilerReports=true en lugar de configurar el módulo.")
+    compose_parser.add_argument("--dry-run", action="store_true", help="Muestra los cambios sin modificar ningún fichero.")
+
+    properties_parser = subparsers.add_parser("properties", help="Ajusta gradle.properties a las CPUs y la memoria del equipo.")
+    properties_parser.add_argument("project", help="Ruta del proyecto Android.")
+    properties_parser.add_argument("--dry-run", action="store_true", help="Muestra los cambios sin modificar gradle.properties.")
+
+    apply_parser = subparsers.add_parser("apply", help="Aplica un plan guardado con --save-plan.")
+    apply_parser.add_argument("plan", help="Fichero JSON con el plan.")
+    apply_parser.add_argument("--dry-run", action="store_true", help="Muestra los pasos sin aplicarlos.")
+    apply_parser.add_argument("--workers", type=int, help="Número máximo de pasos en paralelo.")
+
+    serve_parser = subparsers.add_parser("serve", help="Servidor JSON-RPC con el estado en memoria (para IDEs y hooks).")
+    serve_parser.add_argument("--socket", help="Socket Unix en el que escuchar. Por defecto, la entrada y salida estándar.")
+    serve_parser.add_argument("--project", action="append", default=[],
+                              help="Proyecto cuyo modelo se carga al arrancar (se puede repetir).")
+
+    return parser.parse_args(argv)
+
+def split_option(value):
+    """Convierte una opción separada por comas en una lista."""
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+def run_command(args):
+    """Ejecuta el subcomando indicado en la línea de comandos."""
+    if args.command == "batch":
+        from batch import run_batch
+        results = run_batch(args.spec, args.workers, args.report)
+        return 0 if all(result["ok"] for result in results) else 1
+    if args.command == "modules":
+        from gradle_modules import scaffold_modules
+        dependencies = resolve_dependency_groups(split_option(args.dependencies), args.compose)
+        if not validate_moshi_gson_selection(dependencies):
+            return 1
+        if args.resolve_versions:
+            dependencies = resolve_versions(dependencies)
+        results = scaffold_modules(
+            args.project,
+            args.architecture,
+            args.compose,
+            modules=split_option(args.modules) or None,
+            dependencies=dependencies,
+            permissions=split_option(args.permissions),
+            replace_existing=args.replace_existing,
+            max_workers=args.workers,
+            startup_profiling=args.startup_profiling,
+            minify=args.minify,
+        )
+        return 0 if results and all(result["ok"] for result in results) else 1
+    if args.command == "search":
+        catalog = load_catalog()
+        if args.category:
+            groups = set(catalog.category(args.category))
+            artifacts = [artifact for artifact in catalog.search(args.text) if artifact.group_id in groups]
+        else:
+            artifacts = catalog.search(args.text)
+        for artifact in artifacts:
+            name, category, _, _ = catalog.groups[artifact.group_id]
+            variant = f" [{artifact.variant}]" if artifact.variant else ""
+            print(f"{artifact.group_id}. {name} ({category}): {artifact.configuration} {artifact.coordinate}{variant}")
+        if not artifacts:
+            print("No se encontraron dependencias.")
+            return 1
+    if args.command == "versions":
+        resolver = VersionResolver(args.repository or None)
+        if args.refresh or args.full:
+            stats = resolver.refresh(full=args.full, max_workers=args.workers)
+            print(f"Índice actualizado: {stats['artifacts']} artefactos, "
+                  f"{stats['directories']} directorios en {stats['elapsed']:.2f}s.")
+        for coordinate in args.coordinates:
+            group, _, name = coordinate.partition(":")
+            available = resolver.available(group, name.split(":")[0])
+            latest = resolver.latest(group, name.split(":")[0])
+            print(f"{group}:{name}: {', '.join(available) or 'sin versiones locales'}"
+                  + (f" (estable más reciente: {latest})" if latest else ""))
+    if args.command == "features":
+        from feature_generator import generate_features, load_feature_spec
+        names, options = load_feature_spec(args.spec) if args.spec else ([], {})
+        names = names + args.names
+        if args.package and not is_valid_package_name(args.package):
+            print("El nombre del paquete no es válido.")
+            return 1
+        try:
+            generate_features(
+                args.project,
+                names,
+                architecture=args.architecture or options.get("architecture"),
+                use_compose=args.compose or bool(options.get("compose", False)),
+                package_name=args.package or options.get("package_name"),
+                module=args.module or options.get("module", "app"),
+                max_workers=args.workers,
+            )
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+    if args.command == "apply":
+        try:
+            plan = ExecutionPlan.load(args.plan)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            return 1
+        print(f"Plan para {plan.project_path}:")
+        for line in plan.describe():
+            print(line)
+        if not args.dry_run:
+            execute_plan(plan, max_workers=args.workers)
+            print("Plan aplicado.")
+    if args.command == "serve":
+        from server import run_server
+        run_server(args.socket, args.project)
+    if args.command == "catalog":
+        from catalog_migration import migrate_to_version_catalog
+        from workspace import Workspace
+        workspace = Workspace()
+        try:
+            migrate_to_version_catalog(args.project, split_option(args.modules) or None, workspace, args.workers)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if args.dry_run:
+            print(f"Simulación: no se ha escrito nada ({len(workspace.pending_changes())} ficheros cambiarían).")
+        else:
+            workspace.commit()
+    if args.command == "profiling":
+        from startup_profiling import add_startup_profiling
+        from workspace import Workspace
+        workspace = Workspace()
+        try:
+            add_startup_profiling(args.project, args.module, workspace)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if args.dry_run:
+            print(f"Simulación: no se ha escrito nada ({len(workspace.pending_changes())} ficheros cambiarían).")
+        else:
+            workspace.commit()
+    if args.command == "r8":
+        from keep_rules import add_keep_rules
+        from workspace import Workspace
+        workspace = Workspace()
+        add_keep_rules(args.project, module=args.module, minify=args.minify, workspace=workspace)
+        if args.dry_run:
+            print(f"Simulación: no se ha escrito nada ({len(workspace.pending_changes())} ficheros cambiarían).")
+        else:
+            workspace.commit()
+    if args.command == "compose":
+        from compose_metrics import configure_compose_compiler, summarize_compose_reports
+        from workspace import Workspace
+        if args.report:
+            try:
+                summarize_compose_reports(args.project, args.module)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return 1
+            return 0
+        workspace = Workspace()
+        configure_compose_compiler(args.project, args.module, workspace=workspace)
+        if args.dry_run:
+            print(f"Simulación: no se ha escrito nada ({len(workspace.pending_changes())} ficheros cambiarían).")
+        else:
+            workspace.commit()
+    if args.command == "properties":
+        from gradle_properties import tune_gradle_properties
+        from workspace import Workspace
+        workspace = Workspace()
+        try:
+            tune_gradle_properties(args.project, workspace=workspace)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if args.dry_run:
+            print("Simulación: no se ha escrito nada.")
+        else:
+            workspace.commit()
+    if args.command == "viewbinding":
+        from viewbinding_migration import migrate_to_view_binding
+        summary = migrate_to_view_binding(args.project, split_option(args.modules) or None, max_workers=args.workers)
+        return 1 if summary["manual"] else 0
+    return 0
+
+def main(argv=None) -> None:
     """Punto de entrada del script."""
+    args = parse_args(argv)
+    if args.templates:
+        # La variable de entorno la heredan también los procesos del modo batch
+        os.environ[TEMPLATES_ENV] = os.pathsep.join(os.path.abspath(path) for path in args.templates)
+        configure_templates(args.templates)
+    if args.dependency_catalog:
+        os.environ[CATALOG_ENV] = os.path.abspath(args.dependency_catalog)
+    if args.trace:
+        os.environ[TRACE_ENV] = os.path.abspath(args.trace)
+        enable_tracing(os.environ[TRACE_ENV])
+    if args.command:
+        raise SystemExit(run_command(args))
+
     print("=" * 50)
     """
     Añade la arquitectura deseada a un proyecto Android ya existente.
@@ -14,8 +300,13 @@ def main() -> None:
         # Entrada de datos
         project_directory = input("Introduce la ruta completa del proyecto Android: ").strip()
        
-        # Solicitar el nombre del paquete base
-        package_name = input("Introduce el nombre del paquete base (e.g., com.ejemplo.app): ").strip()
+        # Solicitar el nombre del paquete base, proponiendo el detectado en el módulo app
+        app_module = inspect_project(project_directory).module("app")
+        detected_package = app_module["package"] if app_module else None
+        if detected_package:
+            package_name = input(f"Introduce el nombre del paquete base [{detected_package}]: ").strip() or detected_package
+        else:
+            package_name = input("Introduce el nombre del paquete base (e.g., com.ejemplo.app): ").strip()
         if not is_valid_package_name(package_name):
             print("El nombre del paquete no es válido. Asegúrate de que sigue el formato correcto (e.g., com.example.app).")
             return
@@ -32,21 +323,33 @@ def main() -> None:
         print("2. Compose (Jetpack Compose)")
         project_type = input("Ingresa el número correspondiente: ").strip()
         use_compose = project_type == "2"
-    
-        
-        # Crear proyecto base
-        print("\nCreando proyecto...")
 
-        # Generar estructura según arquitectura
-        print("Generando arquitectura...")
-        
-        # Añadir arquitectura
-        add_architecture_to_existing_project(project_directory, architecture, use_compose, package_name)
-
-        #Mostrar dependencias
+        # Primero se toman todas las decisiones (arquitectura, permisos y dependencias)...
+        plan = plan_architecture(project_directory, architecture, use_compose, package_name)
+        if plan is None:
+            return
         dependenciesGroup = show_dependencies(use_compose)
-        get_dependencies(dependenciesGroup, project_directory)
+        dependencies = select_dependencies(dependenciesGroup)
+        answer = input("\n¿Activar R8 (minificación y eliminación de recursos) en el build type release? (s/n): ")
+        plan_dependencies(plan, dependencies, minify=answer.strip().lower() == "s")
+        answer = input("\n¿Añadir los módulos de Baseline Profile y Macrobenchmark para el arranque? (s/n): ")
+        if answer.strip().lower() == "s":
+            plan_startup_profiling(plan)
+
+        print("\nPlan de cambios:")
+        for line in plan.describe():
+            print(line)
+        if args.save_plan:
+            plan.save(args.save_plan)
+            print(f"Plan guardado en {args.save_plan}. Aplícalo con: python3 main.py apply {args.save_plan}")
+        if args.dry_run or args.save_plan or not plan.steps:
+            return
+        if input("\n¿Aplicar los cambios? (s/n): ").strip().lower() != "s":
+            print("No se realizaron cambios.")
+            return
 
+        # ...y después se aplican todos juntos
+        execute_plan(plan)
         print(f"\nArquitectura {architecture} configurada exitosamente en el proyecto ubicado en: {project_directory}")
 
     except Exception as e:
@@ -55,131 +358,7 @@ def main() -> None:
 def show_dependencies(use_compose):
     # Dependencias organizadas por categorías
         print("\nSelecciona las dependencias que deseas añadir:")
-        dependencies = {
-            1: {
-            "Kotlin Coroutines": [
-                "org.jetbrains.kotlinx:kotlinx-coroutines-core:1.7.1",
-                "org.jetbrains.kotlinx:kotlinx-coroutines-android:1.7.3",]
-            },
-            2: {
-                "Lifecycle ViewModel y LiveData": [
-                    "androidx.lifecycle:lifecycle-viewmodel-ktx:2.6.1",
-                    "androidx.lifecycle:lifecycle-livedata-ktx:2.6.1",
-                ]
-            },
-            3: {
-                "Room KTX": [
-                    "androidx.room:room-ktx:2.5.2",
-                    "androidx.room:room-runtime:2.5.2",
-                ]
-            },
-            4: {
-                "OkHttp": [
-                    "com.squareup.okhttp3:okhttp:4.9.3",
-                    "com.squareup.okhttp3:logging-interceptor:4.10.0",
-                ]
-            },
-            5: {
-                "Glide": [
-                    "com.github.bumptech.glide:glide:4.12.0",
-                ]
-            },
-            6: {
-                "ConstraintLayout": [
-                     "androidx.constraintlayout:constraintlayout-compose:1.0.1"
-                ] if use_compose else [ 
-                     "androidx.constraintlayout:constraintlayout:2.1.3",]
-            },
-            7: {
-                "Testing JUnit": [
-                    "junit:junit:4.13.2",
-                ]
-            },
-            8: {
-                "JUnit 5": [
-                    "org.junit.jupiter:junit-jupiter-api:5.10.0",
-                    "org.junit.jupiter:junit-jupiter-engine:5.10.0",
-                ]
-            },
-            9: {
-                "Firebase": [
-                    "com.google.firebase:firebase-bom:29.0.0",
-                    "com.google.firebase:firebase-analytics-ktx",
-                ]
-            },
-            10: {
-                "Retrofit": [
-                    "com.squareup.retrofit2:retrofit:2.9.0",
-                ]
-            },
-            11: {
-                "Dagger": [
-                    "com.google.dagger:hilt-android:2.47",
-                    "com.google.dagger:hilt-compiler:2.47",
-                    "com.google.dagger:hilt-android-testing:2.47"
-                ]
-            },
-            12: {
-                "MockK": [
-                    "io.mockk:mockk:1.13.5",
-                    "io.mockk:mockk-android:1.13.3",
-                    ]
-            },
-            13: {
-                "Mockito": [
-                    "org.mockito:mockito-core:4.11.0",
-                    "org.mockito.kotlin:mockito-kotlin:4.1.0",
-                    "org.mockito:mockito-android:4.11.0"
-                ]
-            },
-            14: {
-                "Espresso": [
-                    "androidx.test.espresso:espresso-contrib:3.5.1",
-                    "androidx.test.espresso:espresso-intents:3.5.1",
-                ]
-            },
-            15: {
-                 "Moshi": [
-                    "com.squareup.moshi:moshi-kotlin:1.15.0"
-                ]
-            },
-            16: {
-                 "Gson": [
-                    "com.google.code.gson:gson:2.10"
-                ]
-            },
-            17: {
-                 "Ktor Client": [
-                    "io.ktor:ktor-client-android:2.3.3" 
-                ]
-            },
-            18: {
-                 "ViewPager2": [
-                    "androidx.viewpager2:viewpager2:1.1.0"
-                 ]
-            },
-            19: {
-                 "Secure Preferences":[
-                    "com.scottyab:secure-preferences-lib:0.1.4"
-                ]
-            },
-            20: {
-                 "Coil":[
-                    "io.coil-kt:coil:2.4.0"
-                ]
-            },
-            21: {
-                 "Lottie":[
-                    "com.airbnb.android:lottie:6.0.0"
-                ]
-            },
-            22: {
-                 "Crashlytics":[
-                    "com.google.firebase:firebase-crashlytics-ktx"
-                ]
-            },
-        }
-        return dependencies
+        return get_dependency_groups(use_compose)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
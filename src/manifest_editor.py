@@ -0,0 +1,352 @@
+import re
+import xml.parsers.expat
+
+ANDROID_NAMESPACE = "http://schemas.android.com/apk/res/android"
+PERMISSION_PREFIX = "android.permission."
+
+class ManifestElement:
+    """Elemento del manifiesto con sus atributos y su posición (en bytes) en el fichero."""
+
+    __slots__ = ("tag", "attributes", "start", "start_tag_end", "end", "parent", "children")
+
+    def __init__(self, tag, attributes, start, parent):
+        self.tag = tag
+        self.attributes = attributes
+        self.start = start
+        self.start_tag_end = None
+        self.end = None
+        self.parent = parent
+        self.children = []
+
+    @property
+    def self_closing(self):
+        return self.end == self.start_tag_end
+
+    def get(self, name):
+        """Devuelve un atributo del espacio de nombres `android` (p. ej. `name`)."""
+        return self.attributes.get(f"{ANDROID_NAMESPACE} {name}")
+
+    def find_all(self, tag):
+        return [child for child in self.children if child.tag == tag]
+
+def _tag_end(data, position):
+    """Posición tras el `>` que cierra la etiqueta que empieza en `position`, ignorando comillas."""
+    quote = None
+    while position < len(data):
+        char = data[position]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in b"\"'":
+            quote = char
+        elif char == ord(">"):
+            return position + 1
+        position += 1
+    return position
+
+class AndroidManifest:
+    """
+    Editor de AndroidManifest.xml construido sobre el parser en streaming de expat.
+
+    El fichero se analiza una sola vez (con espacios de nombres) para indexar permisos,
+    features, actividades y sus intent-filter. Las altas y bajas se acumulan como parches
+    sobre el texto original, de modo que comentarios, sangrías y orden de atributos se
+    conservan al serializar.
+    """
+
+    def __init__(self, text, package_name=None):
+        self.text = text
+        self.data = text.encode("utf-8")
+        self.edits = []
+        self.root = None
+        self.android_prefix = "android"
+        self._parse()
+
+        self.package_name = package_name or (self.root.attributes.get("package") if self.root else None)
+        self.application = next(iter(self.root.find_all("application")), None) if self.root else None
+        self.permissions = {}
+        self.features = {}
+        self.activities = {}
+        for element in self.root.children if self.root else []:
+            if element.tag in ("uses-permission", "uses-permission-sdk-23") and element.get("name"):
+                self.permissions[element.get("name")] = element
+            elif element.tag == "uses-feature" and element.get("name"):
+                self.features[element.get("name")] = element
+        self.profileable = self.application is not None and bool(self.application.find_all("profileable"))
+        if self.application is not None:
+            for element in self.application.children:
+                if element.tag in ("activity", "activity-alias") and element.get("name"):
+                    self.activities[self.resolve_class(element.get("name"))] = element
+
+    def _parse(self):
+        parser = xml.parsers.expat.ParserCreate(namespace_separator=" ")
+        stack = []
+
+        def start_namespace(prefix, uri):
+            if uri == ANDROID_NAMESPACE and prefix:
+                self.android_prefix = prefix
+
+        def start_element(tag, attributes):
+            start = parser.CurrentByteIndex
+            element = ManifestElement(tag, attributes, start, stack[-1] if stack else None)
+            element.start_tag_end = _tag_end(self.data, start)
+            if stack:
+                stack[-1].children.append(element)
+            else:
+                self.root = element
+            stack.append(element)
+
+        def end_element(tag):
+            element = stack.pop()
+            position = parser.CurrentByteIndex
+            if position <= element.start or self.data[position:position + 2] != b"</":
+                # Elemento vacío <tag ... />
+                element.end = element.start_tag_end
+            else:
+                element.end = _tag_end(self.data, position)
+
+        parser.StartNamespaceDeclHandler = start_namespace
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        try:
+            parser.Parse(self.data, True)
+        except xml.parsers.expat.ExpatError as e:
+            raise ValueError(f"AndroidManifest.xml no es un XML válido: {e}") from None
+
+    @classmethod
+    def load(cls, workspace, path, package_name=None):
+        return cls(workspace.read(path), package_name)
+
+    def resolve_class(self, name):
+        """Convierte nombres relativos (`.view.Splash`) en nombres completos usando el paquete."""
+        if name.startswith(".") and self.package_name:
+            return self.package_name + name
+        if "." not in name and self.package_name:
+            return f"{self.package_name}.{name}"
+        return name
+
+    def intent_filters(self, activity_name):
+        """Devuelve las acciones y categorías de cada intent-filter de una actividad."""
+        activity = self.activities.get(self.resolve_class(activity_name))
+        if activity is None:
+            return []
+        filters = []
+        for intent_filter in activity.find_all("intent-filter"):
+            filters.append({
+                "actions": {child.get("name") for child in intent_filter.find_all("action")},
+                "categories": {child.get("name") for child in intent_filter.find_all("category")},
+            })
+        return filters
+
+    def launcher_activities(self):
+        """Nombres de las actividades con el intent-filter MAIN/LAUNCHER."""
+        return [
+            name for name in self.activities
+            if any("android.intent.action.MAIN" in f["actions"] and "android.intent.category.LAUNCHER" in f["categories"]
+                   for f in self.intent_filters(name))
+        ]
+
+    def has_permission(self, permission):
+        return self._permission_name(permission) in self.permissions
+
+    def has_feature(self, feature):
+        return feature in self.features
+
+    def has_activity(self, name):
+        return self.resolve_class(name) in self.activities
+
+    @staticmethod
+    def _permission_name(permission):
+        return permission if "." in permission else PERMISSION_PREFIX + permission
+
+    def _line_start(self, position):
+        return self.data.rfind(b"\n", 0, position) + 1
+
+    def _indentation(self, element):
+        line_start = self._line_start(element.start)
+        return re.match(rb"[ \t]*", self.data[line_start:element.start]).group(0).decode()
+
+    def _insert_after(self, element, lines):
+        """Inserta líneas después de un elemento, con su misma sangría."""
+        indentation = self._indentation(element)
+        body = "".join(f"\n{indentation}{line}" for line in lines)
+        self.edits.append((element.end, element.end, body.encode("utf-8")))
+
+    def _insert_before(self, element, lines, indentation=None):
+        """Inserta líneas en la línea anterior a un elemento."""
+        indentation = self._indentation(element) if indentation is None else indentation
+        line_start = self._line_start(element.start)
+        if self.data[line_start:element.start].strip():
+            body = "".join(f"{line}\n{indentation}" for line in lines)
+            self.edits.append((element.start, element.start, body.encode("utf-8")))
+        else:
+            body = "".join(f"{indentation}{line}\n" for line in lines)
+            self.edits.append((line_start, line_start, body.encode("utf-8")))
+
+    def _insert_top_level(self, lines):
+        """Inserta elementos hijos de <manifest> tras los permisos existentes o antes de <application>."""
+        siblings = [element for element in self.root.children if element.tag in ("uses-permission", "uses-feature")]
+        if siblings:
+            self._insert_after(max(siblings, key=lambda element: element.end), lines)
+        elif self.application is not None:
+            self._insert_before(self.application, lines)
+        else:
+            self._insert_in(self.root, lines)
+
+    def _insert_in(self, element, lines):
+        """Inserta líneas como últimos hijos de un elemento (antes de su etiqueta de cierre)."""
+        parent_indentation = self._indentation(element)
+        child_indentation = parent_indentation + self._indent_unit()
+        if element.children:
+            child_indentation = self._indentation(element.children[-1])
+        body = "".join(f"{child_indentation}{line}\n" for line in lines)
+        if element.self_closing:
+            # <application ... /> se convierte en <application ...>...</application>
+            close = element.start_tag_end - 2
+            while close > element.start and self.data[close - 1:close].isspace():
+                close -= 1
+            tag = self._qualified_tag(element)
+            replacement = f">\n{body}{parent_indentation}</{tag}>".encode("utf-8")
+            self.edits.append((close, element.end, replacement))
+            return
+        closing_tag = self.data.rfind(b"</", element.start, element.end)
+        line_start = self._line_start(closing_tag)
+        if self.data[line_start:closing_tag].strip():
+            self.edits.append((closing_tag, closing_tag, ("\n" + body + parent_indentation).encode("utf-8")))
+        else:
+            self.edits.append((line_start, line_start, body.encode("utf-8")))
+
+    def _indent_unit(self):
+        """Sangría usada en el fichero (la del primer hijo de <manifest>), por defecto 4 espacios."""
+        if self.root is not None and self.root.children:
+            unit = self._indentation(self.root.children[0])[len(self._indentation(self.root)):]
+            if unit.strip() == "" and unit:
+                return unit
+        return "    "
+
+    def _qualified_tag(self, element):
+        match = re.match(rb"<\s*([^\s/>]+)", self.data[element.start:element.start_tag_end])
+        return match.group(1).decode() if match else element.tag
+
+    def add_permissions(self, permissions):
+        """
+        Añade los permisos que no existan todavía.
+
+        Returns:
+            list: Nombres completos de los permisos añadidos.
+        """
+        added = []
+        for permission in permissions:
+            name = self._permission_name(permission)
+            if name in self.permissions or name in added:
+                continue
+            added.append(name)
+        if added:
+            self._insert_top_level([f'<uses-permission {self.android_prefix}:name="{name}" />' for name in added])
+            for name in added:
+                self.permissions[name] = None
+        return added
+
+    def add_features(self, features, required=False):
+        """Añade `<uses-feature>` para las features que no estén declaradas."""
+        added = [feature for feature in dict.fromkeys(features) if feature not in self.features]
+        if added:
+            prefix = self.android_prefix
+            self._insert_top_level([
+                f'<uses-feature {prefix}:name="{feature}" {prefix}:required="{str(required).lower()}" />'
+                for feature in added
+            ])
+            for feature in added:
+                self.features[feature] = None
+        return added
+
+    def add_activities(self, activities):
+        """
+        Añade actividades al final de <application>.
+
+        Args:
+            activities (list): Pares (nombre de la clase, exported) o nombres.
+
+        Returns:
+            list: Nombres de las actividades añadidas.
+        """
+        if self.application is None:
+            raise ValueError("El archivo AndroidManifest.xml no tiene la etiqueta <application>")
+        lines = []
+        added = []
+        for activity in activities:
+            name, exported = activity if isinstance(activity, tuple) else (activity, False)
+            resolved = self.resolve_class(name)
+            if resolved in self.activities or resolved in added:
+                continue
+            prefix = self.android_prefix
+            lines.append(f'<activity {prefix}:name="{name}" {prefix}:exported="{str(exported).lower()}"/>')
+            added.append(resolved)
+        if lines:
+            self._insert_in(self.application, lines)
+            for name in added:
+                self.activities[name] = None
+        return added
+
+    def add_profileable(self):
+        """
+        Declara la app `profileable` para la shell, necesario para que Macrobenchmark mida
+        las builds que no son depurables.
+
+        Returns:
+            bool: True si se ha añadido (False si ya estaba declarada).
+        """
+        if self.application is None:
+            raise ValueError("El archivo AndroidManifest.xml no tiene la etiqueta <application>")
+        if self.profileable:
+            return False
+        self._insert_in(self.application, [f'<profileable {self.android_prefix}:shell="true" />'])
+        self.profileable = True
+        return True
+
+    def _remove(self, element):
+        line_start = self._line_start(element.start)
+        line_end = self.data.find(b"\n", element.end)
+        line_end = len(self.data) if line_end == -1 else line_end + 1
+        # Si el elemento ocupa sus propias líneas se eliminan completas
+        if not self.data[line_start:element.start].strip() and not self.data[element.end:line_end].strip():
+            self.edits.append((line_start, line_end, b""))
+        else:
+            self.edits.append((element.start, element.end, b""))
+
+    def remove_permissions(self, permissions):
+        removed = []
+        for permission in permissions:
+            element = self.permissions.get(self._permission_name(permission))
+            if element is not None:
+                self._remove(element)
+                del self.permissions[self._permission_name(permission)]
+                removed.append(self._permission_name(permission))
+        return removed
+
+    def remove_activities(self, names):
+        removed = []
+        for name in names:
+            element = self.activities.get(self.resolve_class(name))
+            if element is not None:
+                self._remove(element)
+                del self.activities[self.resolve_class(name)]
+                removed.append(self.resolve_class(name))
+        return removed
+
+    @property
+    def changed(self):
+        return bool(self.edits)
+
+    def to_text(self):
+        """Devuelve el manifiesto con los cambios aplicados y el resto del texto intacto."""
+        if not self.edits:
+            return self.text
+        output = []
+        position = 0
+        for start, end, replacement in sorted(self.edits, key=lambda edit: (edit[0], edit[1])):
+            output.append(self.data[position:max(start, position)])
+            output.append(replacement)
+            position = max(position, end)
+        output.append(self.data[position:])
+        return b"".join(output).decode("utf-8")
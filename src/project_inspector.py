@@ -0,0 +1,306 @@
+import hashlib
+import os
+import pickle
+import re
+
+from dependency_catalog import cache_directory
+from manifest_editor import AndroidManifest
+from tracing import count, count_file, traced
+
+SETTINGS_FILES = ("settings.gradle.kts", "settings.gradle")
+BUILD_FILES = ("build.gradle.kts", "build.gradle")
+SOURCE_DIRECTORIES = ("java", "kotlin")
+MODEL_FORMAT = 1
+
+INCLUDE_PATTERN = re.compile(r'\binclude\s*\(?((?:\s*["\'][^"\']+["\']\s*,?)+)\s*\)?')
+STRING_PATTERN = re.compile(r'["\']([^"\']+)["\']')
+PROJECT_DIR_PATTERN = re.compile(
+    r'project\(\s*["\'](:[^"\']+)["\']\s*\)\.projectDir\s*=\s*'
+    r'(?:file|new\s+File)\(\s*(?:(?:rootDir|settingsDir)\s*,\s*)?["\']([^"\']+)["\']\s*\)'
+)
+NAMESPACE_PATTERN = re.compile(r'^\s*namespace\s*=?\s*["\']([\w.]+)["\']', re.MULTILINE)
+APPLICATION_ID_PATTERN = re.compile(r'^\s*applicationId\s*=?\s*["\']([\w.]+)["\']', re.MULTILINE)
+
+# Carpetas que identifican cada arquitectura dentro del paquete base
+ARCHITECTURE_LAYERS = {
+    "MVP": ["presenter", "view", "model", "repository"],
+    "MVVM": ["viewmodel", "repository", "model", "view"],
+    "MVI": ["intent", "view", "state", "model", "repository"],
+}
+
+def detect_architecture(folders):
+    """Devuelve la arquitectura cuyas carpetas existen todas en `folders`, o None."""
+    for architecture, layers in ARCHITECTURE_LAYERS.items():
+        if all(layer in folders for layer in layers):
+            return architecture
+    return None
+
+def strip_gradle_comments(content):
+    """Elimina los comentarios de bloque y de línea de un script Gradle."""
+    content = re.sub(r"/\*.*?\*/", "", content, flags=re.DOTALL)
+    return re.sub(r"(?m)^\s*//.*$|\s//[^\"'\n]*$", "", content)
+
+def parse_settings(content):
+    """
+    Obtiene los módulos declarados con `include(...)` en el contenido de settings.gradle(.kts).
+
+    Admite la sintaxis de Kotlin DSL y de Groovy, varias rutas por `include` y
+    directorios personalizados con `project(":x").projectDir = file("...")`.
+
+    Returns:
+        dict: Nombre Gradle del módulo (p. ej. `:feature:home`) -> directorio relativo al proyecto.
+    """
+    content = strip_gradle_comments(content)
+    modules = {}
+    for match in INCLUDE_PATTERN.finditer(content):
+        for name in STRING_PATTERN.findall(match.group(1)):
+            name = name if name.startswith(":") else f":{name}"
+            modules[name] = os.path.join(*name.strip(":").split(":"))
+
+    for name, directory in PROJECT_DIR_PATTERN.findall(content):
+        if name in modules:
+            modules[name] = os.path.normpath(directory)
+    return modules
+
+class _Scanner:
+    """
+    Lee directorios y ficheros anotando su fecha de modificación, para poder comprobar
+    después si el modelo construido con ellos sigue siendo válido.
+    """
+
+    def __init__(self):
+        self.stamps = {}
+
+    def _stamp(self, path):
+        try:
+            self.stamps[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            self.stamps[path] = None
+
+    def listdir(self, path):
+        """Devuelve {nombre: es_directorio} de un directorio (vacío si no existe)."""
+        self._stamp(path)
+        try:
+            with os.scandir(path) as entries:
+                count("directories_listed")
+                return {entry.name: entry.is_dir() for entry in entries}
+        except OSError:
+            return {}
+
+    def read(self, path):
+        self._stamp(path)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                count_file(file)
+                return file.read()
+        except (OSError, UnicodeDecodeError):
+            return ""
+
+    def find_directory(self, root, parts):
+        """Desciende por `parts` desde `root` listando cada nivel; devuelve la ruta o None."""
+        path = root
+        for part in parts:
+            if not self.listdir(path).get(part):
+                return None
+            path = os.path.join(path, part)
+        return path
+
+def _guess_package(scanner, source_root):
+    """
+    Deduce el paquete base bajando por la raíz de código mientras haya un único
+    subdirectorio y ningún fichero (p. ej. `java/com/example/app`).
+    """
+    parts = []
+    path = source_root
+    while True:
+        entries = {name: is_dir for name, is_dir in scanner.listdir(path).items() if not name.startswith(".")}
+        directories = [name for name, is_dir in entries.items() if is_dir]
+        if len(directories) != 1 or len(entries) != 1:
+            break
+        parts.append(directories[0])
+        path = os.path.join(path, directories[0])
+    return ".".join(parts) if len(parts) >= 2 else None
+
+def _inspect_package(scanner, module, package_name):
+    """Busca la carpeta del paquete en las raíces de código y lista sus capas."""
+    parts = package_name.split(".")
+    for root in module["source_roots"]:
+        path = scanner.find_directory(root, parts)
+        if path:
+            layers = sorted(name for name, is_dir in scanner.listdir(path).items() if is_dir)
+            return path, layers
+    # El paquete aún no existe: se usaría src/main/java
+    return os.path.join(module["path"], "src", "main", "java", *parts), None
+
+def _inspect_module(scanner, project_path, name, directory):
+    module_path = os.path.join(project_path, directory)
+    module = {
+        "name": name,
+        "directory": directory,
+        "path": module_path,
+        "build_file": None,
+        "manifest": None,
+        "namespace": None,
+        "application_id": None,
+        "package": None,
+        "source_roots": [],
+        "source_path": None,
+        "layers": None,
+        "architecture": None,
+    }
+    entries = scanner.listdir(module_path)
+
+    for build_name in BUILD_FILES:
+        if build_name in entries and not entries[build_name]:
+            module["build_file"] = os.path.join(module_path, build_name)
+            content = scanner.read(module["build_file"])
+            namespace = NAMESPACE_PATTERN.search(content)
+            application_id = APPLICATION_ID_PATTERN.search(content)
+            module["namespace"] = namespace.group(1) if namespace else None
+            module["application_id"] = application_id.group(1) if application_id else None
+            break
+
+    main_path = os.path.join(module_path, "src", "main")
+    main_entries = scanner.listdir(main_path) if entries.get("src") and scanner.listdir(os.path.join(module_path, "src")).get("main") else {}
+    if "AndroidManifest.xml" in main_entries:
+        module["manifest"] = os.path.join(main_path, "AndroidManifest.xml")
+        if not module["namespace"]:
+            # Proyectos antiguos declaran el paquete en el manifiesto
+            try:
+                module["namespace"] = AndroidManifest(scanner.read(module["manifest"])).package_name
+            except ValueError:
+                pass
+    module["source_roots"] = [os.path.join(main_path, name) for name in SOURCE_DIRECTORIES if main_entries.get(name)]
+
+    module["package"] = module["namespace"] or module["application_id"]
+    if not module["package"]:
+        for root in module["source_roots"]:
+            module["package"] = _guess_package(scanner, root)
+            if module["package"]:
+                break
+    if module["package"]:
+        module["source_path"], module["layers"] = _inspect_package(scanner, module, module["package"])
+        module["architecture"] = detect_architecture(module["layers"] or ())
+    return module
+
+class ProjectModel:
+    """
+    Modelo de un proyecto Android obtenido en un único recorrido acotado: ficheros de
+    settings, catálogo de versiones, módulos con su build.gradle, manifiesto, namespace,
+    applicationId, raíces de código, paquete base y capas de arquitectura existentes.
+
+    Solo se listan los directorios relevantes (raíz, módulos, `src/main` y la ruta del
+    paquete), nunca el árbol completo. Las fechas de modificación de todo lo leído se
+    guardan en `stamps` para saber si el modelo sigue vigente.
+    """
+
+    def __init__(self, project_path):
+        self.path = os.path.abspath(project_path)
+        scanner = _Scanner()
+        entries = scanner.listdir(self.path)
+
+        self.settings_file = next((os.path.join(self.path, name) for name in SETTINGS_FILES if name in entries), None)
+        self.build_file = next((os.path.join(self.path, name) for name in BUILD_FILES if name in entries), None)
+        self.gradle_properties = os.path.join(self.path, "gradle.properties") if "gradle.properties" in entries else None
+        self.version_catalog = None
+        if entries.get("gradle") and "libs.versions.toml" in scanner.listdir(os.path.join(self.path, "gradle")):
+            self.version_catalog = os.path.join(self.path, "gradle", "libs.versions.toml")
+
+        declared = parse_settings(scanner.read(self.settings_file)) if self.settings_file else {}
+        if self.settings_file and not declared and entries.get("app"):
+            # settings sin `include`: se asume el módulo app
+            declared = {":app": "app"}
+        self.modules = {name: _inspect_module(scanner, self.path, name, directory) for name, directory in declared.items()}
+        self.stamps = scanner.stamps
+
+    @property
+    def is_android_project(self):
+        return self.settings_file is not None
+
+    def is_current(self):
+        """Indica si ningún fichero o directorio leído ha cambiado desde la inspección."""
+        for path, mtime in self.stamps.items():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return False
+        return True
+
+    def module(self, key):
+        """Busca un módulo por nombre Gradle (`:feature:home`) o por directorio (`feature/home`)."""
+        if key in self.modules:
+            return self.modules[key]
+        directory = os.path.normpath(key)
+        for module in self.modules.values():
+            if module["directory"] == directory:
+                return module
+        name = key if key.startswith(":") else ":" + key.replace("/", ":")
+        return self.modules.get(name)
+
+    def find_modules(self, selected=None):
+        """
+        Devuelve los módulos del proyecto, opcionalmente filtrados.
+
+        Raises:
+            ValueError: Si algún módulo seleccionado no está declarado en settings.gradle.
+        """
+        if not selected:
+            return list(self.modules.values())
+        wanted = {name if name.startswith(":") else ":" + name.replace("/", ":") for name in selected}
+        unknown = wanted - set(self.modules)
+        if unknown:
+            raise ValueError(f"Módulos no declarados en settings.gradle: {', '.join(sorted(unknown))}")
+        return [module for name, module in self.modules.items() if name in wanted]
+
+    def locate_package(self, module_key, package_name):
+        """
+        Devuelve (carpeta del paquete, capas existentes o None si la carpeta no existe)
+        para un paquete de un módulo, usando el modelo si es el paquete detectado.
+        """
+        module = self.module(module_key)
+        if module is None:
+            module = _inspect_module(_Scanner(), self.path, module_key, os.path.normpath(module_key.strip(":").replace(":", os.sep)))
+        if package_name == module["package"] and module["source_path"]:
+            return module["source_path"], module["layers"]
+        return _inspect_package(_Scanner(), module, package_name)
+
+_models = {}
+
+def _cache_path(project_path):
+    key = hashlib.sha1(project_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_directory(), f"project-{MODEL_FORMAT}-{key}.pickle")
+
+@traced
+def inspect_project(project_path, use_cache=True):
+    """
+    Devuelve el modelo del proyecto. El modelo se reutiliza (en memoria y en la caché
+    en disco entre ejecuciones) mientras no cambie la fecha de modificación de ninguno
+    de los directorios y ficheros que se leyeron para construirlo.
+    """
+    project_path = os.path.abspath(project_path)
+    if use_cache:
+        model = _models.get(project_path)
+        if model is None:
+            try:
+                with open(_cache_path(project_path), "rb") as file:
+                    model = pickle.load(file)
+            except Exception:
+                model = None
+        if model is not None and model.is_current():
+            _models[project_path] = model
+            return model
+
+    model = ProjectModel(project_path)
+    _models[project_path] = model
+    if use_cache and model.is_android_project:
+        try:
+            os.makedirs(cache_directory(), exist_ok=True)
+            temp_path = f"{_cache_path(project_path)}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, _cache_path(project_path))
+        except OSError:
+            pass
+    return model
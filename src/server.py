@@ -0,0 +1,280 @@
+import inspect
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+from batch import run_project
+from dependency_catalog import load_catalog
+from dependency_rules import load_rules
+from feature_generator import generate_features
+from generate_android_architecture import add_permissions_to_manifest
+from generate_dependencies import apply_dependencies, resolve_dependency_groups, validate_moshi_gson_selection
+from keep_rules import add_keep_rules
+from project_inspector import inspect_project
+from template_registry import get_registry
+from version_resolver import resolve_versions as resolve_latest_versions
+from workspace import Workspace
+
+JSONRPC_VERSION = "2.0"
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+class RpcError(Exception):
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+class Server:
+    """
+    Servidor JSON-RPC 2.0 de larga duración.
+
+    Mantiene en memoria los módulos importados, el catálogo de dependencias, las reglas,
+    las plantillas compiladas y los modelos de los proyectos, que se invalidan solos
+    cuando cambia la fecha de modificación de los ficheros de los que salieron. Cada
+    petición escribe sus cambios con un único commit del workspace y devuelve la salida
+    de los pasos en `log`.
+
+    Las peticiones se atienden de una en una (los pasos escriben en la salida estándar
+    del proceso), aunque lleguen por varias conexiones a la vez.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.methods = {
+            "ping": self.ping,
+            "inspect": self.inspect,
+            "scaffold": self.scaffold,
+            "add_dependencies": self.add_dependencies,
+            "add_permissions": self.add_permissions,
+            "features": self.features,
+            "shutdown": self.shutdown,
+        }
+
+    def warm_up(self, projects=()):
+        """Carga el catálogo, las reglas, las plantillas y los modelos de `projects` antes de la primera petición."""
+        load_catalog()
+        load_rules()
+        registry = get_registry()
+        for architecture in ("MVP", "MVVM", "MVI"):
+            for use_compose in (False, True):
+                registry.render_architecture(architecture, "com.example", use_compose)
+        for project_path in projects:
+            inspect_project(project_path)
+
+    def ping(self):
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 3)}
+
+    def inspect(self, project_path, refresh=False):
+        """Modelo del proyecto: módulos con su paquete, ficheros y arquitectura detectada."""
+        model = inspect_project(project_path, use_cache=not refresh)
+        return {
+            "path": model.path,
+            "is_android_project": model.is_android_project,
+            "settings_file": model.settings_file,
+            "version_catalog": model.version_catalog,
+            "modules": [
+                {key: module[key] for key in ("name", "directory", "path", "build_file", "manifest", "namespace",
+                                              "package", "architecture", "layers")}
+                for module in model.modules.values()
+            ],
+        }
+
+    def scaffold(self, project_path, architecture, **options):
+        """
+        Añade la arquitectura al proyecto (o a sus `modules`) con las mismas opciones que
+        una entrada del modo batch.
+        """
+        result = run_project({"project_path": project_path, "architecture": architecture, **options})
+        if not result["ok"]:
+            raise RpcError(SERVER_ERROR, result["error"], {"log": result["log"]})
+        return result
+
+    def add_dependencies(self, project_path, dependencies, compose=False, modules=("app",), create_toml=True,
+                         resolve_versions=False, minify=False):
+        """
+        Añade grupos de dependencias (número o nombre del catálogo) al catálogo de versiones
+        y a los módulos, con sus reglas de R8. Con `minify` activa además R8 en `release`.
+        """
+        selected = resolve_dependency_groups(dependencies, compose)
+        if not validate_moshi_gson_selection(selected):
+            raise ValueError("Se detectó un conflicto entre Moshi y Gson.")
+        if resolve_versions:
+            selected = resolve_latest_versions(selected)
+        with Workspace() as workspace:
+            apply_dependencies(project_path, selected, bool(create_toml), list(modules), workspace)
+            for module in modules:
+                add_keep_rules(project_path, selected, module, bool(minify), workspace)
+        return {"dependencies": selected, "written": workspace.written}
+
+    def add_permissions(self, project_path, permissions, module="app"):
+        """Añade permisos al manifiesto de un módulo."""
+        model = inspect_project(project_path)
+        module_info = model.module(module)
+        if module_info is None or not module_info["manifest"]:
+            raise ValueError(f"No se encontró el manifiesto del módulo {module}.")
+        with Workspace() as workspace:
+            add_permissions_to_manifest(module_info["manifest"], list(permissions), workspace)
+        return {"manifest": module_info["manifest"], "written": workspace.written}
+
+    def features(self, project_path, names, architecture=None, compose=False, package_name=None, module="app"):
+        """Genera pantallas completas (ver `generate_features`)."""
+        return generate_features(project_path, names, architecture, bool(compose), package_name, module)
+
+    def shutdown(self):
+        self.stopping.set()
+        return {"stopping": True}
+
+    def call(self, method, params):
+        """Ejecuta un método con la salida estándar capturada. Devuelve el resultado con la clave `log`."""
+        handler = self.methods.get(method)
+        if handler is None:
+            raise RpcError(METHOD_NOT_FOUND, f"Método desconocido: {method}")
+        try:
+            if isinstance(params, list):
+                inspect.signature(handler).bind(*params)
+            else:
+                inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            raise RpcError(INVALID_PARAMS, f"Parámetros no válidos para {method}: {e}") from None
+
+        log = io.StringIO()
+        with self.lock:
+            stdin = sys.stdin
+            # Ningún paso puede quedarse esperando una respuesta: `input()` falla en lugar de
+            # leer el canal de las peticiones
+            sys.stdin = io.StringIO()
+            try:
+                with redirect_stdout(log):
+                    result = handler(*params) if isinstance(params, list) else handler(**params)
+            finally:
+                sys.stdin = stdin
+        if isinstance(result, dict) and log.getvalue():
+            result = {**result, "log": log.getvalue()}
+        return result
+
+    def handle(self, request):
+        """Respuesta a una petición ya decodificada, o None si es una notificación."""
+        if not isinstance(request, dict) or request.get("jsonrpc") != JSONRPC_VERSION \
+                or not isinstance(request.get("method"), str):
+            return _error(request.get("id") if isinstance(request, dict) else None, INVALID_REQUEST,
+                          "Petición JSON-RPC no válida.")
+        request_id = request.get("id")
+        params = request.get("params", {})
+        try:
+            if not isinstance(params, (dict, list)):
+                raise RpcError(INVALID_PARAMS, "`params` debe ser un objeto o una lista.")
+            result = self.call(request["method"], params)
+        except RpcError as e:
+            response = _error(request_id, e.code, str(e), e.data)
+        except Exception as e:
+            response = _error(request_id, SERVER_ERROR, f"{type(e).__name__}: {e}")
+        else:
+            response = {"jsonrpc": JSONRPC_VERSION, "id": request_id, "result": result}
+        return response if "id" in request else None
+
+    def handle_line(self, line):
+        """Procesa una línea (una petición o un lote) y devuelve la respuesta serializada o None."""
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return json.dumps(_error(None, PARSE_ERROR, f"JSON no válido: {e}"))
+        if isinstance(message, list):
+            if not message:
+                return json.dumps(_error(None, INVALID_REQUEST, "Lote vacío."))
+            responses = [response for response in map(self.handle, message) if response is not None]
+            return json.dumps(responses, ensure_ascii=False) if responses else None
+        response = self.handle(message)
+        return json.dumps(response, ensure_ascii=False) if response is not None else None
+
+def _error(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": JSONRPC_VERSION, "id": request_id, "error": error}
+
+def serve_stdio(server, stdin=None, stdout=None):
+    """Atiende peticiones JSON-RPC, una por línea, por la entrada y la salida estándar."""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        if not line.strip():
+            continue
+        response = server.handle_line(line)
+        if response is not None:
+            stdout.write(response + "\n")
+            stdout.flush()
+        if server.stopping.is_set():
+            break
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.rpc.handle_line(line.decode("utf-8"))
+            if response is not None:
+                self.wfile.write(response.encode("utf-8") + b"\n")
+                self.wfile.flush()
+            if self.server.rpc.stopping.is_set():
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                break
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve_unix_socket(server, path):
+    """
+    Atiende peticiones JSON-RPC, una por línea, en un socket Unix accesible solo para el
+    usuario actual.
+
+    Raises:
+        RuntimeError: Si ya hay un servidor escuchando en `path`.
+    """
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            # Socket de un servidor que ya no existe
+            os.remove(path)
+        else:
+            raise RuntimeError(f"Ya hay un servidor escuchando en {path}.")
+        finally:
+            probe.close()
+
+    previous_umask = os.umask(0o177)
+    try:
+        unix_server = _UnixServer(path, _ConnectionHandler)
+    finally:
+        os.umask(previous_umask)
+    unix_server.rpc = server
+    try:
+        unix_server.serve_forever()
+    finally:
+        unix_server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+def run_server(socket_path=None, projects=()):
+    """Arranca el servidor por un socket Unix o, si no se indica, por la entrada y salida estándar."""
+    server = Server()
+    # En modo stdio la salida estándar es el canal de las respuestas
+    with redirect_stdout(sys.stderr):
+        server.warm_up(projects)
+    if socket_path:
+        print(f"Servidor escuchando en {socket_path} (PID {os.getpid()}).", file=sys.stderr)
+        serve_unix_socket(server, socket_path)
+    else:
+        serve_stdio(server)
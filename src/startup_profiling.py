@@ -0,0 +1,339 @@
+import os
+import re
+
+from generate_dependencies import (
+    add_dependencies_to_versions_toml,
+    has_plugin,
+    plugin_accessor,
+    plugin_line,
+)
+from gradle_parser import GradleBuildFile
+from manifest_editor import AndroidManifest
+from project_inspector import inspect_project
+from template_registry import STARTUP_TEST_TEMPLATE, get_registry
+from tracing import traced
+from version_catalog import VersionCatalog, alias_to_accessor
+from version_resolver import version_key
+from workspace import open_workspace
+
+ANDROID_APPLICATION_PLUGIN_ID = "com.android.application"
+ANDROID_TEST_PLUGIN_ID = "com.android.test"
+KOTLIN_ANDROID_PLUGIN_ID = "org.jetbrains.kotlin.android"
+BASELINE_PROFILE_PLUGIN_ID = "androidx.baselineprofile"
+# Sin plugins {} en el build.gradle raíz, el plugin de Baseline Profile se declara en el classpath
+BASELINE_PROFILE_CLASSPATH = "androidx.benchmark:benchmark-baseline-profile-gradle-plugin"
+# El plugin de Baseline Profile y la librería de Macrobenchmark se publican con la misma versión
+BENCHMARK_VERSION = "1.2.4"
+MINIMUM_AGP_VERSION = "8.0"
+
+PROFILE_INSTALLER = "androidx.profileinstaller:profileinstaller:1.3.1"
+BENCHMARK_MACRO = f"androidx.benchmark:benchmark-macro-junit4:{BENCHMARK_VERSION}"
+TEST_LIBRARIES = [
+    "androidx.test.ext:junit:1.1.5",
+    "androidx.test.uiautomator:uiautomator:2.3.0",
+    BENCHMARK_MACRO,
+]
+
+# Módulos generados y su minSdk mínimo: los perfiles se generan desde API 28 (con root)
+PROFILING_MODULES = {"baselineprofile": 28, "macrobenchmark": 23}
+DEFAULT_COMPILE_SDK = "34"
+# Opciones de compilación de la app que se copian a los módulos generados
+JVM_OPTIONS = (
+    (("android", "compileOptions"), "sourceCompatibility"),
+    (("android", "compileOptions"), "targetCompatibility"),
+    (("android", "kotlinOptions"), "jvmTarget"),
+)
+
+AGP_VERSION_PATTERNS = (
+    re.compile(r'id\s*\(?\s*["\']com\.android\.application["\']\s*\)?\s*version\s*\(?\s*["\']([^"\']+)["\']'),
+    re.compile(r'com\.android\.tools\.build:gradle:([^"\'\s]+)'),
+)
+INCLUDE_LINE_PATTERN = re.compile(r"^[ \t]*include\b.*$", re.MULTILINE)
+
+def application_module(model):
+    """Módulo de la app (el primero con applicationId o `:app`), o None si no hay ninguno."""
+    return next((module for module in model.modules.values() if module["application_id"]), None) \
+        or model.module(":app")
+
+def agp_version(project_path, catalog=None, workspace=None):
+    """Versión del Android Gradle Plugin: la del catálogo o la del build.gradle raíz. None si no se encuentra."""
+    entry = catalog.find_plugin(ANDROID_APPLICATION_PLUGIN_ID) if catalog else None
+    if entry is not None and catalog.version_of(entry.value):
+        return catalog.version_of(entry.value)
+    with open_workspace(workspace) as workspace:
+        for build_name in ("build.gradle.kts", "build.gradle"):
+            path = os.path.join(project_path, build_name)
+            if workspace.exists(path):
+                content = workspace.read(path)
+                for pattern in AGP_VERSION_PATTERNS:
+                    match = pattern.search(content)
+                    if match:
+                        return match.group(1)
+    return None
+
+def _sdk_level(gradle_file, path, name, default):
+    """Nivel de API declarado en la app, o `default` si no es un número (p. ej. viene del catálogo)."""
+    value = gradle_file.get_property(path, name)
+    return value if value and value.isdigit() else default
+
+def _include_modules(settings_file, names, workspace):
+    """Añade `include` a settings.gradle(.kts) para los módulos que no estén ya incluidos."""
+    content = workspace.read(settings_file)
+    kotlin_dsl = settings_file.endswith(".kts")
+    lines = [f'include("{name}")' if kotlin_dsl else f"include '{name}'" for name in names]
+    if not lines:
+        return
+    includes = list(INCLUDE_LINE_PATTERN.finditer(content))
+    if includes:
+        position = includes[-1].end()
+        content = content[:position] + "".join(f"\n{line}" for line in lines) + content[position:]
+    else:
+        content = content + ("" if content.endswith("\n") or not content else "\n") + "".join(f"{line}\n" for line in lines)
+    workspace.write(settings_file, content)
+    print(f"Módulos {', '.join(names)} incluidos en {settings_file}.")
+
+def _version_reference(value):
+    reference = value.get("version") if isinstance(value, dict) else None
+    return reference.get("ref") if isinstance(reference, dict) else None
+
+def _alias_separator(catalog):
+    """Separador de los alias del catálogo (`-` salvo que los existentes usen sobre todo `_`)."""
+    for section in ("plugins", "libraries"):
+        aliases = [entry.alias for entry in catalog.aliases[section].values()]
+        hyphens = sum(alias.count("-") for alias in aliases)
+        underscores = sum(alias.count("_") for alias in aliases)
+        if hyphens or underscores:
+            return "_" if underscores > hyphens else "-"
+    return "-"
+
+def _free_alias(catalog, *words):
+    separator = _alias_separator(catalog)
+    alias = separator.join(words)
+    number = 2
+    candidate = alias
+    while catalog.has("plugins", candidate):
+        candidate = f"{alias}{separator}{number}"
+        number += 1
+    return candidate
+
+def _add_catalog_plugins(catalog):
+    """
+    Declara en `[plugins]` el plugin de Baseline Profile (con la versión de Macrobenchmark)
+    y `com.android.test` (con la del plugin de la app), si no estaban.
+    """
+    if catalog.find_plugin(BASELINE_PROFILE_PLUGIN_ID) is None:
+        library = catalog.find_library(*BENCHMARK_MACRO.split(":")[:2])
+        reference = _version_reference(library.value) if library else None
+        catalog.add_plugin(_free_alias(catalog, "androidx", "baselineprofile"), BASELINE_PROFILE_PLUGIN_ID,
+                           version=None if reference else BENCHMARK_VERSION, version_ref=reference)
+    application = catalog.find_plugin(ANDROID_APPLICATION_PLUGIN_ID)
+    if catalog.find_plugin(ANDROID_TEST_PLUGIN_ID) is None and application is not None:
+        reference = _version_reference(application.value)
+        version = None if reference else catalog.version_of(application.value)
+        if reference or version:
+            catalog.add_plugin(_free_alias(catalog, "android", "test"), ANDROID_TEST_PLUGIN_ID, version=version,
+                               version_ref=reference)
+
+def _register_root_plugins(project_path, catalog, agp, workspace):
+    """
+    Declara con `apply false` en el build.gradle raíz los plugins que aplican los módulos
+    nuevos. Si el proyecto carga AGP con `buildscript`, `com.android.test` ya está
+    disponible y el plugin de Baseline Profile se añade al classpath.
+    """
+    for build_name in ("build.gradle.kts", "build.gradle"):
+        root_build = os.path.join(project_path, build_name)
+        if not workspace.exists(root_build):
+            continue
+        gradle_file = GradleBuildFile.for_path(root_build, workspace.read(root_build))
+        uses_plugins_block = has_plugin(gradle_file, catalog, (ANDROID_APPLICATION_PLUGIN_ID,))
+        lines = []
+        for plugin_id, version in ((ANDROID_TEST_PLUGIN_ID, agp), (BASELINE_PROFILE_PLUGIN_ID, BENCHMARK_VERSION)):
+            if has_plugin(gradle_file, catalog, (plugin_id,)):
+                continue
+            accessor = plugin_accessor(catalog, plugin_id)
+            if accessor:
+                lines.append(f"alias({accessor}) apply false")
+            elif uses_plugins_block and version:
+                lines.append(f'id("{plugin_id}") version "{version}" apply false' if gradle_file.kotlin_dsl
+                             else f"id '{plugin_id}' version '{version}' apply false")
+            elif plugin_id == BASELINE_PROFILE_PLUGIN_ID and BASELINE_PROFILE_CLASSPATH not in gradle_file.text:
+                coordinate = f"{BASELINE_PROFILE_CLASSPATH}:{version}"
+                gradle_file.add_to_block(("buildscript", "dependencies"),
+                                         [f'classpath("{coordinate}")' if gradle_file.kotlin_dsl else f"classpath '{coordinate}'"])
+        if lines:
+            gradle_file.add_plugins(lines)
+        if gradle_file.changed:
+            workspace.write(root_build, gradle_file.to_text())
+            print(f"Plugins de los módulos de perfilado declarados en {root_build}.")
+        return
+
+def _benchmark_build_type(kotlin_dsl):
+    if kotlin_dsl:
+        return ['create("benchmark") {',
+                '    initWith(getByName("release"))',
+                '    signingConfig = signingConfigs.getByName("debug")',
+                '    matchingFallbacks += listOf("release")',
+                '    isDebuggable = false',
+                '}']
+    return ["benchmark {",
+            "    initWith buildTypes.release",
+            "    signingConfig signingConfigs.debug",
+            "    matchingFallbacks = ['release']",
+            "    debuggable false",
+            "}"]
+
+def _project_notation(name, kotlin_dsl):
+    return f'project("{name}")' if kotlin_dsl else f"project('{name}')"
+
+def _startup_activities(manifest, package_name):
+    """
+    Actividades generadas cuyo arranque se mide: SplashActivity (la de entrada a la app)
+    y las exportadas del paquete `view`. Las no exportadas no se pueden lanzar desde fuera.
+    """
+    splash = f"{package_name}.view.SplashActivity"
+    activities = [splash]
+    for name, element in sorted(manifest.activities.items()) if manifest else ():
+        if name != splash and name.startswith(f"{package_name}.view.") and element is not None \
+                and element.get("exported") == "true":
+            activities.append(name)
+    return activities
+
+def _startup_tests(activities):
+    registry = get_registry()
+    return "".join(registry.render(STARTUP_TEST_TEMPLATE, test_name="startup" + activity.rsplit(".", 1)[-1],
+                                   activity=activity)
+                   for activity in activities)
+
+@traced
+def add_startup_profiling(project_path, module="app", workspace=None):
+    """
+    Prepara la medición y optimización del arranque de la app:
+
+    - Crea los módulos `:baselineprofile` (genera el Baseline Profile y el Startup Profile
+      recorriendo el arranque) y `:macrobenchmark` (mide el arranque en frío de las
+      actividades generadas sin compilar y con el perfil), los incluye en settings.gradle
+      y declara sus plugins en el build.gradle raíz.
+    - En la app aplica el plugin de Baseline Profile, añade `profileinstaller` y la
+      dependencia `baselineProfile`, crea el build type `benchmark` y la declara
+      `profileable` en el manifiesto.
+
+    Las librerías y los plugins se añaden al catálogo libs.versions.toml si el proyecto lo usa.
+    Los módulos y las entradas que ya existen se conservan.
+
+    Args:
+        module (str): Módulo de la app (por defecto `app`).
+        workspace (Workspace | None): Workspace compartido. Si es None, todos los cambios
+            se escriben juntos al terminar.
+
+    Raises:
+        ValueError: Si el directorio no es un proyecto Android.
+    """
+    project_path = os.path.abspath(project_path)
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        raise ValueError("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+    app = model.module(module)
+    if app is None or not app["build_file"] or not app["package"]:
+        print(f"No se encontró el build.gradle o el paquete del módulo {module}.")
+        return
+
+    with open_workspace(workspace) as workspace:
+        app_file = GradleBuildFile.for_path(app["build_file"], workspace.read(app["build_file"]))
+        versions_toml_path = os.path.join(project_path, "gradle", "libs.versions.toml")
+        use_catalog = workspace.exists(versions_toml_path)
+        catalog = VersionCatalog.load(versions_toml_path, workspace) if use_catalog else None
+        if not has_plugin(app_file, catalog, (ANDROID_APPLICATION_PLUGIN_ID,)):
+            print(f"El módulo {module} no es una aplicación (com.android.application); no se añade el perfilado del arranque.")
+            return
+        agp = agp_version(project_path, catalog, workspace)
+        if agp and version_key(agp) < version_key(MINIMUM_AGP_VERSION):
+            print(f"⚠️  El plugin de Baseline Profile necesita AGP {MINIMUM_AGP_VERSION} o superior (el proyecto usa {agp}).")
+
+        # Notación de cada librería: accesor del catálogo o coordenada en línea
+        libraries = [PROFILE_INSTALLER] + TEST_LIBRARIES
+        if use_catalog:
+            aliases = add_dependencies_to_versions_toml(versions_toml_path, libraries, workspace)
+            catalog = VersionCatalog.load(versions_toml_path, workspace)
+            _add_catalog_plugins(catalog)
+            catalog.save(versions_toml_path, workspace)
+            notations = dict(zip(libraries, (alias_to_accessor(alias) for alias in aliases)))
+        else:
+            notations = {library: library for library in libraries}
+        _register_root_plugins(project_path, catalog, agp, workspace)
+
+        target_project = app["name"]
+        context = {
+            "application_id": app["application_id"] or app["package"],
+            "target_project": target_project,
+            "compile_sdk": _sdk_level(app_file, ("android",), "compileSdk", DEFAULT_COMPILE_SDK),
+            "target_sdk": _sdk_level(app_file, ("android", "defaultConfig"), "targetSdk", DEFAULT_COMPILE_SDK),
+        }
+        app_min_sdk = int(_sdk_level(app_file, ("android", "defaultConfig"), "minSdk", "0"))
+        manifest = AndroidManifest(workspace.read(app["manifest"]), app["package"]) if app["manifest"] else None
+        tests = _startup_tests(_startup_activities(manifest, app["package"]))
+
+        created = []
+        for name, min_sdk in PROFILING_MODULES.items():
+            module_path = os.path.join(project_path, name)
+            if model.module(":" + name) is not None or any(
+                    workspace.exists(os.path.join(module_path, build_name)) for build_name in ("build.gradle.kts", "build.gradle")):
+                print(f"✔️ El módulo :{name} ya existe, se conserva.")
+                continue
+            files = get_registry().render_profiling_module(
+                name, f"{app['package']}.{name}", app_file.kotlin_dsl, module=name, tests=tests,
+                min_sdk=max(min_sdk, app_min_sdk), **context
+            )
+            for relative_path, content in files.items():
+                path = os.path.join(module_path, *relative_path.split("/"))
+                if relative_path.startswith("build.gradle"):
+                    content = _configure_module_build(path, content, name, app_file, catalog, notations)
+                workspace.write(path, content)
+            created.append(":" + name)
+            print(f"Módulo :{name} creado en {module_path}.")
+        if created:
+            _include_modules(model.settings_file, created, workspace)
+
+        _configure_app(app, app_file, catalog, notations, workspace)
+        if manifest is not None and manifest.add_profileable():
+            workspace.write(app["manifest"], manifest.to_text())
+            print(f"App declarada profileable en {app['manifest']}.")
+
+def _configure_module_build(path, content, name, app_file, catalog, notations):
+    """Completa el build file de un módulo generado: plugins, dependencias y opciones de la JVM de la app."""
+    gradle_file = GradleBuildFile.for_path(path, content)
+    plugins = [ANDROID_TEST_PLUGIN_ID, KOTLIN_ANDROID_PLUGIN_ID]
+    if name == "baselineprofile":
+        plugins.append(BASELINE_PROFILE_PLUGIN_ID)
+    gradle_file.add_plugins([plugin_line(gradle_file, catalog, plugin_id) for plugin_id in plugins])
+    gradle_file.add_dependencies([("implementation", notations[library]) for library in TEST_LIBRARIES])
+    # Las opciones de un mismo bloque se añaden juntas: el bloque no existe en la plantilla
+    options = {}
+    for block, option in JVM_OPTIONS:
+        value = app_file.get_property(block, option)
+        if value:
+            options.setdefault(block, []).append(f"{option} = {value}" if gradle_file.kotlin_dsl else f"{option} {value}")
+    for block, lines in options.items():
+        gradle_file.add_to_block(block, lines)
+    return gradle_file.to_text()
+
+def _configure_app(app, app_file, catalog, notations, workspace):
+    """Aplica el plugin de Baseline Profile a la app y añade sus dependencias y el build type `benchmark`."""
+    added = []
+    if not has_plugin(app_file, catalog, (BASELINE_PROFILE_PLUGIN_ID,)):
+        line = plugin_line(app_file, catalog, BASELINE_PROFILE_PLUGIN_ID)
+        app_file.add_plugins([line])
+        added.append(f"Plugin: {line}")
+    added += app_file.add_dependencies([
+        ("implementation", notations[PROFILE_INSTALLER]),
+        ("baselineProfile", _project_notation(":baselineprofile", app_file.kotlin_dsl)),
+    ])
+    if app_file.find_block("android", "buildTypes", "benchmark") is None:
+        app_file.add_to_block(("android", "buildTypes"), _benchmark_build_type(app_file.kotlin_dsl))
+        added.append("Build type: benchmark")
+    if not added:
+        print(f"✔️ El módulo {app['name']} ya tiene configurado el perfilado del arranque.")
+        return
+    workspace.write(app["build_file"], app_file.to_text())
+    print(f"Perfilado del arranque configurado en {app['build_file']}:")
+    for line in added:
+        print(f"- {line}")
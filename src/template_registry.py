@@ -0,0 +1,229 @@
+import os
+import re
+
+BUILTIN_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATES_ENV = "ANDROID_ARCH_TEMPLATES"
+
+PLACEHOLDER_PATTERN = re.compile(r"{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}")
+
+# Ficheros generados por cada arquitectura: (ruta relativa al paquete base, plantilla)
+ARCHITECTURE_TEMPLATES = {
+    "MVP": [
+        ("presenter/BasePresenter.kt", "architecture/BasePresenter.kt.tmpl"),
+        ("model/BaseModel.kt", "architecture/BaseModel.kt.tmpl"),
+        ("repository/BaseRepository.kt", "architecture/BaseRepository.kt.tmpl"),
+    ],
+    "MVVM": [
+        ("viewmodel/BaseViewModel.kt", "architecture/BaseViewModel.kt.tmpl"),
+        ("model/BaseModel.kt", "architecture/BaseModel.kt.tmpl"),
+        ("repository/BaseRepository.kt", "architecture/BaseRepository.kt.tmpl"),
+        ("view/BaseView.kt", "architecture/BaseView.{view}.kt.tmpl"),
+    ],
+    "MVI": [
+        ("model/BaseModel.kt", "architecture/BaseModel.kt.tmpl"),
+        ("view/BaseView.kt", "architecture/BaseView.compose.kt.tmpl"),
+        ("repository/BaseRepository.kt", "architecture/BaseRepository.kt.tmpl"),
+        ("intent/BaseIntent.kt", "architecture/BaseIntent.kt.tmpl"),
+    ],
+}
+SPLASH_TEMPLATE = ("view/SplashActivity.kt", "architecture/SplashActivity.kt.tmpl")
+
+# Ficheros de cada pantalla (feature) generada con `render_feature`. MVI usa siempre Compose,
+# igual que sus clases base.
+FEATURE_REPOSITORY_TEMPLATES = [
+    ("repository/{feature}Repository.kt", "feature/Repository.kt.tmpl"),
+    ("repository/{feature}RepositoryImpl.kt", "feature/RepositoryImpl.kt.tmpl"),
+]
+FEATURE_TEMPLATES = {
+    "MVP": [
+        ("presenter/{feature}Presenter.kt", "feature/mvp/Presenter.kt.tmpl"),
+        ("view/{feature}View.kt", "feature/mvp/View.kt.tmpl"),
+        ("view/{feature}Activity.kt", "feature/mvp/Activity.{view}.kt.tmpl"),
+    ],
+    "MVVM": [
+        ("viewmodel/{feature}ViewModel.kt", "feature/mvvm/ViewModel.kt.tmpl"),
+        ("view/{feature}Activity.kt", "feature/mvvm/Activity.{view}.kt.tmpl"),
+    ],
+    "MVI": [
+        ("intent/{feature}Intent.kt", "feature/mvi/Intent.kt.tmpl"),
+        ("intent/{feature}Store.kt", "feature/mvi/Store.kt.tmpl"),
+        ("state/{feature}State.kt", "feature/mvi/State.kt.tmpl"),
+        ("view/{feature}Screen.kt", "feature/mvi/Screen.kt.tmpl"),
+        ("view/{feature}Activity.kt", "feature/mvi/Activity.compose.kt.tmpl"),
+    ],
+}
+FEATURE_SCREEN_TEMPLATE = ("view/{feature}Screen.kt", "feature/Screen.kt.tmpl")
+# Relativo a `src/main/res`; solo para las vistas XML
+FEATURE_LAYOUT_TEMPLATE = ("layout/{layout}.xml", "feature/activity_layout.xml.tmpl")
+
+# Módulos de perfilado del arranque: ficheros relativos al directorio del módulo
+PROFILING_TEMPLATES = {
+    "baselineprofile": [
+        ("build.gradle{extension}", "profiling/baselineprofile.build.gradle{extension}.tmpl"),
+        ("src/main/AndroidManifest.xml", "profiling/AndroidManifest.xml.tmpl"),
+        ("src/main/java/{package_path}/BaselineProfileGenerator.kt", "profiling/BaselineProfileGenerator.kt.tmpl"),
+    ],
+    "macrobenchmark": [
+        ("build.gradle{extension}", "profiling/macrobenchmark.build.gradle{extension}.tmpl"),
+        ("src/main/AndroidManifest.xml", "profiling/AndroidManifest.xml.tmpl"),
+        ("src/main/java/{package_path}/StartupBenchmark.kt", "profiling/StartupBenchmark.kt.tmpl"),
+    ],
+}
+# Test de StartupBenchmark para cada actividad medida
+STARTUP_TEST_TEMPLATE = "profiling/StartupTest.kt.tmpl"
+# Configuración de estabilidad del compilador de Compose (relativa al módulo)
+COMPOSE_STABILITY_TEMPLATE = "compose/compose_stability.conf.tmpl"
+
+def compile_template(source):
+    """
+    Compila el texto de una plantilla en una función `render(context)`.
+
+    Los marcadores `{{ nombre }}` se sustituyen por `context["nombre"]`; el resto del
+    texto se copia tal cual (incluidos los `$` de las plantillas de cadena de Kotlin).
+    """
+    parts = PLACEHOLDER_PATTERN.split(source)
+    literals = parts[0::2]
+    names = parts[1::2]
+
+    def render(context):
+        try:
+            values = [str(context[name]) for name in names]
+        except KeyError as e:
+            raise KeyError(f"Falta el valor {e} para renderizar la plantilla.") from None
+        output = [literals[0]]
+        for value, literal in zip(values, literals[1:]):
+            output.append(value)
+            output.append(literal)
+        return "".join(output)
+
+    render.placeholders = frozenset(names)
+    return render
+
+class TemplateRegistry:
+    """
+    Registro de plantillas de código Kotlin.
+
+    Busca cada plantilla en los directorios de usuario (en orden) y después en las
+    plantillas incluidas con el script, de modo que un equipo puede sustituir cualquier
+    fichero sin modificar la herramienta. Cada plantilla se compila una sola vez por
+    proceso y se guarda en caché por (plantilla, versión), donde la versión es la fecha
+    de modificación y el tamaño del fichero.
+    """
+
+    def __init__(self, search_paths=()):
+        self.search_paths = [os.path.abspath(path) for path in search_paths] + [BUILTIN_TEMPLATES_PATH]
+        self.compiled = {}
+
+    def resolve(self, name):
+        """Devuelve la ruta de la plantilla con mayor prioridad."""
+        for directory in self.search_paths:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+        raise FileNotFoundError(f"No se encontró la plantilla '{name}'.")
+
+    def get(self, name):
+        """Devuelve la función de renderizado de una plantilla, compilándola si es necesario."""
+        path = self.resolve(name)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        render = self.compiled.get(key)
+        if render is None:
+            with open(path, "r", encoding="utf-8") as file:
+                render = compile_template(file.read())
+            self.compiled[key] = render
+        return render
+
+    def render(self, name, **context):
+        return self.get(name)(context)
+
+    def render_tree(self, templates, **context):
+        """
+        Renderiza un conjunto de ficheros.
+
+        Args:
+            templates (list): Pares (ruta relativa de salida, plantilla). Ambos pueden usar
+                campos `{...}` de `str.format` con los valores de `context`.
+
+        Returns:
+            dict: Ruta relativa -> contenido renderizado.
+        """
+        return {
+            path.format(**context): self.render(template.format(**context), **context)
+            for path, template in templates
+        }
+
+    def render_architecture(self, architecture, package_name, use_compose, include_splash=True):
+        """
+        Renderiza en una sola llamada todos los ficheros base de una arquitectura.
+
+        Returns:
+            dict: Ruta relativa al paquete base -> contenido del fichero Kotlin.
+        """
+        if architecture not in ARCHITECTURE_TEMPLATES:
+            raise ValueError(f"Arquitectura no válida: {architecture}")
+        templates = list(ARCHITECTURE_TEMPLATES[architecture])
+        if include_splash:
+            templates.append(SPLASH_TEMPLATE)
+        return self.render_tree(templates, package=package_name, view="compose" if use_compose else "xml")
+
+    def render_feature(self, architecture, package_name, use_compose, name, layout, binding):
+        """
+        Renderiza los ficheros de una pantalla: vista, ViewModel/Presenter/Intent+State y
+        repositorio (interfaz e implementación).
+
+        Args:
+            name (str): Nombre de la feature en PascalCase (p. ej. `UserProfile`).
+            layout (str): Nombre del layout XML (p. ej. `activity_user_profile`).
+            binding (str): Clase de View Binding del layout.
+
+        Returns:
+            tuple: (ruta relativa al paquete base -> contenido, ruta relativa a `res` -> contenido)
+        """
+        if architecture not in FEATURE_TEMPLATES:
+            raise ValueError(f"Arquitectura no válida: {architecture}")
+        use_compose = use_compose or architecture == "MVI"
+        templates = list(FEATURE_TEMPLATES[architecture]) + FEATURE_REPOSITORY_TEMPLATES
+        if use_compose and architecture != "MVI":
+            templates.append(FEATURE_SCREEN_TEMPLATE)
+        context = {
+            "package": package_name,
+            "feature": name,
+            "layout": layout,
+            "binding": binding,
+            "view": "compose" if use_compose else "xml",
+        }
+        sources = self.render_tree(templates, **context)
+        resources = {} if use_compose else self.render_tree([FEATURE_LAYOUT_TEMPLATE], **context)
+        return sources, resources
+
+    def render_profiling_module(self, kind, namespace, kotlin_dsl, **context):
+        """
+        Renderiza los ficheros de un módulo de perfilado (`baselineprofile` o `macrobenchmark`).
+
+        Returns:
+            dict: Ruta relativa al módulo -> contenido.
+        """
+        if kind not in PROFILING_TEMPLATES:
+            raise ValueError(f"Módulo de perfilado no válido: {kind}")
+        return self.render_tree(PROFILING_TEMPLATES[kind], namespace=namespace, package_path=namespace.replace(".", "/"),
+                                extension=".kts" if kotlin_dsl else "", **context)
+
+_registry = None
+
+def get_registry():
+    """
+    Devuelve el registro compartido del proceso. Los directorios de usuario se leen de
+    la variable de entorno ANDROID_ARCH_TEMPLATES (separados por `os.pathsep`).
+    """
+    global _registry
+    if _registry is None:
+        paths = [path for path in os.environ.get(TEMPLATES_ENV, "").split(os.pathsep) if path]
+        _registry = TemplateRegistry(paths)
+    return _registry
+
+def configure_templates(search_paths):
+    """Sustituye el registro compartido por uno que busca primero en `search_paths`."""
+    global _registry
+    _registry = TemplateRegistry(search_paths)
+    return _registry
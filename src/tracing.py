@@ -0,0 +1,250 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+TRACE_ENV = "ANDROID_ARCH_TRACE"
+COUNTERS = ("files_opened", "bytes_read", "files_written", "bytes_written", "fsyncs", "renames", "directories_listed")
+
+class Tracer:
+    """
+    Registro de fases de un proceso: tiempo de reloj, tiempo de CPU del hilo y los
+    contadores de E/S acumulados durante cada fase (incluidas sus subfases).
+
+    Una fase con mucho tiempo de reloj y poco de CPU está esperando al sistema de
+    ficheros; si ambos son parecidos, el coste está en el análisis o la generación.
+    """
+
+    def __init__(self, output=None):
+        self.output = output
+        self.pid = os.getpid()
+        self.start = time.time()
+        self.local = threading.local()
+        self.events = []
+        self.lock = threading.Lock()
+
+    @property
+    def counters(self):
+        """Contadores del hilo actual, para que una fase no sume la E/S de otros hilos."""
+        counters = getattr(self.local, "counters", None)
+        if counters is None:
+            counters = self.local.counters = defaultdict(int)
+        return counters
+
+    def span(self, name, function, args, kwargs):
+        before = dict(self.counters)
+        start_wall = time.time()
+        start_clock = time.perf_counter()
+        start_cpu = time.thread_time()
+        error = None
+        try:
+            return function(*args, **kwargs)
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            event = {
+                "name": name,
+                "ts": start_wall,
+                "wall": time.perf_counter() - start_clock,
+                "cpu": time.thread_time() - start_cpu,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "counters": {key: value - before.get(key, 0) for key, value in self.counters.items()
+                             if value != before.get(key, 0)},
+            }
+            if error:
+                event["error"] = error
+            with self.lock:
+                self.events.append(event)
+
+_tracer = None
+
+def _active():
+    """Tracer del proceso actual. Un proceso hijo creado con fork empieza con uno vacío."""
+    global _tracer
+    tracer = _tracer
+    if tracer is not None and tracer.pid != os.getpid():
+        tracer = _tracer = Tracer()
+    return tracer
+
+def enable(output=None):
+    """
+    Activa el registro de fases en este proceso.
+
+    Args:
+        output (str | None): Prefijo de los ficheros del informe. Si se indica, al
+            terminar el proceso se escriben `<output>.json` y `<output>.trace.json`.
+    """
+    global _tracer
+    if _tracer is None or _tracer.pid != os.getpid():
+        _tracer = Tracer(output)
+        if output:
+            atexit.register(_write_at_exit, _tracer)
+    return _tracer
+
+def count(name, amount=1):
+    """Suma `amount` al contador `name` si el registro está activo."""
+    tracer = _tracer
+    if tracer is not None:
+        _active().counters[name] += amount
+
+def count_file(file, written=False):
+    """Cuenta un fichero abierto y su tamaño (leído o escrito) si el registro está activo."""
+    tracer = _tracer
+    if tracer is not None:
+        counters = _active().counters
+        counters["files_written" if written else "files_opened"] += 1
+        counters["bytes_written" if written else "bytes_read"] += os.fstat(file.fileno()).st_size
+
+def propagate(function):
+    """
+    Envuelve `function` para ejecutarla en otro hilo: al terminar, sus contadores se
+    suman a los del hilo que la ha envuelto (y a la fase en curso de este).
+    """
+    tracer = _tracer
+    if tracer is None:
+        return function
+    tracer = _active()
+    counters = tracer.counters
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        previous = getattr(tracer.local, "counters", None)
+        tracer.local.counters = own = defaultdict(int)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            tracer.local.counters = previous
+            with tracer.lock:
+                for key, value in own.items():
+                    counters[key] += value
+    return wrapper
+
+def traced(function):
+    """Registra cada llamada a `function` como una fase. Sin registro activo no añade nada más que una comprobación."""
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _tracer is None:
+            return function(*args, **kwargs)
+        return _active().span(name, function, args, kwargs)
+    return wrapper
+
+def collect():
+    """Devuelve y vacía las fases registradas en este proceso."""
+    tracer = _active()
+    if tracer is None:
+        return []
+    with tracer.lock:
+        events, tracer.events = tracer.events, []
+    return events
+
+def call_and_collect(function, *args, **kwargs):
+    """Ejecuta `function` en un proceso del pool y devuelve (resultado, fases registradas en él)."""
+    result = function(*args, **kwargs)
+    return result, collect()
+
+def merge(events):
+    """Añade al proceso actual las fases registradas en otro proceso."""
+    tracer = _active()
+    if tracer is not None and events:
+        with tracer.lock:
+            tracer.events.extend(events)
+
+def summarize(events):
+    """
+    Agrupa las fases por nombre.
+
+    Returns:
+        list: Un dict por fase con `name`, `calls`, `wall`, `cpu`, `wait` (reloj menos
+        CPU) y la suma de cada contador, ordenado de mayor a menor tiempo de reloj.
+    """
+    phases = {}
+    for event in events:
+        phase = phases.setdefault(event["name"], {"name": event["name"], "calls": 0, "errors": 0, "wall": 0.0,
+                                                  "cpu": 0.0, **{key: 0 for key in COUNTERS}})
+        phase["calls"] += 1
+        phase["errors"] += 1 if event.get("error") else 0
+        phase["wall"] += event["wall"]
+        phase["cpu"] += event["cpu"]
+        for key, value in event["counters"].items():
+            phase[key] = phase.get(key, 0) + value
+    for phase in phases.values():
+        phase["wait"] = max(0.0, phase["wall"] - phase["cpu"])
+        for key in ("wall", "cpu", "wait"):
+            phase[key] = round(phase[key], 6)
+    return sorted(phases.values(), key=lambda phase: phase["wall"], reverse=True)
+
+def chrome_trace(events):
+    """Eventos en el formato Trace Event de Chrome (chrome://tracing, Perfetto)."""
+    return {
+        "displayTimeUnit": "ms",
+        "traceEvents": [
+            {
+                "name": event["name"],
+                "ph": "X",
+                "ts": round(event["ts"] * 1e6),
+                "dur": round(event["wall"] * 1e6),
+                "pid": event["pid"],
+                "tid": event["tid"],
+                "args": {"cpu_ms": round(event["cpu"] * 1e3, 3), **event["counters"],
+                         **({"error": event["error"]} if event.get("error") else {})},
+            }
+            for event in sorted(events, key=lambda event: event["ts"])
+        ],
+    }
+
+def write_report(output, events=None):
+    """
+    Escribe `<output>.json` (resumen por fase) y `<output>.trace.json` (Chrome trace).
+
+    Returns:
+        tuple: Rutas de los dos ficheros.
+    """
+    tracer = _active()
+    if events is None:
+        events = list(tracer.events) if tracer else []
+    report_path, trace_path = f"{output}.json", f"{output}.trace.json"
+    directory = os.path.dirname(os.path.abspath(report_path))
+    os.makedirs(directory, exist_ok=True)
+    report = {
+        "elapsed": round(time.time() - tracer.start, 6) if tracer else 0.0,
+        "processes": len({event["pid"] for event in events}),
+        "phases": summarize(events),
+    }
+    with open(report_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    with open(trace_path, "w", encoding="utf-8") as file:
+        json.dump(chrome_trace(events), file)
+    return report_path, trace_path
+
+def print_summary(events, limit=10):
+    """Muestra las fases más costosas."""
+    print(f"{'Fase':<48} {'llamadas':>8} {'reloj':>9} {'CPU':>9} {'espera':>9} {'leídos':>8} {'escritos':>8} {'fsync':>6}")
+    for phase in summarize(events)[:limit]:
+        print(f"{phase['name'][:48]:<48} {phase['calls']:>8} {phase['wall']:>8.3f}s {phase['cpu']:>8.3f}s "
+              f"{phase['wait']:>8.3f}s {phase['files_opened']:>8} {phase['files_written']:>8} {phase['fsyncs']:>6}")
+
+def _write_at_exit(tracer):
+    # Solo el proceso que activó el registro escribe el informe
+    if tracer is not _tracer or tracer.pid != os.getpid():
+        return
+    try:
+        report_path, trace_path = write_report(tracer.output)
+    except OSError as e:
+        print(f"No se pudo guardar la traza: {e}")
+        return
+    print_summary(tracer.events)
+    print(f"Traza guardada en {report_path} y {trace_path}.")
+
+if os.environ.get(TRACE_ENV):
+    import multiprocessing
+
+    # Los procesos del pool heredan la variable: registran sus fases, pero el informe
+    # lo escribe solo el proceso principal
+    enable(None if multiprocessing.parent_process() else os.environ[TRACE_ENV])
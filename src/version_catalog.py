@@ -0,0 +1,392 @@
+import re
+
+from workspace import open_workspace
+
+SECTIONS = ("versions", "libraries", "bundles", "plugins")
+
+HEADER_PATTERN = re.compile(r'^\s*\[\s*([A-Za-z0-9_.-]+)\s*\]\s*(#.*)?$')
+KEY_PATTERN = re.compile(r'^\s*("[^"]*"|\'[^\']*\'|[A-Za-z0-9_.-]+)\s*=\s*')
+VERSION_VALUE_PATTERN = re.compile(r'^(\s*(?:"[^"]*"|\'[^\']*\'|[A-Za-z0-9_.-]+)\s*=\s*)("[^"]*"|\'[^\']*\')(.*)$', re.DOTALL)
+
+class CatalogEntry:
+    """Entrada de una sección del catálogo y el rango de líneas que ocupa en el fichero."""
+
+    __slots__ = ("section", "alias", "value", "start", "end")
+
+    def __init__(self, section, alias, value, start, end):
+        self.section = section
+        self.alias = alias
+        self.value = value
+        self.start = start
+        self.end = end
+
+def normalize_alias(alias):
+    """Gradle trata `-`, `_` y `.` como el mismo separador en los alias del catálogo."""
+    return re.sub(r"[-_.]", "-", alias).lower()
+
+def alias_to_accessor(alias):
+    """Devuelve el accesor de Gradle para un alias (p. ej. `room_ktx` -> `libs.room.ktx`)."""
+    return "libs." + re.sub(r"[-_]", ".", alias)
+
+def parse_value(text):
+    """
+    Interpreta un valor TOML: cadenas, tablas en línea (con claves con puntos como
+    `version.ref`), arrays, booleanos y números.
+
+    Returns:
+        Valor de Python equivalente. Las tablas se devuelven como dict anidados.
+    """
+    value, position = _parse_value(text, _skip(text, 0))
+    if _skip(text, position) != len(text):
+        raise ValueError(f"Valor TOML no válido: {text.strip()}")
+    return value
+
+def _skip(text, position):
+    """Salta espacios, saltos de línea y comentarios."""
+    while position < len(text):
+        char = text[position]
+        if char in " \t\r\n":
+            position += 1
+        elif char == "#":
+            newline = text.find("\n", position)
+            position = len(text) if newline == -1 else newline + 1
+        else:
+            break
+    return position
+
+def _parse_string(text, position):
+    quote = text[position]
+    end = text.find(quote, position + 1)
+    if quote == '"':
+        # Las comillas escapadas no cierran la cadena
+        while end != -1 and text[end - 1] == "\\":
+            end = text.find(quote, end + 1)
+    if end == -1:
+        raise ValueError("Cadena sin cerrar en el catálogo.")
+    return text[position + 1:end], end + 1
+
+def _parse_key(text, position):
+    parts = []
+    while True:
+        position = _skip(text, position)
+        if text[position] in "\"'":
+            part, position = _parse_string(text, position)
+        else:
+            match = re.compile(r"[A-Za-z0-9_-]+").match(text, position)
+            if not match:
+                raise ValueError(f"Clave no válida en el catálogo: {text[position:position + 20]}")
+            part, position = match.group(0), match.end()
+        parts.append(part)
+        position = _skip(text, position)
+        if position < len(text) and text[position] == ".":
+            position += 1
+            continue
+        return parts, position
+
+def _parse_value(text, position):
+    char = text[position]
+    if char in "\"'":
+        return _parse_string(text, position)
+    if char == "{":
+        table = {}
+        position = _skip(text, position + 1)
+        while text[position] != "}":
+            keys, position = _parse_key(text, position)
+            if text[position] != "=":
+                raise ValueError("Se esperaba '=' en una tabla del catálogo.")
+            value, position = _parse_value(text, _skip(text, position + 1))
+            target = table
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+            position = _skip(text, position)
+            if text[position] == ",":
+                position = _skip(text, position + 1)
+        return table, position + 1
+    if char == "[":
+        items = []
+        position = _skip(text, position + 1)
+        while text[position] != "]":
+            value, position = _parse_value(text, position)
+            items.append(value)
+            position = _skip(text, position)
+            if text[position] == ",":
+                position = _skip(text, position + 1)
+        return items, position + 1
+    match = re.compile(r"[A-Za-z0-9_.+-]+").match(text, position)
+    if not match:
+        raise ValueError(f"Valor no válido en el catálogo: {text[position:position + 20]}")
+    raw = match.group(0)
+    if raw in ("true", "false"):
+        return raw == "true", match.end()
+    try:
+        return (float(raw) if "." in raw else int(raw)), match.end()
+    except ValueError:
+        return raw, match.end()
+
+def _value_is_complete(text):
+    """Comprueba si las llaves y corchetes del valor están equilibrados (ignorando cadenas y comentarios)."""
+    depth = 0
+    position = 0
+    while position < len(text):
+        char = text[position]
+        if char in "\"'":
+            end = text.find(char, position + 1)
+            if end == -1:
+                return False
+            position = end
+        elif char == "#":
+            newline = text.find("\n", position)
+            if newline == -1:
+                break
+            position = newline
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+        position += 1
+    return depth <= 0
+
+def _strip_comment(text):
+    """Elimina el comentario final de un valor de una sola línea respetando las cadenas."""
+    position = 0
+    while position < len(text):
+        char = text[position]
+        if char in "\"'":
+            end = text.find(char, position + 1)
+            position = len(text) if end == -1 else end
+        elif char == "#":
+            return text[:position]
+        position += 1
+    return text
+
+class VersionCatalog:
+    """
+    Modelo de un fichero libs.versions.toml que conserva el texto original.
+
+    Las entradas de `[versions]`, `[libraries]`, `[bundles]` y `[plugins]` se indexan por
+    alias (normalizado como lo hace Gradle) y las librerías también por coordenada
+    `group:name`. Las modificaciones se guardan como parches sobre las líneas originales,
+    por lo que al guardar solo cambian las líneas añadidas o editadas.
+    """
+
+    def __init__(self, text=""):
+        self.lines = text.splitlines(keepends=True)
+        if self.lines and not self.lines[-1].endswith("\n"):
+            self.lines[-1] += "\n"
+        self.original_text = text
+        self.headers = {}
+        self.entries = {section: {} for section in SECTIONS}
+        self.aliases = {section: {} for section in SECTIONS}
+        self.coordinates = {}
+        self.plugin_ids = {}
+        self.insertions = {}
+        self.replacements = {}
+        self._parse()
+
+    @classmethod
+    def load(cls, path, workspace=None):
+        """Lee el catálogo (a través del workspace si se indica). Si no existe se crea uno vacío."""
+        with open_workspace(workspace) as workspace:
+            if not workspace.exists(path):
+                return cls("")
+            return cls(workspace.read(path))
+
+    def _parse(self):
+        section = None
+        index = 0
+        while index < len(self.lines):
+            line = self.lines[index]
+            header = HEADER_PATTERN.match(line)
+            if header:
+                section = header.group(1).lower()
+                self.headers.setdefault(section, index)
+                index += 1
+                continue
+
+            key = KEY_PATTERN.match(line)
+            if section not in self.entries or not key:
+                index += 1
+                continue
+
+            # Las tablas en línea y los arrays pueden ocupar varias líneas
+            start = index
+            value_text = line[key.end():]
+            while not _value_is_complete(value_text) and index + 1 < len(self.lines):
+                index += 1
+                value_text += self.lines[index]
+            index += 1
+
+            alias = key.group(1).strip("\"'")
+            try:
+                value = parse_value(_strip_comment(value_text) if start == index - 1 else value_text)
+            except (ValueError, IndexError):
+                value = value_text.strip()
+            self._index(CatalogEntry(section, alias, value, start, index))
+
+    def _index(self, entry):
+        self.entries[entry.section][entry.alias] = entry
+        self.aliases[entry.section][normalize_alias(entry.alias)] = entry
+        if entry.section == "libraries":
+            coordinate = self.library_coordinate(entry.value)
+            if coordinate:
+                self.coordinates.setdefault(coordinate, entry)
+        elif entry.section == "plugins":
+            if isinstance(entry.value, dict) and "id" in entry.value:
+                self.plugin_ids.setdefault(entry.value["id"], entry)
+            elif isinstance(entry.value, str):
+                self.plugin_ids.setdefault(entry.value.split(":")[0], entry)
+
+    @staticmethod
+    def library_coordinate(value):
+        """Devuelve `group:name` de una librería declarada con `module`, `group`/`name` o como cadena."""
+        if isinstance(value, str):
+            parts = value.split(":")
+            return ":".join(parts[:2]) if len(parts) >= 2 else None
+        if isinstance(value, dict):
+            if "module" in value:
+                return value["module"]
+            if "group" in value and "name" in value:
+                return f"{value['group']}:{value['name']}"
+        return None
+
+    def get(self, section, alias):
+        """Busca una entrada por alias (`room-ktx`, `room_ktx` y `room.ktx` son equivalentes)."""
+        return self.aliases[section].get(normalize_alias(alias))
+
+    def has(self, section, alias):
+        return normalize_alias(alias) in self.aliases[section]
+
+    def find_library(self, group, name):
+        """Devuelve la entrada de la librería `group:name` o None."""
+        return self.coordinates.get(f"{group}:{name}")
+
+    def find_plugin(self, plugin_id):
+        """Devuelve la entrada del plugin con el id indicado o None."""
+        return self.plugin_ids.get(plugin_id)
+
+    def version_of(self, value):
+        """Resuelve la versión de una librería o plugin siguiendo `version.ref`."""
+        if isinstance(value, str):
+            parts = value.split(":")
+            return parts[2] if len(parts) > 2 else None
+        if not isinstance(value, dict) or "version" not in value:
+            return None
+        version = value["version"]
+        if isinstance(version, dict) and "ref" in version:
+            entry = self.get("versions", version["ref"])
+            return entry.value if entry and isinstance(entry.value, str) else None
+        return version if isinstance(version, str) else None
+
+    def _add(self, section, alias, value_text):
+        if self.has(section, alias):
+            raise ValueError(f"El alias '{alias}' ya existe en [{section}].")
+        line = f"{alias} = {value_text}\n"
+        self.insertions.setdefault(section, []).append(line)
+        entry = CatalogEntry(section, alias, parse_value(value_text), None, None)
+        self._index(entry)
+        return entry
+
+    def add_version(self, alias, version):
+        return self._add("versions", alias, f'"{version}"')
+
+    def add_library(self, alias, group, name, version=None, version_ref=None):
+        """Añade una librería con el formato `{ group, name, version.ref }` usado por el script."""
+        value = f'{{ group = "{group}", name = "{name}"'
+        if version_ref:
+            value += f', version.ref = "{version_ref}"'
+        elif version:
+            value += f', version = "{version}"'
+        return self._add("libraries", alias, value + " }")
+
+    def add_plugin(self, alias, plugin_id, version=None, version_ref=None):
+        value = f'{{ id = "{plugin_id}"'
+        if version_ref:
+            value += f', version.ref = "{version_ref}"'
+        elif version:
+            value += f', version = "{version}"'
+        return self._add("plugins", alias, value + " }")
+
+    def add_bundle(self, alias, libraries):
+        return self._add("bundles", alias, "[" + ", ".join(f'"{library}"' for library in libraries) + "]")
+
+    def set_version(self, alias, version):
+        """
+        Cambia el valor de una entrada de `[versions]` reescribiendo solo su línea.
+
+        Returns:
+            bool: True si el valor ha cambiado.
+        """
+        entry = self.get("versions", alias)
+        if entry is None:
+            raise KeyError(alias)
+        if entry.value == version:
+            return False
+        entry.value = version
+        if entry.start is None:
+            # Entrada añadida en esta edición: se regenera la línea pendiente
+            lines = self.insertions["versions"]
+            for index, line in enumerate(lines):
+                if KEY_PATTERN.match(line).group(1).strip("\"'") == entry.alias:
+                    lines[index] = f'{entry.alias} = "{version}"\n'
+            return True
+        match = VERSION_VALUE_PATTERN.match(self.lines[entry.start])
+        if not match:
+            raise ValueError(f"No se puede editar la versión '{alias}': formato no soportado.")
+        self.replacements[entry.start] = f'{match.group(1)}"{version}"{match.group(3)}'
+        return True
+
+    def _insertion_point(self, section):
+        """Línea tras la que se insertan las nuevas entradas de una sección."""
+        entries = [entry.end for entry in self.entries[section].values() if entry.end is not None]
+        if entries:
+            return max(entries)
+        return self.headers[section] + 1
+
+    @property
+    def changed(self):
+        return bool(self.insertions or self.replacements)
+
+    def to_text(self):
+        """Devuelve el contenido del catálogo con los parches aplicados."""
+        if not self.changed:
+            return self.original_text
+
+        after = {}
+        missing = []
+        for section in SECTIONS:
+            lines = self.insertions.get(section)
+            if not lines:
+                continue
+            if section in self.headers:
+                after.setdefault(self._insertion_point(section), []).extend(lines)
+            else:
+                missing.append(section)
+
+        output = []
+        for index, line in enumerate(self.lines):
+            if index in after:
+                output.extend(after.pop(index))
+            output.append(self.replacements.get(index, line))
+        output.extend(after.pop(len(self.lines), []))
+
+        # Las secciones que no existían se añaden al final del fichero
+        for section in missing:
+            if output and output[-1].strip():
+                output.append("\n")
+            output.append(f"[{section}]\n")
+            output.extend(self.insertions[section])
+        return "".join(output)
+
+    def save(self, path, workspace=None):
+        """
+        Guarda el catálogo si hay cambios.
+
+        Returns:
+            bool: True si el catálogo tenía cambios que guardar.
+        """
+        with open_workspace(workspace) as workspace:
+            if not self.changed and workspace.exists(path):
+                return False
+            workspace.write(path, self.to_text())
+        return True
@@ -0,0 +1,315 @@
+import hashlib
+import os
+import pickle
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dependency_catalog import cache_directory
+
+REPOSITORIES_ENV = "ANDROID_ARCH_REPOSITORIES"
+INDEX_FORMAT = 1
+INDEX_SHARDS = 256
+
+ARTIFACT_EXTENSIONS = (".pom", ".module", ".jar", ".aar")
+VERSION_TOKEN_PATTERN = re.compile(r"\d+|[a-z]+")
+
+# Orden de los calificadores de Maven; las versiones sin calificador son releases
+QUALIFIER_RANK = {
+    "snapshot": 0, "dev": 0,
+    "alpha": 1, "a": 1,
+    "beta": 2, "b": 2,
+    "milestone": 3, "m": 3, "eap": 3, "preview": 3, "pre": 3, "ea": 3,
+    "rc": 4, "cr": 4,
+    "": 5, "ga": 5, "final": 5, "release": 5,
+    "sp": 6,
+}
+
+def default_repositories():
+    """
+    Almacenes locales de artefactos: el repositorio de Maven (~/.m2/repository), la caché
+    de Gradle (modules-2/files-2.1) y los directorios de ANDROID_ARCH_REPOSITORIES.
+    """
+    gradle_home = os.environ.get("GRADLE_USER_HOME") or os.path.join(os.path.expanduser("~"), ".gradle")
+    repositories = [
+        os.path.join(os.path.expanduser("~"), ".m2", "repository"),
+        os.path.join(gradle_home, "caches", "modules-2", "files-2.1"),
+    ]
+    repositories += [path for path in os.environ.get(REPOSITORIES_ENV, "").split(os.pathsep) if path]
+    return repositories
+
+def repository_layout(path):
+    """Devuelve "gradle" para la caché modules-2 de Gradle y "maven" para el resto."""
+    return "gradle" if os.path.basename(os.path.normpath(path)) == "files-2.1" else "maven"
+
+def is_stable(version):
+    """Una versión es estable si no lleva calificadores de preversión (alpha, beta, rc, SNAPSHOT...)."""
+    return all(QUALIFIER_RANK.get(token, 5) >= 5 for token in VERSION_TOKEN_PATTERN.findall(version.lower()))
+
+def version_key(version):
+    """
+    Clave de ordenación de versiones al estilo de Maven: la parte numérica se compara
+    como números (sin ceros finales), después el calificador (alpha < beta < rc < release)
+    y por último el resto de la versión.
+    """
+    tokens = VERSION_TOKEN_PATTERN.findall(version.lower())
+    numbers = []
+    while tokens and tokens[0].isdigit():
+        numbers.append(int(tokens.pop(0)))
+    while numbers and numbers[-1] == 0:
+        numbers.pop()
+    qualifier = tokens.pop(0) if tokens and not tokens[0].isdigit() else ""
+    rest = tuple((1, int(token), "") if token.isdigit() else (0, 0, token) for token in tokens)
+    return tuple(numbers), QUALIFIER_RANK.get(qualifier, 5), qualifier, rest
+
+def _subdirectories(path):
+    try:
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
+def _is_version_directory(path, artifact, version):
+    prefix = os.path.join(path, version, f"{artifact}-{version}")
+    return any(os.path.exists(prefix + extension) for extension in ARTIFACT_EXTENSIONS)
+
+def _scan_maven(root, relative, previous, state, versions):
+    """
+    Recorre un directorio de un repositorio Maven. Un directorio es de un artefacto si
+    alguno de sus subdirectorios contiene `<artefacto>-<versión>.pom` (o .jar/.aar);
+    el resto de subdirectorios se recorren como grupos anidados.
+    """
+    path = os.path.join(root, relative)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return
+    cached = previous.get(relative)
+    if cached is not None and cached[0] == mtime:
+        _, found, others = cached
+    else:
+        artifact = os.path.basename(relative)
+        found, others = [], []
+        for name in _subdirectories(path):
+            (found if _is_version_directory(path, artifact, name) else others).append(name)
+    state[relative] = (mtime, found, others)
+    if found:
+        group = os.path.dirname(relative).replace(os.sep, ".")
+        versions.setdefault(f"{group}:{os.path.basename(relative)}", set()).update(found)
+    for name in others:
+        _scan_maven(root, os.path.join(relative, name), previous, state, versions)
+
+def _scan_gradle(root, group, previous, state, versions):
+    """Recorre un grupo de la caché de Gradle: files-2.1/<grupo>/<artefacto>/<versión>/<hash>/."""
+    path = os.path.join(root, group)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return
+    cached = previous.get(group)
+    artifacts = cached[1] if cached is not None and cached[0] == mtime else _subdirectories(path)
+    state[group] = (mtime, artifacts)
+    for artifact in artifacts:
+        relative = os.path.join(group, artifact)
+        try:
+            artifact_mtime = os.stat(os.path.join(root, relative)).st_mtime_ns
+        except OSError:
+            continue
+        cached = previous.get(relative)
+        found = cached[1] if cached is not None and cached[0] == artifact_mtime else _subdirectories(os.path.join(root, relative))
+        state[relative] = (artifact_mtime, found)
+        if found:
+            versions.setdefault(f"{group}:{artifact}", set()).update(found)
+
+def scan_units(root, layout, units, previous):
+    """
+    Escanea un lote de directorios de primer nivel de un repositorio. Se ejecuta en un
+    proceso del pool y reutiliza las entradas de `previous` cuya fecha de modificación
+    no ha cambiado.
+
+    Returns:
+        tuple: (estado del escaneo {ruta relativa: entrada}, {"grupo:artefacto": versiones})
+    """
+    state, versions = {}, {}
+    scan = _scan_gradle if layout == "gradle" else _scan_maven
+    for unit in units:
+        scan(root, unit, previous, state, versions)
+    return state, versions
+
+def _scan_roots(root, layout):
+    """
+    Directorios que se reparten entre los procesos: los grupos en la caché de Gradle y
+    el segundo nivel (p. ej. `com/google`) en un repositorio Maven.
+    """
+    if layout == "gradle":
+        return _subdirectories(root)
+    units = []
+    for name in _subdirectories(root):
+        children = _subdirectories(os.path.join(root, name))
+        units.extend(os.path.join(name, child) for child in children)
+    return units
+
+class VersionResolver:
+    """
+    Índice persistente de las versiones disponibles en los almacenes locales de artefactos.
+
+    `refresh()` escanea los repositorios en paralelo y guarda en la caché el índice de
+    versiones (repartido en fragmentos por grupo), que es lo único que leen las consultas,
+    y el estado del escaneo (fecha de modificación de cada directorio), que permite que
+    el siguiente refresco solo vuelva a listar los directorios que han cambiado.
+    """
+
+    def __init__(self, repositories=None):
+        self.repositories = []
+        for path in repositories or default_repositories():
+            path = os.path.abspath(os.path.expanduser(path))
+            if os.path.isdir(os.path.join(path, "files-2.1")):
+                # Se admite también la ruta de modules-2
+                path = os.path.join(path, "files-2.1")
+            self.repositories.append(path)
+        key = hashlib.sha1("\n".join(self.repositories).encode("utf-8")).hexdigest()[:16]
+        self.index_path = os.path.join(cache_directory(), f"versions-{INDEX_FORMAT}-{key}")
+        self.state_path = os.path.join(cache_directory(), f"versions-{INDEX_FORMAT}-{key}-state.pickle")
+        self._shards = {}
+
+    @staticmethod
+    def _load(path, default):
+        try:
+            with open(path, "rb") as file:
+                return pickle.load(file)
+        except Exception:
+            return default
+
+    @staticmethod
+    def _save(path, data):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el índice de versiones: {e}")
+
+    @staticmethod
+    def _shard_of(group):
+        return hashlib.sha1(group.encode("utf-8")).digest()[0] % INDEX_SHARDS
+
+    def _shard_path(self, shard):
+        return os.path.join(self.index_path, f"{shard:02x}.pickle")
+
+    def lookup(self, group, name):
+        """
+        Versiones ordenadas de `group:name` según el índice. El índice está repartido en
+        ficheros por grupo, así que una consulta solo lee del disco el fragmento de su grupo.
+        """
+        shard = self._shard_of(group)
+        if shard not in self._shards:
+            self._shards[shard] = self._load(self._shard_path(shard), {})
+        return self._shards[shard].get(f"{group}:{name}", ())
+
+    def refresh(self, full=False, max_workers=None):
+        """
+        Actualiza el índice. Solo se vuelven a listar los directorios cuya fecha de
+        modificación ha cambiado desde el último escaneo (todos si `full` es True).
+
+        Returns:
+            dict: Estadísticas del escaneo (`artifacts`, `directories`, `elapsed`).
+        """
+        start = time.perf_counter()
+        previous_states = {} if full else self._load(self.state_path, {})
+        states, versions = {}, {}
+        workers = max(1, max_workers or os.cpu_count() or 1)
+
+        for root in self.repositories:
+            if not os.path.isdir(root):
+                continue
+            layout = repository_layout(root)
+            previous = previous_states.get(root, {})
+            units = _scan_roots(root, layout)
+            # Lotes pequeños para repartir bien la carga entre procesos
+            size = max(1, len(units) // (workers * 8))
+            batches = [units[index:index + size] for index in range(0, len(units), size)]
+            state = {}
+            if workers == 1 or len(batches) <= 1:
+                results = [scan_units(root, layout, batch, previous) for batch in batches]
+            else:
+                # Cada proceso recibe solo el estado anterior de sus directorios
+                by_unit = {}
+                depth = 1 if layout == "gradle" else 2
+                for key, value in previous.items():
+                    unit = os.sep.join(key.split(os.sep)[:depth])
+                    by_unit.setdefault(unit, {})[key] = value
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = []
+                    for batch in batches:
+                        batch_previous = {}
+                        for unit in batch:
+                            batch_previous.update(by_unit.get(unit, {}))
+                        futures.append(executor.submit(scan_units, root, layout, batch, batch_previous))
+                    results = [future.result() for future in futures]
+            for batch_state, batch_versions in results:
+                state.update(batch_state)
+                for module, found in batch_versions.items():
+                    versions.setdefault(module, set()).update(found)
+            states[root] = state
+
+        shards = {shard: {} for shard in range(INDEX_SHARDS)}
+        for module, found in versions.items():
+            shards[self._shard_of(module.split(":", 1)[0])][module] = tuple(sorted(found, key=version_key))
+        for shard, entries in shards.items():
+            self._save(self._shard_path(shard), entries)
+        self._shards = shards
+        self._save(self.state_path, states)
+        return {
+            "artifacts": len(versions),
+            "directories": sum(len(state) for state in states.values()),
+            "elapsed": time.perf_counter() - start,
+        }
+
+    def available(self, group, name):
+        """Versiones disponibles localmente de `group:name`, de la más antigua a la más nueva."""
+        return list(self.lookup(group, name))
+
+    def latest(self, group, name, stable=True):
+        """Versión más reciente disponible localmente (solo estables si `stable`), o None."""
+        for version in reversed(self.lookup(group, name)):
+            if not stable or is_stable(version):
+                return version
+        return None
+
+    def resolve(self, coordinate):
+        """
+        Devuelve la coordenada con la versión estable más reciente entre la indicada y las
+        disponibles localmente. Las coordenadas sin versión (gestionadas por un BOM) no se tocan.
+        """
+        parts = coordinate.split(":")
+        if len(parts) != 3:
+            return coordinate
+        group, name, version = parts
+        latest = self.latest(group, name)
+        if latest and version_key(latest) > version_key(version):
+            return f"{group}:{name}:{latest}"
+        return coordinate
+
+def resolve_versions(dependencies, repositories=None, refresh=True):
+    """
+    Actualiza las versiones de una lista de coordenadas con las de los almacenes locales.
+
+    Args:
+        refresh (bool): Si se actualiza el índice antes de resolver (de forma incremental).
+
+    Returns:
+        list: Coordenadas con las versiones resueltas, en el mismo orden.
+    """
+    resolver = VersionResolver(repositories)
+    if refresh:
+        stats = resolver.refresh()
+        print(f"Índice de versiones actualizado: {stats['artifacts']} artefactos en {stats['elapsed']:.2f}s.")
+    resolved = []
+    for dependency in dependencies:
+        new = resolver.resolve(dependency)
+        if new != dependency:
+            print(f"- {dependency} -> {new.rsplit(':', 1)[1]}")
+        resolved.append(new)
+    return resolved
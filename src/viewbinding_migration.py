@@ -0,0 +1,330 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from gradle_parser import GradleBuildFile
+from project_inspector import inspect_project
+from tracing import traced
+from workspace import open_workspace
+
+KOTLIN_ANDROID_EXTENSIONS_IDS = {"kotlin-android-extensions", "org.jetbrains.kotlin.android.extensions"}
+SYNTHETIC_MARKER = b"kotlinx.android.synthetic"
+SKIPPED_DIRECTORIES = {"build", ".gradle", ".idea", ".git"}
+# Ficheros por proceso a partir de los que compensa repartir el trabajo
+PARALLEL_THRESHOLD = 400
+
+SYNTHETIC_IMPORT_PATTERN = re.compile(
+    r"^[ \t]*import[ \t]+kotlinx\.android\.synthetic\.(\w+)\.(\w+)(\.view)?\.(\*|\w+)[ \t]*(?:as[ \t]+\w+[ \t]*)?;?[ \t]*\r?\n",
+    re.MULTILINE,
+)
+VIEW_ID_PATTERN = re.compile(rb'android:id\s*=\s*"@\+?id/(\w+)"')
+DECLARATION_PATTERN = re.compile(r"\b(?:val|var|fun)\s+(?:<[^>]*>\s*)?(?:\w+\.)?(\w+)|[(,]\s*(\w+)\s*:")
+LITERAL_PATTERN = r'"""[\s\S]*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*[\s\S]*?\*/'
+CLASS_BODY_PATTERN = re.compile(r"^([ \t]*)(?:[\w@]+[ \t]+)*class[ \t]+\w+[^{]*\{", re.MULTILINE)
+PACKAGE_LINE_PATTERN = re.compile(r"^[ \t]*package[ \t]+[\w.]+[ \t]*;?[ \t]*\r?\n", re.MULTILINE)
+
+def to_camel_case(name, capitalize=False):
+    """`activity_main` -> `activityMain` (o `ActivityMain`), igual que el generador de View Binding."""
+    parts = [part for part in name.split("_") if part]
+    if not parts:
+        return name
+    text = parts[0] + "".join(part[:1].upper() + part[1:] for part in parts[1:])
+    return text[:1].upper() + text[1:] if capitalize else text
+
+def binding_class_name(layout):
+    return to_camel_case(layout, capitalize=True) + "Binding"
+
+def index_layouts(model):
+    """
+    Indexa los layouts de todos los módulos: nombre -> (clase de binding completa, ids).
+
+    Si dos módulos tienen un layout con el mismo nombre se guarda el de cada módulo en
+    `by_module` para que cada fichero use primero los de su propio módulo.
+
+    Returns:
+        tuple: (índice global, {directorio del módulo: índice del módulo})
+    """
+    layouts, by_module = {}, {}
+    for module in model.modules.values():
+        namespace = module["namespace"] or module["package"]
+        if not namespace:
+            continue
+        module_layouts = {}
+        source_directory = os.path.join(module["path"], "src")
+        try:
+            source_sets = [entry.path for entry in os.scandir(source_directory) if entry.is_dir()]
+        except OSError:
+            continue
+        for source_set in source_sets:
+            resources = os.path.join(source_set, "res")
+            try:
+                layout_directories = [entry.path for entry in os.scandir(resources)
+                                      if entry.is_dir() and entry.name.startswith("layout")]
+            except OSError:
+                continue
+            for directory in layout_directories:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith(".xml"):
+                            continue
+                        name = entry.name[:-4]
+                        with open(entry.path, "rb") as file:
+                            ids = {match.decode("ascii") for match in VIEW_ID_PATTERN.findall(file.read())}
+                        binding, known = module_layouts.get(name, (f"{namespace}.databinding.{binding_class_name(name)}", set()))
+                        # Las variantes (layout-land, ...) comparten clase y suman sus ids
+                        module_layouts[name] = (binding, known | ids)
+        by_module[module["path"]] = module_layouts
+        for name, entry in module_layouts.items():
+            layouts.setdefault(name, entry)
+    return layouts, by_module
+
+def _rewrite_references(content, names, replacement):
+    """Sustituye los identificadores de `names` fuera de cadenas y comentarios."""
+    if not names:
+        return content
+    pattern = re.compile(
+        r"(" + LITERAL_PATTERN + r")|(?<![\w.$@])(" + "|".join(sorted(names, key=len, reverse=True)) + r")\b(?!\s*:)"
+    )
+    return pattern.sub(lambda match: match.group(1) or replacement(match.group(2)), content)
+
+def _add_binding_initialization(content, layout, binding, variable):
+    """
+    Sustituye el inflado del layout por el de su binding en actividades y fragmentos.
+
+    Returns:
+        tuple: (contenido, True si se encontró dónde inicializar el binding)
+    """
+    simple = binding.rsplit(".", 1)[-1]
+    reference = re.escape(f"R.layout.{layout}")
+
+    activity = re.compile(r"^([ \t]*)setContentView\(\s*" + reference + r"\s*\)", re.MULTILINE)
+    if activity.search(content):
+        content = activity.sub(lambda match: f"{match.group(1)}{variable} = {simple}.inflate(layoutInflater)\n"
+                                             f"{match.group(1)}setContentView({variable}.root)", content, count=1)
+        return content, True
+
+    fragment = re.compile(r"(\w+)\.inflate\(\s*" + reference + r"\s*,\s*(\w+)\s*,\s*false\s*\)")
+    if fragment.search(content):
+        content = fragment.sub(lambda match: f"{simple}.inflate({match.group(1)}, {match.group(2)}, false)"
+                                             f".also {{ {variable} = it }}.root", content, count=1)
+        return content, True
+
+    view_created = re.compile(r"override\s+fun\s+onViewCreated\(\s*(\w+)\s*:\s*View\b[^)]*\)[^{]*\{([ \t]*\r?\n([ \t]*))?")
+    if re.search(r"\(\s*" + reference + r"\s*\)", content) and view_created.search(content):
+        def initialize(match):
+            indentation = match.group(3) if match.group(2) else "        "
+            return f"{match.group(0).rstrip()}\n{indentation}{variable} = {simple}.bind({match.group(1)})\n" + (indentation if match.group(2) else "")
+        return view_created.sub(initialize, content, count=1), True
+    return content, False
+
+def migrate_source(content, layouts, module_layouts=None):
+    """
+    Migra un fichero Kotlin de los imports sintéticos a View Binding.
+
+    Los imports `kotlinx.android.synthetic.<variante>.<layout>.*` se sustituyen por el
+    de la clase de binding, las referencias a vistas pasan a `binding.<id>` y, si el
+    fichero infla el layout (actividad o fragmento), se declara e inicializa el binding.
+
+    Returns:
+        tuple: (contenido nuevo o None si no cambia, clases de binding usadas, motivos
+        de revisión manual)
+    """
+    imports = SYNTHETIC_IMPORT_PATTERN.findall(content)
+    if not imports:
+        return None, [], []
+
+    manual = []
+    used = {}
+    view_imports = []
+    for _, layout, view_extension, _ in imports:
+        entry = (module_layouts or {}).get(layout) or layouts.get(layout)
+        if entry is None:
+            manual.append(f"layout '{layout}' no encontrado")
+            continue
+        if view_extension:
+            # `layout.view.*` se usa sobre vistas arbitrarias (p. ej. itemView.title en un ViewHolder)
+            view_imports.append(layout)
+        used.setdefault(layout, entry)
+    if not used:
+        return None, [], manual
+
+    # Los imports de layouts desconocidos se dejan para revisarlos a mano
+    content = SYNTHETIC_IMPORT_PATTERN.sub(lambda match: "" if match.group(2) in used else match.group(0), content)
+    variables = {layout: "binding" if len(used) == 1 else to_camel_case(layout) + "Binding" for layout in used}
+
+    declared = {name for groups in DECLARATION_PATTERN.findall(content) for name in groups if name}
+    references = {}
+    for layout, (_, ids) in used.items():
+        if layout in view_imports:
+            continue
+        for view_id in ids:
+            if view_id not in declared:
+                references.setdefault(view_id, variables[layout])
+    shadowed = sorted(view_id for _, ids in used.values() for view_id in ids if view_id in declared)
+    if shadowed:
+        manual.append(f"identificadores declarados también en el fichero: {', '.join(shadowed)}")
+    content = _rewrite_references(content, references,
+                                  lambda view_id: f"{references[view_id]}.{to_camel_case(view_id)}")
+
+    properties = []
+    for layout, (binding, _) in used.items():
+        if layout in view_imports:
+            manual.append(f"referencias de '{layout}.view.*' sin migrar (crea el binding en el ViewHolder o la vista)")
+            continue
+        content, initialized = _add_binding_initialization(content, layout, binding, variables[layout])
+        if initialized:
+            properties.append(f"private lateinit var {variables[layout]}: {binding.rsplit('.', 1)[-1]}")
+        else:
+            manual.append(f"no se encontró dónde inflar '{layout}'")
+
+    if properties:
+        match = CLASS_BODY_PATTERN.search(content)
+        if match:
+            indentation = match.group(1) + "    "
+            declarations = "".join(f"\n{indentation}{line}" for line in properties)
+            content = content[:match.end()] + declarations + "\n" + content[match.end():]
+        else:
+            manual.append("no se encontró la clase donde declarar el binding")
+
+    new_imports = sorted({binding for binding, _ in used.values()})
+    import_lines = "".join(f"import {binding}\n" for binding in new_imports)
+    first_import = re.search(r"^[ \t]*import[ \t]", content, re.MULTILINE)
+    if first_import:
+        content = content[:first_import.start()] + import_lines + content[first_import.start():]
+    else:
+        package_line = PACKAGE_LINE_PATTERN.search(content)
+        position = package_line.end() if package_line else 0
+        content = content[:position] + "\n" + import_lines + content[position:]
+    return content, new_imports, manual
+
+_worker_layouts = None
+
+def _init_worker(layouts):
+    global _worker_layouts
+    _worker_layouts = layouts
+
+def _migrate_chunk(items, layouts=None):
+    """Procesa un lote de (ruta, directorio del módulo) y devuelve solo los ficheros que cambian."""
+    layouts, by_module = layouts or _worker_layouts
+    results = []
+    for path, module_path in items:
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            continue
+        # Filtro rápido por bytes: la mayoría de ficheros no usa imports sintéticos
+        if SYNTHETIC_MARKER not in data:
+            continue
+        try:
+            content = data.decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        new_content, _, manual = migrate_source(content, layouts, by_module.get(module_path))
+        if new_content is not None or manual:
+            results.append((path, module_path, new_content, manual))
+    return results
+
+def find_kotlin_files(root):
+    """Ficheros `.kt` bajo `root`, sin entrar en carpetas de build ni ocultas."""
+    files = []
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRECTORIES:
+                            pending.append(entry.path)
+                    elif entry.name.endswith(".kt"):
+                        files.append(entry.path)
+        except OSError:
+            continue
+    return files
+
+def enable_view_binding(build_file, workspace):
+    """
+    Quita kotlin-android-extensions y activa `buildFeatures.viewBinding` en un build.gradle(.kts).
+
+    Returns:
+        bool: True si el fichero cambia.
+    """
+    gradle_file = GradleBuildFile.for_path(build_file, workspace.read(build_file))
+    removed = gradle_file.remove_plugins(KOTLIN_ANDROID_EXTENSIONS_IDS)
+    if gradle_file.find_block("android") is None and not removed:
+        # No es un módulo Android (p. ej. una librería Kotlin pura)
+        return False
+    gradle_file.set_property(("android", "buildFeatures"), "viewBinding", "true")
+    if not gradle_file.changed:
+        return False
+    workspace.write(build_file, gradle_file.to_text())
+    if removed:
+        print(f"Plugin kotlin-android-extensions eliminado de {build_file}.")
+    print(f"viewBinding activado en {build_file}.")
+    return True
+
+@traced
+def migrate_to_view_binding(project_path, modules=None, workspace=None, max_workers=None):
+    """
+    Migra los módulos de un proyecto de kotlin-android-extensions a View Binding.
+
+    Los layouts de todos los módulos se indexan una vez; los ficheros Kotlin de los
+    módulos seleccionados se reparten entre un pool de procesos y solo se decodifican
+    los que contienen imports sintéticos. En los módulos con código migrado (o con el
+    plugin aplicado) se quita el plugin y se activa `viewBinding`.
+
+    Args:
+        modules (iterable | None): Módulos a migrar (nombre Gradle o directorio). Si es
+            None se migran todos los de settings.gradle.
+
+    Returns:
+        dict: `files` (ficheros Kotlin revisados), `migrated` (ficheros reescritos),
+        `manual` ({ruta: motivos} que necesitan revisión) y `modules` (build files cambiados).
+    """
+    model = inspect_project(project_path)
+    if not model.is_android_project:
+        raise ValueError("El directorio no parece ser un proyecto Android. Asegúrate de estar en el lugar correcto.")
+    selected = model.find_modules(modules)
+    layouts = index_layouts(model)
+
+    items = []
+    for module in selected:
+        items.extend((path, module["path"]) for path in find_kotlin_files(os.path.join(module["path"], "src")))
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(items) // PARALLEL_THRESHOLD or 1))
+    if workers == 1:
+        results = _migrate_chunk(items, layouts)
+    else:
+        size = -(-len(items) // (workers * 4))
+        chunks = [items[index:index + size] for index in range(0, len(items), size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(layouts,)) as executor:
+            for chunk_results in executor.map(_migrate_chunk, chunks):
+                results.extend(chunk_results)
+
+    summary = {"files": len(items), "migrated": 0, "manual": {}, "modules": []}
+    with open_workspace(workspace) as workspace:
+        touched_modules = set()
+        for path, module_path, content, manual in results:
+            if content is not None:
+                workspace.write(path, content)
+                summary["migrated"] += 1
+                touched_modules.add(module_path)
+            if manual:
+                summary["manual"][path] = manual
+
+        for module in selected:
+            build_file = module["build_file"]
+            if not build_file:
+                continue
+            gradle_file = GradleBuildFile.for_path(build_file, workspace.read(build_file))
+            uses_extensions = any(gradle_file.has_plugin(plugin_id) for plugin_id in KOTLIN_ANDROID_EXTENSIONS_IDS)
+            if (uses_extensions or module["path"] in touched_modules) and enable_view_binding(build_file, workspace):
+                summary["modules"].append(module["name"])
+
+    print(f"View Binding: {summary['migrated']} de {summary['files']} ficheros Kotlin migrados "
+          f"en {len(selected)} módulos.")
+    for path, reasons in summary["manual"].items():
+        print(f"⚠️ Revisar {path}: {'; '.join(reasons)}")
+    return summary
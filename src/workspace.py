@@ -0,0 +1,389 @@
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from tracing import count, count_file, propagate, traced
+
+# Hilos para escribir y sincronizar ficheros en el commit, y ficheros por hilo a partir
+# de los que compensa usarlos
+WRITE_WORKERS = 8
+PARALLEL_WRITE_THRESHOLD = 8
+
+class Workspace:
+    """
+    Capa de E/S en memoria para todas las ediciones de un proyecto.
+
+    Cada fichero se lee de disco una sola vez; los pasos modifican el contenido en
+    memoria y `commit` escribe todos los cambios al final en una sola pasada
+    (fichero temporal + fsync + rename). Si algo falla antes o durante el commit,
+    el proyecto queda como estaba.
+
+    Los ficheros cuyo contenido final es idéntico al de disco no se reescriben, para no
+    cambiar su fecha de modificación e invalidar las compilaciones incrementales de Gradle.
+
+    Varios pasos pueden usar el mismo workspace desde hilos distintos siempre que no
+    editen los mismos ficheros (ver `execution_plan`). En el commit, los temporales se
+    escriben y sincronizan en paralelo para solapar la espera de cada fsync.
+    """
+
+    def __init__(self, verbose=True, max_workers=None):
+        # ruta -> [contenido original (None si no existía), contenido actual]
+        self.files = {}
+        self.directories = []
+        self.removed_trees = []
+        # (origen, destino) en el orden en que se registraron
+        self.moves = []
+        self.pruned_directories = []
+        self.written_paths = set()
+        self.verbose = verbose
+        self.max_workers = max_workers or WRITE_WORKERS
+        self.written = []
+        self.skipped = []
+        self.lock = threading.RLock()
+
+    def _load(self, path):
+        path = os.path.abspath(path)
+        if path in self.files:
+            return path
+        with self.lock:
+            disk_path = None if self._is_removed(path) else self._disk_path(path)
+        content = None
+        if disk_path is not None:
+            # La lectura se hace sin el lock para que otros hilos puedan leer a la vez
+            try:
+                with open(disk_path, "r", encoding="utf-8") as file:
+                    content = file.read()
+                    count_file(file)
+            except FileNotFoundError:
+                content = None
+        with self.lock:
+            self.files.setdefault(path, [content, content])
+        return path
+
+    def _is_removed(self, path):
+        return any(path == tree or path.startswith(tree + os.sep) for tree in self.removed_trees)
+
+    def _disk_path(self, path):
+        """Ruta en disco, antes del commit, de una ruta que puede estar dentro del destino de un movimiento."""
+        for source, destination in reversed(self.moves):
+            if path == destination or path.startswith(destination + os.sep):
+                path = source + path[len(destination):]
+            elif path == source or path.startswith(source + os.sep):
+                # El origen ya no existirá tras el commit
+                return None
+        return path
+
+    def exists(self, path):
+        """Indica si el fichero o directorio existe teniendo en cuenta los cambios pendientes."""
+        path = os.path.abspath(path)
+        with self.lock:
+            if path in self.files:
+                return self.files[path][1] is not None
+            if any(directory == path or directory.startswith(path + os.sep) for directory in self.directories):
+                return True
+            if any(name.startswith(path + os.sep) and content[1] is not None for name, content in self.files.items()):
+                return True
+            if path in self.pruned_directories:
+                return False
+            disk_path = self._disk_path(path)
+            if disk_path is None or self._is_removed(disk_path):
+                return False
+        return os.path.exists(disk_path)
+
+    def read(self, path):
+        """
+        Devuelve el contenido (pendiente o en disco) de un fichero.
+
+        Raises:
+            FileNotFoundError: Si el fichero no existe.
+        """
+        content = self.files[self._load(path)][1]
+        if content is None:
+            raise FileNotFoundError(path)
+        return content
+
+    def write(self, path, content):
+        """Guarda en memoria el nuevo contenido de un fichero. No toca el disco hasta `commit`."""
+        path = self._load(path)
+        with self.lock:
+            self.files[path][1] = content
+            self.written_paths.add(path)
+
+    def makedirs(self, path):
+        """Registra un directorio que debe existir tras el commit."""
+        path = os.path.abspath(path)
+        with self.lock:
+            if path not in self.directories:
+                self.directories.append(path)
+
+    def remove_tree(self, path):
+        """Registra un directorio que se eliminará en el commit, descartando lo pendiente dentro de él."""
+        path = os.path.abspath(path)
+        with self.lock:
+            self.removed_trees.append(path)
+            self.directories = [directory for directory in self.directories if not (directory == path or directory.startswith(path + os.sep))]
+            for name in list(self.files):
+                if name.startswith(path + os.sep):
+                    del self.files[name]
+                    self.written_paths.discard(name)
+
+    def move(self, source, destination):
+        """
+        Registra el movimiento de un fichero o directorio, que se hará en el commit con
+        `os.rename` (sin copiar el contenido). Tras registrarlo, `read` y `write` sobre las
+        rutas de destino trabajan con el contenido del origen.
+
+        Raises:
+            FileNotFoundError: Si el origen no existe.
+            FileExistsError: Si el destino ya existe.
+        """
+        source, destination = os.path.abspath(source), os.path.abspath(destination)
+        with self.lock:
+            if not self.exists(source):
+                raise FileNotFoundError(source)
+            if self.exists(destination):
+                raise FileExistsError(destination)
+            self.moves.append((source, destination))
+
+    def remove_empty_directory(self, path):
+        """Registra un directorio que se eliminará en el commit si queda vacío tras los movimientos."""
+        path = os.path.abspath(path)
+        with self.lock:
+            if path not in self.pruned_directories:
+                self.pruned_directories.append(path)
+
+    def pending_changes(self):
+        """Devuelve las rutas de los ficheros con cambios pendientes."""
+        with self.lock:
+            return [path for path, (original, current) in self.files.items() if current is not None and current != original]
+
+    def discard(self):
+        """Descarta todos los cambios pendientes."""
+        self.files.clear()
+        self.directories.clear()
+        self.removed_trees.clear()
+        self.moves.clear()
+        self.pruned_directories.clear()
+        self.written_paths.clear()
+
+    @traced
+    def commit(self):
+        """
+        Escribe todos los cambios pendientes de forma atómica.
+
+        1. Los directorios eliminados se renombran a una copia de seguridad.
+        2. Se hacen los movimientos registrados y se quitan los directorios que quedan vacíos.
+        3. Cada fichero modificado se escribe en un temporal del mismo directorio con fsync.
+        4. Los temporales sustituyen a los originales con `os.replace` y se sincronizan los directorios.
+        Si cualquier paso falla se deshacen los anteriores y se relanza la excepción.
+
+        Returns:
+            list: Rutas de los ficheros escritos. Las de los ficheros sin cambios se añaden
+            a `skipped`.
+        """
+        changed = self.pending_changes()
+        unchanged = sorted(self.written_paths.difference(changed))
+        temporaries = {}
+        created_directories = []
+        backups = []
+        moved = []
+        pruned = []
+        replaced = []
+        try:
+            for tree in self.removed_trees:
+                if os.path.exists(tree):
+                    backup = tempfile.mkdtemp(prefix=f".{os.path.basename(tree)}.", suffix=".bak", dir=os.path.dirname(tree))
+                    os.rmdir(backup)
+                    os.rename(tree, backup)
+                    backups.append((tree, backup))
+
+            for source, destination in self.moves:
+                created_directories.extend(_makedirs(os.path.dirname(destination)))
+                os.rename(source, destination)
+                moved.append((source, destination))
+                count("renames")
+
+            # Primero los más profundos, para que sus padres puedan quedar vacíos
+            for directory in sorted(self.pruned_directories, key=len, reverse=True):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    continue
+                pruned.append(directory)
+
+            for directory in self.directories + [os.path.dirname(path) for path in changed]:
+                created_directories.extend(_makedirs(directory))
+
+            written, error = self._parallel(self._write_temporary, changed)
+            temporaries.update(written)
+            if error is not None:
+                raise error
+
+            for path in changed:
+                os.replace(temporaries[path], path)
+                del temporaries[path]
+                replaced.append(path)
+                count("renames")
+
+            _, error = self._parallel(_fsync_directory, sorted({os.path.dirname(path) for path in changed}))
+            if error is not None:
+                raise error
+        except BaseException:
+            self._rollback(temporaries, replaced, backups, created_directories, moved, pruned)
+            raise
+
+        for _, backup in backups:
+            shutil.rmtree(backup, ignore_errors=True)
+        for path in changed:
+            self.files[path][0] = self.files[path][1]
+        self.directories.clear()
+        self.removed_trees.clear()
+        self.moves.clear()
+        self.pruned_directories.clear()
+        self.written_paths.clear()
+        self.written.extend(changed)
+        self.skipped.extend(unchanged)
+        if self.verbose and (changed or unchanged):
+            print(f"Ficheros escritos: {len(changed)}, sin cambios (no se reescriben): {len(unchanged)}.")
+        return changed
+
+    def _write_temporary(self, path):
+        """Escribe el contenido pendiente de `path` en un temporal sincronizado de su mismo directorio."""
+        fd, temporary = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(self.files[path][1])
+                file.flush()
+                os.fsync(file.fileno())
+                count_file(file, written=True)
+                count("fsyncs")
+            if os.path.exists(path):
+                shutil.copymode(path, temporary)
+            else:
+                os.chmod(temporary, 0o666 & ~UMASK)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return temporary
+
+    def _parallel(self, function, items):
+        """
+        Aplica `function` a cada elemento, con varios hilos si son muchos: mientras un
+        hilo espera su fsync, los demás siguen escribiendo.
+
+        Returns:
+            tuple: ({elemento: resultado} de los que terminaron bien, primera excepción o None)
+        """
+        results, error = {}, None
+        workers = min(self.max_workers, len(items) // PARALLEL_WRITE_THRESHOLD)
+        if workers <= 1:
+            for item in items:
+                try:
+                    results[item] = function(item)
+                except BaseException as e:
+                    return results, e
+            return results, None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            function = propagate(function)
+            futures = [(item, executor.submit(function, item)) for item in items]
+        for item, future in futures:
+            try:
+                results[item] = future.result()
+            except BaseException as e:
+                error = error or e
+        return results, error
+
+    def _rollback(self, temporaries, replaced, backups, created_directories, moved=(), pruned=()):
+        """Restaura el estado previo al commit."""
+        for temporary in temporaries.values():
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        for path in replaced:
+            original = self.files[path][0]
+            if original is None:
+                os.remove(path)
+            else:
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(original)
+        for directory in reversed(pruned):
+            os.mkdir(directory)
+        for source, destination in reversed(moved):
+            os.rename(destination, source)
+        for tree, backup in reversed(backups):
+            if os.path.exists(tree):
+                shutil.rmtree(tree)
+            os.rename(backup, tree)
+        for directory in reversed(created_directories):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+def _makedirs(path):
+    """Crea un directorio y sus padres. Devuelve los directorios creados, del más externo al más interno."""
+    created = []
+    while path and not os.path.exists(path):
+        created.append(path)
+        path = os.path.dirname(path)
+    for directory in reversed(created):
+        os.mkdir(directory)
+    return list(reversed(created))
+
+def _read_umask():
+    """
+    Lee la umask del proceso (mkstemp crea los temporales con permisos 0600). En Linux
+    se lee de /proc sin modificarla; si no, hay que cambiarla y restaurarla, y mientras
+    tanto cualquier fichero que otro hilo cree quedaría con permisos 0666.
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+# Se lee una sola vez al importar, antes de que haya hilos escribiendo
+UMASK = _read_umask()
+
+def _fsync_directory(path):
+    """Sincroniza la entrada del directorio para que los rename sobrevivan a un corte."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+        count("fsyncs")
+    finally:
+        os.close(fd)
+
+@contextmanager
+def open_workspace(workspace=None):
+    """
+    Reutiliza el workspace recibido o, si es None, crea uno que se confirma al salir.
+
+    Permite que cada paso funcione por sí solo y, a la vez, participe en el commit único
+    de un workspace compartido.
+    """
+    if workspace is not None:
+        yield workspace
+        return
+    with Workspace() as workspace:
+        yield workspace
@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from dependency_rules import Dependency, apply_fixes, load_rules  # noqa: E402
+
+def check(selected, existing=()):
+    existing = [Dependency.parse(coordinate, "catalog") for coordinate in existing]
+    violations = load_rules().check(selected, existing)
+    return violations, existing
+
+class ExclusiveTest(unittest.TestCase):
+    def test_moshi_and_gson_are_rejected(self):
+        violations, _ = check(["com.squareup.moshi:moshi-kotlin:1.15.0", "com.google.code.gson:gson:2.10.1"])
+        self.assertEqual([violation.rule for violation in violations], ["json-serialization"])
+        self.assertEqual(violations[0].severity, "error")
+        self.assertFalse(violations[0].fixable)
+
+    def test_gson_against_moshi_already_in_the_project(self):
+        violations, _ = check(["com.google.code.gson:gson:2.10.1"], ["com.squareup.moshi:moshi:1.15.0"])
+        self.assertEqual([violation.rule for violation in violations], ["json-serialization"])
+
+    def test_same_family_is_not_exclusive(self):
+        violations, _ = check(["com.squareup.moshi:moshi:1.15.0", "com.squareup.moshi:moshi-kotlin:1.15.0"])
+        self.assertEqual(violations, [])
+
+class RequiresTest(unittest.TestCase):
+    def test_companion_of_the_same_family_takes_its_version(self):
+        selected = ["com.squareup.okhttp3:logging-interceptor:4.12.0"]
+        violations, existing = check(selected)
+        self.assertEqual([violation.rule for violation in violations], ["okhttp-logging"])
+        fixed, updates = apply_fixes(selected, violations, existing)
+        self.assertEqual(fixed, selected + ["com.squareup.okhttp3:okhttp:4.12.0"])
+        self.assertEqual(updates, {})
+
+    def test_companion_already_in_the_project_is_not_added(self):
+        violations, _ = check(["com.google.dagger:hilt-android:2.50"], ["com.google.dagger:hilt-compiler:2.50"])
+        self.assertEqual(violations, [])
+
+    def test_unversioned_companion_is_resolved(self):
+        selected = ["org.junit.jupiter:junit-jupiter-api:5.10.1"]
+        violations, existing = check(selected)
+        fixed, _ = apply_fixes(selected, violations, existing, resolve_version=lambda group, name: "0")
+        self.assertEqual(fixed, selected + ["org.junit.jupiter:junit-jupiter-engine:5.10.1"])
+
+class AlignTest(unittest.TestCase):
+    def test_selection_is_aligned_to_the_highest_version(self):
+        selected = ["androidx.room:room-runtime:2.5.2", "androidx.room:room-ktx:2.6.1"]
+        violations, existing = check(selected)
+        fixed, updates = apply_fixes(selected, violations, existing)
+        self.assertEqual(fixed, ["androidx.room:room-runtime:2.6.1", "androidx.room:room-ktx:2.6.1"])
+        self.assertEqual(updates, {})
+
+    def test_project_dependency_is_updated(self):
+        selected = ["androidx.room:room-ktx:2.6.1"]
+        violations, existing = check(selected, ["androidx.room:room-runtime:2.5.2"])
+        fixed, updates = apply_fixes(selected, violations, existing)
+        self.assertEqual(fixed, selected)
+        self.assertEqual(updates, {"androidx.room:room-runtime": "2.6.1"})
+
+    def test_shadowed_selection_is_aligned(self):
+        # room-compiler ya está en el proyecto con otra versión que la seleccionada
+        selected = ["androidx.room:room-ktx:2.5.2", "androidx.room:room-runtime:2.5.2",
+                    "androidx.room:room-compiler:2.5.2"]
+        violations, existing = check(selected, ["androidx.room:room-compiler:2.6.1"])
+        self.assertEqual([violation.rule for violation in violations], ["androidx-room"])
+        self.assertEqual(violations[0].updates, dict.fromkeys(
+            ["androidx.room:room-ktx", "androidx.room:room-runtime", "androidx.room:room-compiler"], "2.6.1"))
+        fixed, updates = apply_fixes(selected, violations, existing)
+        self.assertEqual(fixed, ["androidx.room:room-ktx:2.6.1", "androidx.room:room-runtime:2.6.1",
+                                 "androidx.room:room-compiler:2.6.1"])
+        self.assertEqual(updates, {})
+
+    def test_untouched_project_families_are_ignored(self):
+        violations, _ = check(["junit:junit:4.13.2"],
+                              ["androidx.room:room-ktx:2.5.2", "androidx.room:room-runtime:2.6.1"])
+        self.assertEqual(violations, [])
+
+class BomTest(unittest.TestCase):
+    def test_unversioned_member_adds_the_bom(self):
+        violations, _ = check(["com.google.firebase:firebase-analytics"])
+        self.assertEqual(violations[0].additions, ["com.google.firebase:firebase-bom"])
+
+    def test_versioned_member_drops_its_version(self):
+        selected = ["com.google.firebase:firebase-analytics:21.5.0"]
+        violations, existing = check(selected, ["com.google.firebase:firebase-bom:32.7.0"])
+        fixed, _ = apply_fixes(selected, violations, existing)
+        self.assertEqual(fixed, ["com.google.firebase:firebase-analytics"])
+
+if __name__ == "__main__":
+    unittest.main()
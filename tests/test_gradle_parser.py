@@ -0,0 +1,217 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from gradle_parser import GradleBuildFile  # noqa: E402
+
+KTS_MODULE = """\
+plugins {
+    alias(libs.plugins.android.application)
+    // kotlin("kapt")
+}
+
+android {
+    namespace = "com.example.app" // paquete { con llaves }
+    buildTypes {
+        release {
+            isMinifyEnabled = false
+        }
+    }
+}
+
+dependencies {
+    implementation(libs.androidx.core.ktx)
+    /* implementation("com.squareup.retrofit2:retrofit:2.9.0") */
+    testImplementation("junit:junit:4.13.2")
+}
+"""
+
+GROOVY_MODULE = """\
+apply plugin: 'com.android.application'
+
+android {
+    namespace 'com.example.app'
+    defaultConfig {
+        minSdk 21 // mínimo
+    }
+}
+
+dependencies {
+    implementation 'androidx.core:core-ktx:1.10.0'
+}
+"""
+
+KTS_BUILDSCRIPT_ROOT = """\
+// Raíz clásica
+buildscript {
+    dependencies {
+        classpath("com.android.tools.build:gradle:8.1.0")
+    }
+}
+
+allprojects {
+    repositories { google() }
+}
+"""
+
+GROOVY_BUILDSCRIPT_ROOT = """\
+buildscript {
+    repositories {
+        google()
+    }
+    dependencies {
+        classpath 'com.android.tools.build:gradle:8.1.0'
+    }
+}
+"""
+
+def kts(text):
+    return GradleBuildFile.for_path("build.gradle.kts", text)
+
+def groovy(text):
+    return GradleBuildFile.for_path("build.gradle", text)
+
+class ParseTest(unittest.TestCase):
+    def test_commented_declarations_are_ignored(self):
+        gradle_file = kts(KTS_MODULE)
+        self.assertTrue(gradle_file.has_dependency("libs.androidx.core.ktx"))
+        self.assertTrue(gradle_file.has_dependency("junit:junit:4.13.2"))
+        self.assertFalse(gradle_file.has_dependency("com.squareup.retrofit2:retrofit"))
+        self.assertFalse(gradle_file.has_plugin("org.jetbrains.kotlin.kapt"))
+
+    def test_braces_in_comments_do_not_open_blocks(self):
+        gradle_file = kts(KTS_MODULE)
+        self.assertEqual(gradle_file.get_property(("android",), "namespace"), '"com.example.app"')
+        self.assertEqual(gradle_file.get_property(("android", "buildTypes", "release"), "isMinifyEnabled"), "false")
+
+    def test_groovy_apply_plugin_and_properties(self):
+        gradle_file = groovy(GROOVY_MODULE)
+        self.assertTrue(gradle_file.has_plugin("com.android.application"))
+        self.assertEqual(gradle_file.get_property(("android", "defaultConfig"), "minSdk"), "21")
+
+    def test_buildscript_dependencies_are_not_module_dependencies(self):
+        gradle_file = groovy(GROOVY_BUILDSCRIPT_ROOT)
+        self.assertEqual(gradle_file.dependencies, [])
+
+class EditTest(unittest.TestCase):
+    def test_unchanged_file_round_trips(self):
+        for gradle_file, text in ((kts(KTS_MODULE), KTS_MODULE), (groovy(GROOVY_MODULE), GROOVY_MODULE)):
+            self.assertFalse(gradle_file.changed)
+            self.assertEqual(gradle_file.to_text(), text)
+
+    def test_add_dependencies_kts(self):
+        gradle_file = kts(KTS_MODULE)
+        added = gradle_file.add_dependencies([("implementation", "com.squareup.retrofit2:retrofit:2.9.0"),
+                                              ("testImplementation", "junit:junit:4.13.2")])
+        self.assertEqual(added, ['implementation("com.squareup.retrofit2:retrofit:2.9.0")'])
+        self.assertEqual(gradle_file.to_text(), KTS_MODULE.replace(
+            '    testImplementation("junit:junit:4.13.2")\n',
+            '    testImplementation("junit:junit:4.13.2")\n'
+            '    implementation("com.squareup.retrofit2:retrofit:2.9.0")\n'))
+
+    def test_add_dependencies_groovy(self):
+        gradle_file = groovy(GROOVY_MODULE)
+        gradle_file.add_dependencies([("ksp", "androidx.room:room-compiler:2.6.1"),
+                                      ("implementation", "androidx.room:room-bom:2.6.1", True)])
+        self.assertEqual(gradle_file.to_text(), GROOVY_MODULE.replace(
+            "    implementation 'androidx.core:core-ktx:1.10.0'\n",
+            "    implementation 'androidx.core:core-ktx:1.10.0'\n"
+            "    ksp 'androidx.room:room-compiler:2.6.1'\n"
+            "    implementation platform('androidx.room:room-bom:2.6.1')\n"))
+
+    def test_add_dependencies_creates_block(self):
+        gradle_file = groovy(GROOVY_BUILDSCRIPT_ROOT)
+        gradle_file.add_dependencies([("implementation", "androidx.core:core-ktx:1.10.0")])
+        self.assertEqual(gradle_file.to_text(), GROOVY_BUILDSCRIPT_ROOT
+                         + "\ndependencies {\n    implementation 'androidx.core:core-ktx:1.10.0'\n}\n")
+
+    def test_remove_dependencies(self):
+        gradle_file = kts(KTS_MODULE)
+        gradle_file.remove_dependencies(lambda declaration: declaration.key == "junit:junit")
+        self.assertEqual(gradle_file.to_text(), KTS_MODULE.replace('    testImplementation("junit:junit:4.13.2")\n', ""))
+
+    def test_set_property_replaces_value_and_keeps_comment(self):
+        gradle_file = groovy(GROOVY_MODULE)
+        self.assertTrue(gradle_file.set_property(("android", "defaultConfig"), "minSdk", "24"))
+        self.assertFalse(groovy(gradle_file.to_text()).set_property(("android", "defaultConfig"), "minSdk", "24"))
+        self.assertEqual(gradle_file.to_text(), GROOVY_MODULE.replace("minSdk 21 // mínimo", "minSdk 24 // mínimo"))
+
+    def test_set_property_creates_missing_blocks(self):
+        gradle_file = kts(KTS_MODULE)
+        gradle_file.set_property(("android", "buildFeatures"), "viewBinding", "true")
+        self.assertEqual(gradle_file.to_text(), KTS_MODULE.replace(
+            "            isMinifyEnabled = false\n        }\n    }\n}\n",
+            "            isMinifyEnabled = false\n        }\n    }\n"
+            "    buildFeatures {\n        viewBinding = true\n    }\n}\n"))
+
+    def test_add_to_block_groups_lines_in_one_new_block(self):
+        gradle_file = groovy(GROOVY_MODULE)
+        gradle_file.add_to_block(("android", "buildTypes", "release"), ["minifyEnabled true", "shrinkResources true"])
+        self.assertEqual(gradle_file.to_text(), GROOVY_MODULE.replace(
+            "        minSdk 21 // mínimo\n    }\n}\n",
+            "        minSdk 21 // mínimo\n    }\n"
+            "    buildTypes {\n        release {\n            minifyEnabled true\n            shrinkResources true\n"
+            "        }\n    }\n}\n"))
+
+    def test_calls(self):
+        gradle_file = kts(KTS_MODULE.replace(
+            "isMinifyEnabled = false",
+            'isMinifyEnabled = false\n            proguardFiles(getDefaultProguardFile("proguard-android.txt"), "proguard-rules.pro")'))
+        path = ("android", "buildTypes", "release")
+        self.assertEqual(gradle_file.get_call_strings(path, "proguardFiles"), ["proguard-rules.pro"])
+        self.assertIsNone(gradle_file.get_call_strings(("android", "defaultConfig"), "consumerProguardFiles"))
+        gradle_file.set_call(path, "proguardFiles", '"proguard-rules.pro"')
+        self.assertIn('            proguardFiles("proguard-rules.pro")\n', gradle_file.to_text())
+
+    def test_set_dependency_version(self):
+        gradle_file = groovy(GROOVY_MODULE)
+        self.assertTrue(gradle_file.set_dependency_version("androidx.core:core-ktx", "1.12.0"))
+        self.assertFalse(gradle_file.set_dependency_version("junit:junit", "4.13.2"))
+        self.assertEqual(gradle_file.to_text(), GROOVY_MODULE.replace("core-ktx:1.10.0", "core-ktx:1.12.0"))
+        gradle_file = kts(KTS_MODULE)
+        self.assertTrue(gradle_file.set_dependency_version("junit:junit", None))
+        self.assertIn('testImplementation("junit:junit")', gradle_file.to_text())
+
+    def test_remove_groovy_apply_plugin(self):
+        gradle_file = groovy(GROOVY_MODULE)
+        gradle_file.remove_plugins({"com.android.application"})
+        self.assertEqual(gradle_file.to_text(), GROOVY_MODULE.replace("apply plugin: 'com.android.application'\n", ""))
+
+class AddPluginsTest(unittest.TestCase):
+    def test_existing_block(self):
+        gradle_file = kts(KTS_MODULE)
+        gradle_file.add_plugins(['id("com.google.devtools.ksp")'])
+        self.assertEqual(gradle_file.to_text(), KTS_MODULE.replace(
+            "    // kotlin(\"kapt\")\n}", "    // kotlin(\"kapt\")\n    id(\"com.google.devtools.ksp\")\n}"))
+
+    def test_new_block_goes_after_buildscript_kts(self):
+        gradle_file = kts(KTS_BUILDSCRIPT_ROOT)
+        gradle_file.add_plugins(['id("com.google.devtools.ksp") version "1.9.22-1.0.17" apply false'])
+        self.assertEqual(gradle_file.to_text(), KTS_BUILDSCRIPT_ROOT.replace(
+            "    }\n}\n\nallprojects",
+            "    }\n}\n\nplugins {\n    id(\"com.google.devtools.ksp\") version \"1.9.22-1.0.17\" apply false\n}\n\nallprojects"))
+
+    def test_new_block_goes_after_buildscript_groovy(self):
+        gradle_file = groovy(GROOVY_BUILDSCRIPT_ROOT)
+        gradle_file.add_plugins(["id 'com.google.devtools.ksp' version '1.9.22-1.0.17' apply false"])
+        text = gradle_file.to_text()
+        self.assertEqual(text, GROOVY_BUILDSCRIPT_ROOT.rstrip("\n")
+                         + "\n\nplugins {\n    id 'com.google.devtools.ksp' version '1.9.22-1.0.17' apply false\n}\n")
+        self.assertTrue(groovy(text).has_plugin("com.google.devtools.ksp"))
+
+    def test_new_block_goes_after_imports(self):
+        text = "import java.util.Properties\n\nval properties = Properties()\n"
+        gradle_file = kts(text)
+        gradle_file.add_plugins(['id("a")'])
+        self.assertEqual(gradle_file.to_text(),
+                         "import java.util.Properties\n\nplugins {\n    id(\"a\")\n}\n\nval properties = Properties()\n")
+
+    def test_new_block_at_start_without_buildscript(self):
+        gradle_file = kts("allprojects {}\n")
+        gradle_file.add_plugins(['id("a")'])
+        self.assertEqual(gradle_file.to_text(), "plugins {\n    id(\"a\")\n}\n\nallprojects {}\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from manifest_editor import AndroidManifest  # noqa: E402
+
+MANIFEST = """\
+<?xml version="1.0" encoding="utf-8"?>
+<manifest xmlns:android="http://schemas.android.com/apk/res/android"
+    package="com.example.app">
+
+    <!-- Red -->
+    <uses-permission android:name="android.permission.INTERNET" />
+
+    <application
+        android:label="Ejemplo">
+        <activity android:name=".view.HomeActivity" android:exported="true">
+            <intent-filter>
+                <action android:name="android.intent.action.MAIN" />
+                <category android:name="android.intent.category.LAUNCHER" />
+            </intent-filter>
+        </activity>
+    </application>
+</manifest>
+"""
+
+class ParseTest(unittest.TestCase):
+    def test_index(self):
+        manifest = AndroidManifest(MANIFEST)
+        self.assertEqual(manifest.package_name, "com.example.app")
+        self.assertTrue(manifest.has_permission("INTERNET"))
+        self.assertTrue(manifest.has_activity("com.example.app.view.HomeActivity"))
+        self.assertEqual(manifest.launcher_activities(), ["com.example.app.view.HomeActivity"])
+
+    def test_invalid_xml(self):
+        with self.assertRaises(ValueError):
+            AndroidManifest("<manifest><application></manifest>")
+
+class EditTest(unittest.TestCase):
+    def test_unchanged_manifest_round_trips(self):
+        manifest = AndroidManifest(MANIFEST)
+        self.assertFalse(manifest.changed)
+        self.assertEqual(manifest.to_text(), MANIFEST)
+
+    def test_permissions_go_after_the_existing_ones(self):
+        manifest = AndroidManifest(MANIFEST)
+        self.assertEqual(manifest.add_permissions(["INTERNET", "CAMERA", "android.permission.CAMERA"]),
+                         ["android.permission.CAMERA"])
+        self.assertEqual(manifest.to_text(), MANIFEST.replace(
+            '    <uses-permission android:name="android.permission.INTERNET" />\n',
+            '    <uses-permission android:name="android.permission.INTERNET" />\n'
+            '    <uses-permission android:name="android.permission.CAMERA" />\n'))
+
+    def test_activities_go_at_the_end_of_application(self):
+        manifest = AndroidManifest(MANIFEST)
+        self.assertEqual(manifest.add_activities([(".view.HomeActivity", True), "com.example.app.view.DetailActivity"]),
+                         ["com.example.app.view.DetailActivity"])
+        self.assertEqual(manifest.to_text(), MANIFEST.replace(
+            "        </activity>\n    </application>",
+            "        </activity>\n"
+            '        <activity android:name="com.example.app.view.DetailActivity" android:exported="false"/>\n'
+            "    </application>"))
+
+    def test_remove_permissions_deletes_whole_lines(self):
+        manifest = AndroidManifest(MANIFEST)
+        self.assertEqual(manifest.remove_permissions(["INTERNET"]), ["android.permission.INTERNET"])
+        self.assertEqual(manifest.to_text(), MANIFEST.replace(
+            '    <uses-permission android:name="android.permission.INTERNET" />\n', ""))
+
+    def test_self_closing_application_is_expanded(self):
+        text = ('<manifest xmlns:android="http://schemas.android.com/apk/res/android">\n'
+                "    <application />\n"
+                "</manifest>\n")
+        manifest = AndroidManifest(text, "com.example.app")
+        manifest.add_profileable()
+        self.assertFalse(manifest.add_profileable())
+        self.assertEqual(manifest.to_text(),
+                         '<manifest xmlns:android="http://schemas.android.com/apk/res/android">\n'
+                         "    <application>\n"
+                         '        <profileable android:shell="true" />\n'
+                         "    </application>\n"
+                         "</manifest>\n")
+
+    def test_custom_prefix_and_first_permission(self):
+        text = ('<manifest xmlns:a="http://schemas.android.com/apk/res/android">\n'
+                '\t<application a:label="x"/>\n'
+                "</manifest>\n")
+        manifest = AndroidManifest(text, "com.example.app")
+        manifest.add_permissions(["INTERNET"])
+        self.assertEqual(manifest.to_text(), text.replace(
+            "\t<application", '\t<uses-permission a:name="android.permission.INTERNET" />\n\t<application'))
+
+if __name__ == "__main__":
+    unittest.main()
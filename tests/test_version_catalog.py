@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from version_catalog import VersionCatalog, parse_value  # noqa: E402
+
+CATALOG = """\
+# Catálogo del proyecto
+[versions]
+agp = "8.2.0"
+kotlin = "1.9.22" # se actualiza con el plugin
+retrofit = "2.9.0"
+
+[libraries]
+retrofit = { module = "com.squareup.retrofit2:retrofit", version.ref = "retrofit" }
+androidx-core-ktx = { group = "androidx.core", name = "core-ktx", version = "1.12.0" }
+compose-bom = { group = "androidx.compose",
+    name = "compose-bom", version = "2024.02.00" }
+
+[plugins]
+android-application = { id = "com.android.application", version.ref = "agp" }
+"""
+
+class ParseTest(unittest.TestCase):
+    def test_parse_value(self):
+        self.assertEqual(parse_value('{ group = "a", name = "b", version.ref = "c" }'),
+                         {"group": "a", "name": "b", "version": {"ref": "c"}})
+        self.assertEqual(parse_value('["a", "b"] # bundle'), ["a", "b"])
+        with self.assertRaises(ValueError):
+            parse_value('"a" "b"')
+
+    def test_index(self):
+        catalog = VersionCatalog(CATALOG)
+        self.assertEqual(catalog.get("versions", "kotlin").value, "1.9.22")
+        self.assertIs(catalog.get("libraries", "androidx_core.ktx"), catalog.get("libraries", "androidx-core-ktx"))
+        self.assertEqual(catalog.find_library("com.squareup.retrofit2", "retrofit").alias, "retrofit")
+        self.assertEqual(catalog.find_library("androidx.compose", "compose-bom").alias, "compose-bom")
+        self.assertEqual(catalog.find_plugin("com.android.application").alias, "android-application")
+        self.assertEqual(catalog.version_of(catalog.get("libraries", "retrofit").value), "2.9.0")
+
+class EditTest(unittest.TestCase):
+    def test_unchanged_catalog_round_trips(self):
+        catalog = VersionCatalog(CATALOG)
+        self.assertFalse(catalog.changed)
+        self.assertEqual(catalog.to_text(), CATALOG)
+
+    def test_additions_go_after_the_last_entry_of_each_section(self):
+        catalog = VersionCatalog(CATALOG)
+        catalog.add_version("room", "2.6.1")
+        catalog.add_library("room-ktx", "androidx.room", "room-ktx", version_ref="room")
+        catalog.add_plugin("ksp", "com.google.devtools.ksp", version="1.9.22-1.0.17")
+        self.assertEqual(catalog.to_text(), CATALOG.replace(
+            'retrofit = "2.9.0"\n', 'retrofit = "2.9.0"\nroom = "2.6.1"\n'
+        ).replace(
+            '    name = "compose-bom", version = "2024.02.00" }\n',
+            '    name = "compose-bom", version = "2024.02.00" }\n'
+            'room-ktx = { group = "androidx.room", name = "room-ktx", version.ref = "room" }\n'
+        ) + 'ksp = { id = "com.google.devtools.ksp", version = "1.9.22-1.0.17" }\n')
+
+    def test_missing_section_is_appended(self):
+        catalog = VersionCatalog(CATALOG)
+        catalog.add_bundle("network", ["retrofit", "androidx-core-ktx"])
+        self.assertEqual(catalog.to_text(), CATALOG + '\n[bundles]\nnetwork = ["retrofit", "androidx-core-ktx"]\n')
+
+    def test_duplicate_alias_is_rejected(self):
+        catalog = VersionCatalog(CATALOG)
+        with self.assertRaises(ValueError):
+            catalog.add_library("androidx_core_ktx", "androidx.core", "core-ktx", version="1.13.0")
+
+    def test_set_version_keeps_comment(self):
+        catalog = VersionCatalog(CATALOG)
+        self.assertTrue(catalog.set_version("kotlin", "2.0.0"))
+        self.assertFalse(catalog.set_version("agp", "8.2.0"))
+        self.assertEqual(catalog.to_text(), CATALOG.replace('kotlin = "1.9.22" #', 'kotlin = "2.0.0" #'))
+
+    def test_set_version_of_a_new_entry(self):
+        catalog = VersionCatalog(CATALOG)
+        catalog.add_version("room", "2.6.0")
+        catalog.set_version("room", "2.6.1")
+        self.assertIn('retrofit = "2.9.0"\nroom = "2.6.1"\n', catalog.to_text())
+
+    def test_empty_catalog(self):
+        catalog = VersionCatalog("")
+        catalog.add_version("kotlin", "1.9.22")
+        catalog.add_library("junit", "junit", "junit", version="4.13.2")
+        self.assertEqual(catalog.to_text(), '[versions]\nkotlin = "1.9.22"\n\n'
+                                            '[libraries]\njunit = { group = "junit", name = "junit", version = "4.13.2" }\n')
+
+if __name__ == "__main__":
+    unittest.main()
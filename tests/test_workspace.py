@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import workspace as workspace_module  # noqa: E402
+from workspace import Workspace, open_workspace  # noqa: E402
+
+class WorkspaceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def write_file(self, name, content):
+        path = self.path(*name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def read_file(self, name):
+        with open(self.path(*name.split("/")), "r", encoding="utf-8") as file:
+            return file.read()
+
+    def listing(self):
+        return sorted(os.path.relpath(os.path.join(base, name), self.root)
+                      for base, directories, files in os.walk(self.root) for name in directories + files)
+
+class CommitTest(WorkspaceTest):
+    def test_changes_stay_in_memory_until_commit(self):
+        self.write_file("build.gradle", "a")
+        workspace = Workspace(verbose=False)
+        workspace.write(self.path("build.gradle"), "b")
+        workspace.write(self.path("app", "src", "Main.kt"), "main")
+        self.assertEqual(workspace.read(self.path("build.gradle")), "b")
+        self.assertTrue(workspace.exists(self.path("app", "src")))
+        self.assertEqual(self.read_file("build.gradle"), "a")
+        self.assertFalse(os.path.exists(self.path("app")))
+
+        self.assertEqual(sorted(workspace.commit()), [self.path("app", "src", "Main.kt"), self.path("build.gradle")])
+        self.assertEqual(self.read_file("build.gradle"), "b")
+        self.assertEqual(self.read_file("app/src/Main.kt"), "main")
+        self.assertEqual(workspace.pending_changes(), [])
+
+    def test_unchanged_files_are_not_rewritten(self):
+        path = self.write_file("gradle.properties", "a=1\n")
+        os.utime(path, (1000000000, 1000000000))
+        workspace = Workspace(verbose=False)
+        workspace.write(path, "a=2\n")
+        workspace.write(path, "a=1\n")
+        self.assertEqual(workspace.commit(), [])
+        self.assertEqual(workspace.skipped, [path])
+        self.assertEqual(os.stat(path).st_mtime, 1000000000)
+
+    def test_read_of_missing_file(self):
+        workspace = Workspace(verbose=False)
+        with self.assertRaises(FileNotFoundError):
+            workspace.read(self.path("missing.txt"))
+
+    def test_context_manager_discards_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with Workspace(verbose=False) as workspace:
+                workspace.write(self.path("new.txt"), "x")
+                raise RuntimeError
+        self.assertEqual(self.listing(), [])
+
+class RollbackTest(WorkspaceTest):
+    def test_failed_replace_restores_every_file(self):
+        self.write_file("a.txt", "a")
+        self.write_file("b.txt", "b")
+        workspace = Workspace(verbose=False)
+        workspace.write(self.path("a.txt"), "a2")
+        workspace.write(self.path("b.txt"), "b2")
+        workspace.write(self.path("new", "c.txt"), "c")
+        real_replace = os.replace
+        calls = []
+
+        def failing_replace(source, destination):
+            calls.append(destination)
+            if len(calls) == 2:
+                raise OSError("disco lleno")
+            real_replace(source, destination)
+
+        with mock.patch.object(workspace_module.os, "replace", failing_replace):
+            with self.assertRaises(OSError):
+                workspace.commit()
+        self.assertEqual(self.read_file("a.txt"), "a")
+        self.assertEqual(self.read_file("b.txt"), "b")
+        # Sin temporales ni directorios creados por el commit
+        self.assertEqual(self.listing(), ["a.txt", "b.txt"])
+
+    def test_failed_commit_undoes_moves_and_removed_trees(self):
+        self.write_file("old/Main.kt", "main")
+        self.write_file("build/output.txt", "x")
+        workspace = Workspace(verbose=False)
+        workspace.move(self.path("old"), self.path("src", "new"))
+        workspace.remove_tree(self.path("build"))
+        workspace.write(self.path("src", "new", "Main.kt"), "main2")
+        with mock.patch.object(workspace_module.os, "replace", side_effect=OSError("disco lleno")):
+            with self.assertRaises(OSError):
+                workspace.commit()
+        self.assertEqual(self.listing(), ["build", "build/output.txt", "old", "old/Main.kt"])
+        self.assertEqual(self.read_file("old/Main.kt"), "main")
+
+class TreeTest(WorkspaceTest):
+    def test_move_reads_from_the_source_until_commit(self):
+        self.write_file("old/Main.kt", "main")
+        workspace = Workspace(verbose=False)
+        workspace.move(self.path("old"), self.path("new"))
+        self.assertEqual(workspace.read(self.path("new", "Main.kt")), "main")
+        self.assertFalse(workspace.exists(self.path("old")))
+        with self.assertRaises(FileExistsError):
+            workspace.move(self.path("new"), self.path("new"))
+        workspace.commit()
+        self.assertEqual(self.listing(), ["new", "new/Main.kt"])
+
+    def test_remove_tree_drops_pending_files_and_backup(self):
+        self.write_file("build/output.txt", "x")
+        workspace = Workspace(verbose=False)
+        workspace.write(self.path("build", "pending.txt"), "y")
+        workspace.remove_tree(self.path("build"))
+        self.assertFalse(workspace.exists(self.path("build", "output.txt")))
+        self.assertEqual(workspace.commit(), [])
+        self.assertEqual(self.listing(), [])
+
+class OpenWorkspaceTest(WorkspaceTest):
+    def test_nested_steps_share_the_outer_commit(self):
+        with open_workspace() as outer:
+            outer.verbose = False
+            with open_workspace(outer) as inner:
+                self.assertIs(inner, outer)
+                inner.write(self.path("a.txt"), "a")
+            self.assertEqual(self.listing(), [])
+        self.assertEqual(self.read_file("a.txt"), "a")
+
+if __name__ == "__main__":
+    unittest.main()